@@ -0,0 +1,31 @@
+"""Add chunk contents
+
+Revision ID: 4d5e6f7a8b9c
+Revises: 3c4d5e6f7a8b
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4d5e6f7a8b9c"
+down_revision = "3c4d5e6f7a8b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chunk_contents",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("content_hash"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chunk_contents")
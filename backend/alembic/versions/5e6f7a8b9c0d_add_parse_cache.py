@@ -0,0 +1,33 @@
+"""Add parse cache
+
+Revision ID: 5e6f7a8b9c0d
+Revises: 4d5e6f7a8b9c
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e6f7a8b9c0d"
+down_revision = "4d5e6f7a8b9c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "parse_cache",
+        sa.Column("blob_sha", sa.String(length=40), nullable=False),
+        sa.Column("grammar", sa.String(length=16), nullable=False),
+        sa.Column("parser_version", sa.String(length=16), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("blob_sha", "grammar", "parser_version", name="pk_parse_cache"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("parse_cache")
@@ -0,0 +1,27 @@
+"""Add chunk_contents.used_at
+
+Revision ID: 6f7a8b9c0d1e
+Revises: 5e6f7a8b9c0d
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6f7a8b9c0d1e"
+down_revision = "5e6f7a8b9c0d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chunk_contents",
+        sa.Column("used_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chunk_contents", "used_at")
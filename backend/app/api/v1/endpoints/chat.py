@@ -1,5 +1,5 @@
 import os
-from typing import Any, Dict, List, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
@@ -7,24 +7,42 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.config import settings
 from app.core.database import SessionLocal
 from app.models.chat import ChatMessage, ChatSession
 from app.models.repository import Repository
 from app.models.user import User
 from app.services.llm import LLMService
-from app.services.vector_db import VectorDBService
+from app.services.vector_db import get_vector_store
 from app.services.cache import CacheService
+from app.services.content_store import fill_contents
+from app.services.reranker import get_reranker
+from app.services.result_cutoff import SearchResults
 from app.utils.prompts import RAG_PROMPT_TEMPLATE
 from app.core.rate_limit import limiter
 
 router = APIRouter()
 
+CHARS_PER_TOKEN = 4
+
 class ChatRequest(BaseModel):
     repo_id: int
     query: str = Field(..., min_length=1, max_length=2000)
     session_id: Optional[int] = None
     top_k: int = Field(5, ge=1, le=20)
     history_limit: int = Field(6, ge=0, le=20)
+    diversity: Optional[Literal["none", "mmr", "group"]] = None
+    rerank: Optional[bool] = None
+    min_score: Optional[float] = Field(None, ge=-1, le=1)
+    adaptive: Optional[bool] = None
+
+
+class SearchRequest(BaseModel):
+    repo_id: int
+    queries: List[Annotated[str, Field(min_length=1, max_length=2000)]] = Field(
+        ..., min_length=1, max_length=10
+    )
+    top_k: int = Field(5, ge=1, le=20)
 
 
 @router.post("/")
@@ -37,7 +55,8 @@ async def chat(
 ) -> Any:
     repo = db.query(Repository).filter(
         Repository.id == payload.repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
@@ -64,14 +83,7 @@ async def chat(
         db.commit()
         db.refresh(session)
 
-    vector_service = VectorDBService()
-    collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
-    results = vector_service.search_code(
-        query=payload.query,
-        repo_id=repo.id,
-        collection_name=collection_name,
-        top_k=payload.top_k,
-    )
+    results = await _retrieve(payload, repo.id)
 
     history = _load_history(db, session.id, payload.history_limit)
     context = _format_context(results, history)
@@ -92,6 +104,7 @@ async def chat(
         "session_id": session.id,
         "answer": answer,
         "results": results,
+        "dropped": results.dropped,
     }
 
 
@@ -105,7 +118,8 @@ async def chat_stream(
     db = SessionLocal()
     repo = db.query(Repository).filter(
         Repository.id == payload.repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
@@ -131,14 +145,7 @@ async def chat_stream(
         db.commit()
         db.refresh(session)
 
-    vector_service = VectorDBService()
-    collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
-    results = vector_service.search_code(
-        query=payload.query,
-        repo_id=repo.id,
-        collection_name=collection_name,
-        top_k=payload.top_k,
-    )
+    results = await _retrieve(payload, repo.id)
 
     history = _load_history(db, session.id, payload.history_limit)
     context = _format_context(results, history)
@@ -155,7 +162,7 @@ async def chat_stream(
     def event_stream():
         answer_parts: List[str] = []
         try:
-            yield _sse_event("meta", {"session_id": session.id})
+            yield _sse_event("meta", {"session_id": session.id, "dropped": results.dropped})
             for chunk in llm.generate_text_stream(prompt):
                 answer_parts.append(chunk)
                 yield _sse_data(chunk)
@@ -172,6 +179,50 @@ async def chat_stream(
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
+@router.post("/search")
+@limiter.limit("30/minute")
+async def search(
+    request: Request,
+    payload: SearchRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Raw retrieval for one or more queries, without calling the LLM.
+    """
+    repo = db.query(Repository).filter(
+        Repository.id == payload.repo_id,
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
+    ).first()
+
+    if not repo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Repository not found"
+        )
+
+    vector_service = get_vector_store()
+    collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
+    results = await vector_service.search_many_async(
+        queries=payload.queries,
+        repo_id=repo.id,
+        collection_name=collection_name,
+        top_k=payload.top_k,
+    )
+
+    # One content lookup for every query's hits.
+    fill_contents([item for query_results in results for item in query_results])
+
+    return {
+        "repo_id": repo.id,
+        "results": [
+            {"query": query, "results": query_results}
+            for query, query_results in zip(payload.queries, results)
+        ],
+    }
+
+
 @router.get("/history/{session_id}")
 @limiter.limit("60/minute")
 async def get_history(
@@ -218,7 +269,42 @@ async def get_history(
     return payload
 
 
-def _format_context(results: List[Dict[str, Any]], history: List[ChatMessage]) -> str:
+async def _retrieve(payload: ChatRequest, repo_id: int) -> SearchResults:
+    rerank = settings.RERANK_ENABLED if payload.rerank is None else payload.rerank
+    # The reranker picks top_k from a wider candidate pool.
+    fetch_k = max(payload.top_k, settings.RERANK_CANDIDATES) if rerank else payload.top_k
+
+    vector_service = get_vector_store()
+    collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
+    results = await vector_service.search_code_async(
+        query=payload.query,
+        repo_id=repo_id,
+        collection_name=collection_name,
+        top_k=fetch_k,
+        diversity=payload.diversity,
+        min_score=payload.min_score,
+        adaptive=payload.adaptive,
+    )
+    dropped = getattr(results, "dropped", 0)
+    if rerank:
+        results = await get_reranker().rerank_async(payload.query, results, payload.top_k)
+    return SearchResults(results, dropped=dropped)
+
+
+def _format_context(
+    results: List[Dict[str, Any]],
+    history: List[ChatMessage],
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Render history and retrieved chunks for the RAG prompt.
+
+    Chunks are added in rank order until ``max_tokens``
+    (CHAT_CONTEXT_MAX_TOKENS by default) is reached; the best chunk is
+    truncated to fit rather than left out.
+    """
+    if max_tokens is None:
+        max_tokens = settings.CHAT_CONTEXT_MAX_TOKENS
     sections: List[str] = []
 
     if history:
@@ -231,12 +317,18 @@ def _format_context(results: List[Dict[str, Any]], history: List[ChatMessage]) -
         sections.append("Retrieved Context\nTBD")
         return "\n\n".join(sections)
 
+    # Payloads only reference chunk text; fetch the rendered top-k at once.
+    fill_contents(results)
+
     blocks: List[str] = []
+    remaining = max_tokens
     for item in results:
         payload = item.get("payload") or {}
         code = payload.get("content") or payload.get("code") or ""
         path = payload.get("path") or payload.get("file_path") or "unknown"
         symbol = payload.get("symbol") or payload.get("name") or ""
+        if symbol and payload.get("parent"):
+            symbol = f"{payload['parent']}.{symbol}"
         score = item.get("score")
 
         header_parts = [f"path: {path}"]
@@ -247,12 +339,23 @@ def _format_context(results: List[Dict[str, Any]], history: List[ChatMessage]) -
 
         header = " | ".join(header_parts)
         block = f"{header}\n{code}".strip()
+        tokens = _estimate_tokens(block)
+        if tokens > remaining:
+            if not blocks:
+                blocks.append(block[: remaining * CHARS_PER_TOKEN].rstrip() + "\n... [truncated]")
+            break
         blocks.append(block)
+        remaining -= tokens
 
     sections.append("Retrieved Context\n" + "\n\n---\n\n".join(blocks))
     return "\n\n".join(sections)
 
 
+def _estimate_tokens(text: str) -> int:
+    # The LLM tokenizer is not available here; code averages ~4 chars per token.
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
 def _load_history(db: Session, session_id: int, limit: int) -> List[ChatMessage]:
     if limit <= 0:
         return []
@@ -31,7 +31,8 @@ async def generate_docs_endpoint(
 ) -> Any:
     repo = db.query(Repository).filter(
         Repository.id == payload.repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
@@ -71,7 +72,8 @@ async def get_docs(
 ) -> Any:
     repo = db.query(Repository).filter(
         Repository.id == repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
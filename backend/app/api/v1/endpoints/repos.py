@@ -13,7 +13,7 @@ from app.services.github import GitHubService
 from app.services.cache import CacheService
 from app.config import settings
 from app.workers.celery_app import celery_app
-from app.workers.tasks import analyze_repository
+from app.workers.tasks import analyze_repository, purge_repository
 from app.core.rate_limit import limiter
 
 router = APIRouter()
@@ -112,6 +112,15 @@ async def create_repo(
         Repository.github_id == repo_data["id"]
     ).first()
 
+    if repo and not repo.is_active:
+        # Re-queue in case the purge gave up; a purge of a row that is
+        # already gone just reports not_found.
+        purge_repository.delay(repo.id)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Repository is being deleted; try again shortly"
+        )
+
     if not repo:
         repo = Repository(
             user_id=current_user.id,
@@ -153,7 +162,8 @@ async def get_repo(
 
     repo = db.query(Repository).filter(
         Repository.id == repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
     
     if not repo:
@@ -179,7 +189,8 @@ async def get_repo_tree(
     """
     repo = db.query(Repository).filter(
         Repository.id == repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
@@ -234,9 +245,37 @@ def _is_cache_fresh(cache: RepositoryCache) -> bool:
         now = datetime.now(timezone.utc)
     return now - timestamp <= timedelta(hours=1)
 
-@router.delete("/{repo_id}")
-async def delete_repo(repo_id: int):
-    return {"message": f"Delete repository {repo_id}"}
+@router.delete("/{repo_id}", status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("10/minute")
+async def delete_repo(
+    request: Request,
+    repo_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Hide a repository right away and purge its data in the background.
+    """
+    repo = db.query(Repository).filter(
+        Repository.id == repo_id,
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True),
+    ).first()
+
+    if not repo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Repository not found"
+        )
+
+    repo.is_active = False
+    db.commit()
+    cache = CacheService()
+    cache.delete(f"user:{current_user.id}:repos:list")
+    cache.delete(f"user:{current_user.id}:repos:{repo.id}")
+
+    task = purge_repository.delay(repo.id)
+    return {"task_id": task.id, "status": "queued"}
 
 
 @router.post("/{repo_id}/analyze")
@@ -252,7 +291,8 @@ async def analyze_repo(
     """
     repo = db.query(Repository).filter(
         Repository.id == repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
@@ -279,7 +319,8 @@ async def analyze_status(
     """
     repo = db.query(Repository).filter(
         Repository.id == repo_id,
-        Repository.user_id == current_user.id
+        Repository.user_id == current_user.id,
+        Repository.is_active.is_(True)
     ).first()
 
     if not repo:
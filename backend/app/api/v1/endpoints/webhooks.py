@@ -34,7 +34,11 @@ async def github_webhook(
     if not full_name:
         return {"message": "Webhook received: no repository info"}
 
-    repo = db.query(Repository).filter(Repository.full_name == full_name).first()
+    # Repos being purged must not be re-indexed.
+    repo = db.query(Repository).filter(
+        Repository.full_name == full_name,
+        Repository.is_active.is_(True),
+    ).first()
     if not repo:
         return {"message": "Webhook received: repository not tracked"}
 
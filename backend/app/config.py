@@ -19,7 +19,107 @@ class Settings(BaseSettings):
     
     # Qdrant
     QDRANT_URL: str
-    
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 10
+    QDRANT_POOL_SIZE: int = 0
+    QDRANT_UPSERT_BATCH_SIZE: int = 128
+    QDRANT_UPSERT_MAX_IN_FLIGHT: int = 4
+    QDRANT_UPSERT_RETRIES: int = 3
+    # One of: default, balanced, low_memory, compact, high_recall
+    QDRANT_COLLECTION_PROFILE: str = "default"
+    # Store a BM25 sparse vector next to the dense one and fuse both with RRF.
+    # Off by default: hybrid collections use named vectors, so collections
+    # created without it must be recreated and reindexed before enabling.
+    QDRANT_HYBRID_SEARCH: bool = False
+    QDRANT_HYBRID_PREFETCH_FACTOR: int = 4
+    # Index repo_id as the tenant key and build per-repo HNSW graphs instead
+    # of one global graph. Searches filter on the tenant field only, so run
+    # scripts/migrate_tenants.py on existing collections before enabling.
+    QDRANT_TENANT_PARTITIONING: bool = False
+    # Repos with at least this many points are moved to their own collection
+    # by scripts/migrate_tenants.py; 0 keeps every repo in the shared one.
+    QDRANT_DEDICATED_REPO_THRESHOLD: int = 0
+    QDRANT_ROUTING_CACHE_SECONDS: int = 60
+
+    # Vector store: "qdrant", or "numpy" for single-node installs that keep
+    # per-repo float16 matrices in memory-mapped files under VECTOR_STORE_DIR.
+    VECTOR_STORE_BACKEND: str = "qdrant"
+    VECTOR_STORE_DIR: str = "/tmp/docubot/vectors"
+    # Keep chunk text in the chunk_contents table instead of vector payloads.
+    CONTENT_STORE_ENABLED: bool = True
+    # Unreferenced chunk text is only deleted once it has not been stored or
+    # reused for this long, so a write in flight keeps its text.
+    CONTENT_GC_GRACE_SECONDS: int = 3600
+
+    # Retrieval diversity: "none", "mmr" (maximal marginal relevance over
+    # RETRIEVAL_CANDIDATE_FACTOR x top_k candidates) or "group" (at most
+    # RETRIEVAL_MAX_PER_FILE chunks per file).
+    RETRIEVAL_DIVERSITY: str = "none"
+    RETRIEVAL_MMR_LAMBDA: float = 0.7
+    RETRIEVAL_CANDIDATE_FACTOR: int = 4
+    RETRIEVAL_MAX_PER_FILE: int = 2
+    # Drop hits under this cosine similarity (0 disables). Fused hybrid
+    # hits are checked on their dense similarity, not the rank-based score.
+    RETRIEVAL_MIN_SCORE: float = 0.0
+    # Cut at the largest score drop when it is at least
+    # RETRIEVAL_ELBOW_MIN_DROP of the top score.
+    RETRIEVAL_ADAPTIVE_CUTOFF: bool = False
+    RETRIEVAL_ELBOW_MIN_DROP: float = 0.25
+    # Rescore RERANK_CANDIDATES retrieved chunks with a CPU cross-encoder and
+    # keep the best top_k. Falls back to retrieval order past the budget.
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_BUDGET_MS: float = 250.0
+    RERANK_BATCH_SIZE: int = 32
+    RERANK_MAX_LENGTH: int = 256
+    RERANK_CACHE_SIZE: int = 8192
+    # Approximate token budget for retrieved code in chat prompts.
+    CHAT_CONTEXT_MAX_TOKENS: int = 3000
+
+    # Rows deleted per transaction when purging a repository.
+    PURGE_BATCH_SIZE: int = 1000
+    # Failed purges are retried with exponential backoff up to this many times.
+    PURGE_MAX_RETRIES: int = 5
+    # Celery beat job that deletes vectors whose file is gone from
+    # repository_files; dry runs only report.
+    VECTOR_GC_INTERVAL_SECONDS: int = 24 * 3600
+    VECTOR_GC_DRY_RUN: bool = False
+    VECTOR_GC_PAGE_SIZE: int = 1000
+
+    # Python chunking: "hierarchical" emits class skeletons and separate
+    # method chunks, merges sibling functions under CHUNK_MIN_BYTES and splits
+    # functions over CHUNK_MAX_BYTES at statement boundaries; "flat" emits
+    # whole classes plus every function, duplicating method bodies.
+    CHUNKING_MODE: str = "hierarchical"
+    CHUNK_MIN_BYTES: int = 200
+    CHUNK_MAX_BYTES: int = 4000
+    # Reuse parse and chunk results for files whose git blob SHA was
+    # analyzed before by the same parser version (parse_cache table).
+    PARSE_CACHE_ENABLED: bool = True
+
+    # Embeddings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    # One of: torch, onnx, int8
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_MAX_BATCH_TOKENS: int = 16384
+    # "window" mean-pools overlapping windows over long chunks; "truncate"
+    # keeps only the first window.
+    EMBEDDING_LONG_TEXT_MODE: str = "window"
+    EMBEDDING_WINDOW_OVERLAP: int = 32
+    EMBEDDING_MAX_TOKENS_PER_CHUNK: int = 2048
+    # Load models in the parent before workers fork so children share weights.
+    EMBEDDING_PRELOAD: bool = False
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = "/tmp/docubot/embedding_cache"
+    EMBEDDING_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    EMBEDDING_CACHE_REDIS_TTL: int = 7 * 24 * 3600
+    QUERY_EMBED_MAX_BATCH_SIZE: int = 32
+    QUERY_EMBED_MAX_WAIT_MS: float = 5.0
+    QUERY_EMBED_CACHE_SIZE: int = 2048
+
     # LLM
     ANTHROPIC_API_KEY: str = ""
     OPENAI_API_KEY: str = ""
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app.config import settings
+
+# One client per (process, url). Connection pools and gRPC channels do not
+# survive a fork, so a forked worker builds its own on first use.
+_clients: Dict[Tuple[int, str], QdrantClient] = {}
+# Async clients are bound to the event loop that created their connections.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncQdrantClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _client_options(url: str) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "url": url,
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "timeout": settings.QDRANT_TIMEOUT,
+    }
+    if settings.QDRANT_POOL_SIZE:
+        options["pool_size"] = settings.QDRANT_POOL_SIZE
+    return options
+
+
+def get_qdrant_client(url: Optional[str] = None) -> QdrantClient:
+    """
+    Return the process-wide Qdrant client for ``url``.
+    """
+    url = url or settings.QDRANT_URL
+    key = (os.getpid(), url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = QdrantClient(**_client_options(url))
+    return client
+
+
+def get_async_qdrant_client(url: Optional[str] = None) -> AsyncQdrantClient:
+    """
+    Return the async Qdrant client for ``url`` on the running event loop.
+    """
+    url = url or settings.QDRANT_URL
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(url)
+    if client is None:
+        client = clients[url] = AsyncQdrantClient(**_client_options(url))
+    return client
@@ -74,6 +74,13 @@ app.add_middleware(SecurityHeadersMiddleware)
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
 
+# Loading at import time lets `gunicorn --preload` share the model weights
+# copy-on-write with every forked worker.
+if settings.EMBEDDING_PRELOAD:
+    from app.services.embeddings import preload_embedding_model
+
+    preload_embedding_model()
+
 @app.get("/")
 async def root():
     return {
@@ -4,6 +4,8 @@ from app.models.documentation import Documentation
 from app.models.chat import ChatSession, ChatMessage
 from app.models.repository_cache import RepositoryCache
 from app.models.repository_file import RepositoryFile
+from app.models.chunk_content import ChunkContent
+from app.models.parse_cache import ParseCacheEntry
 
 __all__ = [
     "User",
@@ -13,4 +15,6 @@ __all__ = [
     "ChatMessage",
     "RepositoryCache",
     "RepositoryFile",
+    "ChunkContent",
+    "ParseCacheEntry",
 ]
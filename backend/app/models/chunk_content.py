@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ChunkContent(Base):
+    __tablename__ = "chunk_contents"
+
+    # sha256 of the normalized chunk text, shared with vector payloads.
+    content_hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Last put_many that stored or reused this text; see ContentStore.delete_unreferenced.
+    used_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ChunkContent(hash='{self.content_hash[:12]}', size={self.size})>"
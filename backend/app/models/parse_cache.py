@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ParseCacheEntry(Base):
+    __tablename__ = "parse_cache"
+
+    # Git blob SHA-1 of the file, so identical files in any repo share a row.
+    blob_sha = Column(String(40), nullable=False)
+    grammar = Column(String(16), nullable=False)
+    # CodeChunkingService.version: grammar versions and chunking settings.
+    parser_version = Column(String(16), nullable=False)
+    # zlib-compressed JSON of the FileAnalysis, without its path.
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("blob_sha", "grammar", "parser_version", name="pk_parse_cache"),
+    )
+
+    def __repr__(self):
+        return f"<ParseCacheEntry(blob='{self.blob_sha[:12]}', grammar='{self.grammar}')>"
@@ -1,5 +1,5 @@
 import json
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 import redis
 
@@ -28,6 +28,11 @@ class CacheService:
     def delete(self, key: str) -> None:
         self._client.delete(key)
 
+    def delete_many(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        return int(self._client.delete(*keys))
+
     def ping(self) -> bool:
         try:
             return self._client.ping()
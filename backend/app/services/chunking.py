@@ -1,75 +1,399 @@
+import hashlib
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from importlib.metadata import version as package_version
 from typing import Any, Dict, List, Optional
 
-from app.services.code_parser import CodeParserService
+from app.config import settings
+from app.services.code_parser import CodeParserService, grammar_language
+
+CHUNKING_MODES = ("hierarchical", "flat")
+
+# Bump when analyze_file output changes for the same input, so cached
+# analyses (see parse_cache) are not reused.
+ANALYSIS_VERSION = 3
+PARSER_PACKAGES = (
+    "tree-sitter",
+    "tree-sitter-python",
+    "tree-sitter-javascript",
+    "tree-sitter-typescript",
+)
+
+# Statement containers that can be cut between their children.
+BLOCK_TYPES = {"block", "statement_block"}
+# Class body members that only declare a signature.
+SIGNATURE_TYPES = {"abstract_method_signature", "method_signature"}
+FIELD_TYPES = {"expression_statement", "public_field_definition", "field_definition"}
+# Top-level nodes left out of module chunks; imports are on every chunk.
+MODULE_SKIP_TYPES = {"comment", "import_statement", "import_from_statement", "future_import_statement"}
+
+
+@dataclass
+class FileAnalysis:
+    """
+    Everything indexing needs from one source file, built from a single
+    parse, one outline query pass and one walk over its definitions.
+    """
+
+    path: str
+    language: str
+    imports: List[str] = field(default_factory=list)
+    # Same shapes as CodeParserService.extract_functions / extract_classes.
+    functions: List[Dict[str, Any]] = field(default_factory=list)
+    classes: List[Dict[str, Any]] = field(default_factory=list)
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
 
 
 class CodeChunkingService:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        min_bytes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
         self.parser = CodeParserService()
+        self.mode = mode or settings.CHUNKING_MODE
+        if self.mode not in CHUNKING_MODES:
+            raise ValueError(f"Unknown chunking mode: {self.mode}")
+        self.min_bytes = settings.CHUNK_MIN_BYTES if min_bytes is None else min_bytes
+        self.max_bytes = settings.CHUNK_MAX_BYTES if max_bytes is None else max_bytes
+
+    @property
+    def version(self) -> str:
+        """
+        Short hash of everything analyze_file output depends on besides the
+        file itself: grammar package versions and the chunking settings.
+        """
+        parts = [str(ANALYSIS_VERSION), self.mode, str(self.min_bytes), str(self.max_bytes)]
+        parts.extend(_package_versions())
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
 
     def chunk_python_file(self, content: bytes, file_path: str) -> List[Dict[str, Any]]:
+        return self.chunk_file(content, file_path, "python")
+
+    def chunk_file(self, content: bytes, file_path: str, grammar: str) -> List[Dict[str, Any]]:
+        """
+        Chunk a source file parsed with ``grammar`` (see
+        ``code_parser.GRAMMARS``). JS/TS chunks use the Python schema;
+        functions include exported and ``const``-assigned arrow functions.
+        """
+        return self.analyze_file(content, file_path, grammar).chunks
+
+    def analyze_file(self, content: bytes, file_path: str, grammar: str) -> FileAnalysis:
+        """
+        Parse ``content`` once; imports and function and class metadata
+        come from one outline query, chunks from a walk over module and
+        class bodies that does not descend into functions.
+        """
+        analysis = FileAnalysis(path=file_path, language=grammar_language(grammar))
         if not content:
-            return []
+            return analysis
 
-        tree = self.parser.parse_python_file(content)
-        imports = self._extract_imports(tree, content)
-        chunks: List[Dict[str, Any]] = []
+        tree = self.parser.parse_file(content, grammar)
+        outline = self.parser.extract_outline(tree, content)
+        # Chunks share this list, so fill it before building them.
+        analysis.imports.extend(outline["imports"])
+        analysis.functions = outline["functions"]
+        analysis.classes = outline["classes"]
+        if self.mode == "flat":
+            self._flat_chunks(tree, content, analysis)
+        else:
+            self._chunk_block(tree.root_node, content, analysis, None)
+        analysis.chunks[:0] = self._module_chunks(tree.root_node, content, analysis)
+        for index, chunk in enumerate(analysis.chunks):
+            chunk["chunk_index"] = index
+        return analysis
+
+    def _flat_chunks(self, tree, content: bytes, analysis: FileAnalysis) -> None:
         index = 0
 
         stack = [tree.root_node]
         while stack:
             node = stack.pop()
-            if node.type == "function_definition":
-                chunks.append(
-                    self._build_function_chunk(node, content, file_path, imports, index)
+            kind, definition, name = self.parser.resolve_definition(node, content)
+            if kind == "function":
+                analysis.chunks.append(
+                    self._build_function_chunk(definition, content, analysis, index, name)
                 )
                 index += 1
-            elif node.type == "class_definition":
-                chunks.append(
-                    self._build_class_chunk(node, content, file_path, imports, index)
+            elif kind == "class":
+                analysis.chunks.append(
+                    self._build_class_chunk(definition, content, analysis, index, name)
                 )
                 index += 1
-            stack.extend(node.named_children)
+            stack.extend(definition.named_children)
+
+    def _module_chunks(self, root, content: bytes, analysis: FileAnalysis) -> List[Dict[str, Any]]:
+        """
+        Chunks for top-level code outside any function or class, such as
+        route registrations, ``module.exports`` or ``__main__`` blocks.
+        Statements are grouped in file order up to ``max_bytes``. A file
+        with nothing else to chunk is kept as one whole-file chunk.
+        """
+        statements = []
+        for child in root.named_children:
+            if child.type in MODULE_SKIP_TYPES:
+                continue
+            kind, _, _ = self.parser.resolve_definition(child, content)
+            if kind is None:
+                statements.append(child)
+        if not statements:
+            if analysis.chunks or not content.strip():
+                return []
+            statements = [root]
+
+        groups: List[List[Any]] = []
+        size = 0
+        for statement in statements:
+            length = statement.end_byte - statement.start_byte
+            if groups and size + 1 + length <= self.max_bytes:
+                groups[-1].append(statement)
+                size += 1 + length
+            else:
+                groups.append([statement])
+                size = length
 
+        chunks: List[Dict[str, Any]] = []
+        for number, group in enumerate(groups, start=1):
+            chunk = {
+                "type": "module",
+                **module_path_fields(analysis.path),
+                "file_path": analysis.path,
+                "imports": analysis.imports,
+                "language": analysis.language,
+                "code": "\n".join(self._node_text(content, node) for node in group),
+                "chunk_index": 0,
+                "start_byte": group[0].start_byte,
+                "end_byte": group[-1].end_byte,
+            }
+            if len(groups) > 1:
+                chunk.update(part=number, parts=len(groups))
+            chunks.append(chunk)
         return chunks
 
-    def _extract_imports(self, tree, content: bytes) -> List[str]:
-        imports: List[str] = []
-        stack = [tree.root_node]
-        while stack:
-            node = stack.pop()
-            if node.type in {"import_statement", "import_from_statement"}:
-                imports.append(self._node_text(content, node))
-            stack.extend(node.named_children)
-        return imports
+    def _chunk_block(
+        self,
+        block,
+        content: bytes,
+        analysis: FileAnalysis,
+        parent: Optional[str],
+    ) -> None:
+        """
+        Append chunks for the definitions directly inside ``block``.
+
+        Classes become skeleton chunks and their bodies are chunked with the
+        class as parent. Runs of small sibling functions are merged until
+        they reach ``min_bytes``; anything else between them ends the run.
+        Nested functions stay in their enclosing function's chunk.
+        """
+        chunks = analysis.chunks
+        pending: List[Dict[str, Any]] = []
+        for child in block.named_children:
+            kind, node, name = self.parser.resolve_definition(child, content)
+            if kind == "function":
+                parts = self._function_chunks(child, node, name, content, analysis, parent)
+                if len(parts) == 1 and child.end_byte - child.start_byte < self.min_bytes:
+                    pending.append(parts[0])
+                    continue
+                chunks.extend(self._merge_small(pending, content))
+                pending = []
+                chunks.extend(parts)
+            elif kind == "class":
+                chunks.extend(self._merge_small(pending, content))
+                pending = []
+                chunk = self._build_class_skeleton(child, node, name, content, analysis, parent)
+                chunks.append(chunk)
+                body = node.child_by_field_name("body")
+                if body is not None:
+                    self._chunk_block(body, content, analysis, chunk["qualified_name"])
+            elif child.type != "comment":
+                chunks.extend(self._merge_small(pending, content))
+                pending = []
+        chunks.extend(self._merge_small(pending, content))
+
+    def _function_chunks(
+        self,
+        span,
+        node,
+        name: Optional[str],
+        content: bytes,
+        analysis: FileAnalysis,
+        parent: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        One chunk for the function at ``span`` (decorators and ``export``
+        included), or several when it is over ``max_bytes``, cut between
+        top-level body statements. Continuation parts repeat the header.
+        """
+        chunk = self._build_function_chunk(node, content, analysis, 0, name, span)
+        chunk["code"] = self._node_text(content, span)
+        chunk["start_byte"] = span.start_byte
+        chunk["end_byte"] = span.end_byte
+        if parent:
+            chunk["parent"] = parent
+            chunk["qualified_name"] = f"{parent}.{chunk['name']}"
+        else:
+            chunk["qualified_name"] = chunk["name"]
+
+        body = node.child_by_field_name("body")
+        if span.end_byte - span.start_byte <= self.max_bytes or body is None:
+            return [chunk]
+        statements = [child for child in body.named_children if child.type != "comment"]
+        if body.type not in BLOCK_TYPES or len(statements) < 2:
+            return [chunk]
+
+        header = content[span.start_byte:statements[0].start_byte].decode("utf-8", errors="replace").rstrip()
+        indent = " " * statements[0].start_point[1]
+        groups: List[List[Any]] = []
+        for statement in statements:
+            if groups:
+                if len(groups) == 1:
+                    size = statement.end_byte - span.start_byte
+                else:
+                    size = statement.end_byte - groups[-1][0].start_byte + len(header) + 1
+                if size <= self.max_bytes:
+                    groups[-1].append(statement)
+                    continue
+            groups.append([statement])
+        if len(groups) < 2:
+            return [chunk]
+
+        parts: List[Dict[str, Any]] = []
+        for number, group in enumerate(groups, start=1):
+            part = dict(chunk, part=number, parts=len(groups))
+            if number == 1:
+                part["end_byte"] = group[-1].end_byte
+                part["code"] = content[span.start_byte:group[-1].end_byte].decode("utf-8", errors="replace")
+            else:
+                part["start_byte"] = group[0].start_byte
+                part["end_byte"] = group[-1].end_byte
+                body_text = content[group[0].start_byte:group[-1].end_byte].decode("utf-8", errors="replace")
+                part["code"] = f"{header}\n{indent}{body_text}"
+            parts.append(part)
+        return parts
+
+    def _merge_small(
+        self, pending: List[Dict[str, Any]], content: bytes
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge consecutive small function chunks until each group holds at
+        least ``min_bytes`` of source; a short final group stays as is.
+        """
+        groups: List[List[Dict[str, Any]]] = []
+        size = self.min_bytes
+        for chunk in pending:
+            if size >= self.min_bytes:
+                groups.append([])
+                size = 0
+            groups[-1].append(chunk)
+            size = groups[-1][-1]["end_byte"] - groups[-1][0]["start_byte"]
+
+        merged: List[Dict[str, Any]] = []
+        for group in groups:
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            first, last = group[0], group[-1]
+            chunk = dict(first)
+            chunk.update(
+                {
+                    "name": ", ".join(item["name"] for item in group),
+                    "qualified_name": ", ".join(item["qualified_name"] for item in group),
+                    "members": [item["name"] for item in group],
+                    "signature": "\n".join(item["signature"] for item in group),
+                    "code": content[first["start_byte"]:last["end_byte"]].decode("utf-8", errors="replace"),
+                    "end_byte": last["end_byte"],
+                }
+            )
+            merged.append(chunk)
+        return merged
+
+    def _build_class_skeleton(
+        self,
+        span,
+        node,
+        name: Optional[str],
+        content: bytes,
+        analysis: FileAnalysis,
+        parent: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Class chunk with the header, docstring, attributes and method
+        signatures only; method bodies are chunked separately.
+        """
+        chunk = self._build_class_chunk(node, content, analysis, 0, name)
+        qualified_name = f"{parent}.{chunk['name']}" if parent else chunk["name"]
+        chunk["qualified_name"] = qualified_name
+        chunk["start_byte"] = span.start_byte
+        chunk["end_byte"] = span.end_byte
+        if parent:
+            chunk["parent"] = parent
+
+        body = node.child_by_field_name("body")
+        members = [child for child in body.named_children] if body is not None else []
+        if not members:
+            chunk["code"] = self._node_text(content, span)
+            return chunk
+
+        python = analysis.language == "python"
+        indent = " " * members[0].start_point[1]
+        if members[0].start_point[0] == span.start_point[0]:
+            # One-line class; there is no body indentation to copy.
+            indent = "    "
+        lines = [content[span.start_byte:body.start_byte].decode("utf-8", errors="replace").rstrip()]
+        if not python:
+            lines[0] += " {"
+        for child in members:
+            kind, member, _ = self.parser.resolve_definition(child, content)
+            if kind is not None:
+                member_body = member.child_by_field_name("body")
+                end = member_body.start_byte if member_body is not None else member.end_byte
+                header = content[child.start_byte:end].decode("utf-8", errors="replace").rstrip()
+                lines.append(f"{indent}{header} ..." if python else f"{indent}{header};")
+            elif child.type in SIGNATURE_TYPES:
+                lines.append(f"{indent}{self._node_text(content, child)};")
+            elif child.type in FIELD_TYPES:
+                # Docstrings and attribute assignments, annotations or fields.
+                text = self._node_text(content, child)
+                lines.append(f"{indent}{text}" if python else f"{indent}{text.rstrip(';')};")
+        if not python:
+            lines.append("}")
+        chunk["code"] = "\n".join(lines)
+        return chunk
 
     def _build_function_chunk(
         self,
         node,
         content: bytes,
-        file_path: str,
-        imports: List[str],
+        analysis: FileAnalysis,
         index: int,
+        name: Optional[str] = None,
+        span=None,
     ) -> Dict[str, Any]:
         name_node = node.child_by_field_name("name")
-        params_node = node.child_by_field_name("parameters")
-        return_node = node.child_by_field_name("return_type")
+        if name is None:
+            name = self._node_text(content, name_node) if name_node else ""
 
-        name = self._node_text(content, name_node) if name_node else ""
-        params_text = self._node_text(content, params_node) if params_node else "()"
-        return_type = self._node_text(content, return_node) if return_node else None
+        if analysis.language == "python":
+            params_node = node.child_by_field_name("parameters")
+            return_node = node.child_by_field_name("return_type")
+            params_text = self._node_text(content, params_node) if params_node else "()"
+            return_type = self._node_text(content, return_node) if return_node else None
 
-        signature = f"def {name}{params_text}"
-        if return_type:
-            signature += f" -> {return_type}"
+            signature = f"def {name}{params_text}"
+            if return_type:
+                signature += f" -> {return_type}"
+        else:
+            signature = self.parser.js_signature(span or node, node, content)
 
         return {
             "type": "function",
             "name": name,
             "signature": signature,
-            "file_path": file_path,
-            "imports": imports,
-            "language": "python",
+            "file_path": analysis.path,
+            "imports": analysis.imports,
+            "language": analysis.language,
             "code": self._node_text(content, node),
             "chunk_index": index,
             "start_byte": node.start_byte,
@@ -80,30 +404,34 @@ class CodeChunkingService:
         self,
         node,
         content: bytes,
-        file_path: str,
-        imports: List[str],
+        analysis: FileAnalysis,
         index: int,
+        name: Optional[str] = None,
     ) -> Dict[str, Any]:
         name_node = node.child_by_field_name("name")
-        bases_node = node.child_by_field_name("superclasses")
+        if name is None:
+            name = self._node_text(content, name_node) if name_node else ""
 
-        name = self._node_text(content, name_node) if name_node else ""
-        bases = []
-        if bases_node:
-            for child in bases_node.named_children:
-                bases.append(self._node_text(content, child))
+        if analysis.language == "python":
+            bases_node = node.child_by_field_name("superclasses")
+            bases = []
+            if bases_node:
+                for child in bases_node.named_children:
+                    bases.append(self._node_text(content, child))
 
-        signature = f"class {name}"
-        if bases:
-            signature += f"({', '.join(bases)})"
+            signature = f"class {name}"
+            if bases:
+                signature += f"({', '.join(bases)})"
+        else:
+            signature = self.parser.js_signature(node, node, content)
 
         return {
             "type": "class",
             "name": name,
             "signature": signature,
-            "file_path": file_path,
-            "imports": imports,
-            "language": "python",
+            "file_path": analysis.path,
+            "imports": analysis.imports,
+            "language": analysis.language,
             "code": self._node_text(content, node),
             "chunk_index": index,
             "start_byte": node.start_byte,
@@ -113,4 +441,18 @@ class CodeChunkingService:
     def _node_text(self, content: bytes, node) -> str:
         if node is None:
             return ""
-        return content[node.start_byte:node.end_byte].decode("utf-8")
+        return content[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
+
+
+def module_path_fields(path: str) -> Dict[str, str]:
+    """
+    Fields of a module chunk that come from its file path rather than its
+    content; parse_cache drops and refills them.
+    """
+    name = os.path.basename(path)
+    return {"name": name, "qualified_name": name, "signature": name}
+
+
+@lru_cache(maxsize=1)
+def _package_versions() -> tuple:
+    return tuple(f"{name}=={package_version(name)}" for name in PARSER_PACKAGES)
@@ -1,31 +1,188 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import tree_sitter_javascript
 import tree_sitter_python
-from tree_sitter import Language, Parser, Tree
+import tree_sitter_typescript
+from tree_sitter import Language, Parser, Query, Tree
 import ast
 
+GRAMMARS = {
+    "python": tree_sitter_python.language,
+    "javascript": tree_sitter_javascript.language,
+    "typescript": tree_sitter_typescript.language_typescript,
+    "tsx": tree_sitter_typescript.language_tsx,
+}
+
+# The javascript grammar covers JSX; .tsx needs its own TypeScript dialect.
+EXTENSION_GRAMMARS = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "tsx",
+}
+
+FUNCTION_TYPES = {
+    "function_definition",
+    "function_declaration",
+    "generator_function_declaration",
+    "method_definition",
+}
+# "class" is an anonymous class expression, e.g. ``export default class {}``.
+CLASS_TYPES = {"class_definition", "class_declaration", "abstract_class_declaration", "class"}
+FUNCTION_VALUES = {"arrow_function", "function_expression", "function", "generator_function"}
+
+_JS_FUNCTION_QUERY = """
+[(function_declaration) (generator_function_declaration) (method_definition)] @function
+(variable_declarator value: [(arrow_function) (function_expression) (generator_function)] @function)
+(export_statement value: [(arrow_function) (function_expression) (generator_function)] @function)
+"""
+_JS_IMPORT_QUERY = "(import_statement) @import"
+_JS_DOCSTRING_QUERY = r"""
+(_
+  (comment) @docstring
+  .
+  [(export_statement) (function_declaration) (generator_function_declaration)
+   (lexical_declaration) (variable_declaration) (class_declaration) (method_definition)] @definition)
+"""
+_TS_QUERIES = {
+    "function_names": """
+        (function_declaration name: (identifier) @name)
+        (method_definition name: (property_identifier) @name)
+    """,
+    "class_names": "[(class_declaration) (abstract_class_declaration)] name: (type_identifier) @name",
+    "functions": _JS_FUNCTION_QUERY,
+    "classes": """
+        (program [(class_declaration) (abstract_class_declaration)] @class)
+        (program (export_statement declaration: [(class_declaration) (abstract_class_declaration)] @class))
+        (program (export_statement value: (class) @class))
+    """,
+    "imports": _JS_IMPORT_QUERY,
+    "docstrings": _JS_DOCSTRING_QUERY.replace(
+        "(class_declaration)", "(class_declaration) (abstract_class_declaration)"
+    ),
+}
+
+# S-expressions per grammar, compiled once into CodeParserService._QUERIES.
+QUERIES: Dict[str, Dict[str, str]] = {
+    "python": {
+        "function_names": "(function_definition name: (identifier) @name)",
+        "class_names": "(class_definition name: (identifier) @name)",
+        "functions": "(function_definition) @function",
+        "classes": """
+            (module (class_definition) @class)
+            (module (decorated_definition definition: (class_definition) @class))
+        """,
+        "imports": "[(import_statement) (import_from_statement)] @import",
+        "docstrings": """
+            (function_definition
+              body: (block . (expression_statement . [(string) (concatenated_string)] @docstring)))
+              @definition
+            (class_definition
+              body: (block . (expression_statement . [(string) (concatenated_string)] @docstring)))
+              @definition
+        """,
+    },
+    "javascript": {
+        "function_names": """
+            (function_declaration name: (identifier) @name)
+            (method_definition name: (property_identifier) @name)
+        """,
+        "class_names": "(class_declaration name: (identifier) @name)",
+        "functions": _JS_FUNCTION_QUERY,
+        "classes": """
+            (program (class_declaration) @class)
+            (program (export_statement declaration: (class_declaration) @class))
+            (program (export_statement value: (class) @class))
+        """,
+        "imports": _JS_IMPORT_QUERY,
+        "docstrings": _JS_DOCSTRING_QUERY,
+    },
+    "typescript": _TS_QUERIES,
+    "tsx": _TS_QUERIES,
+}
+# One pass over the tree for extract_outline.
+OUTLINE_PARTS = ("functions", "classes", "imports", "docstrings")
+# Queries whose patterns all start at the root node.
+ROOTED_QUERIES = {"classes"}
+
+
+def grammar_language(grammar: str) -> str:
+    """Language label stored for files parsed with ``grammar``."""
+    return "typescript" if grammar == "tsx" else grammar
+
+
 class CodeParserService:
     _LANGUAGE = None
+    _LANGUAGES: Dict[str, Any] = {}
+    _QUERIES: Dict[Tuple[str, str], Query] = {}
 
     def __init__(self):
         # Load the Python language with compatibility for different tree-sitter-python APIs.
         if CodeParserService._LANGUAGE is None:
-            language = tree_sitter_python.language()
-            if isinstance(language, Language):
-                CodeParserService._LANGUAGE = language
-            else:
+            CodeParserService._LANGUAGE = self._load_language("python")
+        self.parser = self._make_parser(CodeParserService._LANGUAGE)
+        self._parsers = {"python": self.parser}
+
+    @classmethod
+    def _load_language(cls, grammar: str):
+        if grammar not in cls._LANGUAGES:
+            language = GRAMMARS[grammar]()
+            if not isinstance(language, Language):
                 try:
-                    CodeParserService._LANGUAGE = Language(language)
+                    language = Language(language)
                 except TypeError:
                     # Fall back to the provided object if Language() is not compatible.
-                    CodeParserService._LANGUAGE = language
-
+                    pass
+            cls._LANGUAGES[grammar] = language
+        return cls._LANGUAGES[grammar]
+
+    @classmethod
+    def _compile_queries(cls) -> None:
+        for grammar, queries in QUERIES.items():
+            language = cls._load_language(grammar)
+            for name, source in queries.items():
+                query = language.query(source)
+                if name in ROOTED_QUERIES:
+                    query.set_max_start_depth(0)
+                cls._QUERIES[(grammar, name)] = query
+            outline = "\n".join(queries[name] for name in OUTLINE_PARTS)
+            cls._QUERIES[(grammar, "outline")] = language.query(outline)
+
+    def grammar_of(self, tree: Tree) -> str:
+        for grammar, language in self._LANGUAGES.items():
+            if tree.language == language:
+                return grammar
+        raise ValueError("Tree was not parsed with a known grammar")
+
+    def _captures(self, tree: Tree, name: str) -> Dict[str, List[Any]]:
+        query = self._QUERIES[(self.grammar_of(tree), name)]
+        return query.captures(tree.root_node)
+
+    @staticmethod
+    def _make_parser(language) -> Parser:
         # Initialize parser with compatibility for different tree-sitter APIs.
         parser = Parser()
         try:
-            parser.set_language(CodeParserService._LANGUAGE)
+            parser.set_language(language)
         except AttributeError:
-            parser = Parser(CodeParserService._LANGUAGE)
-        self.parser = parser
+            parser = Parser(language)
+        return parser
+
+    def parse_file(self, content: bytes, grammar: str) -> Tree:
+        """
+        Parse ``content`` with one of the GRAMMARS ("python", "javascript",
+        "typescript" or "tsx").
+        """
+        if grammar not in GRAMMARS:
+            raise ValueError(f"Unsupported grammar: {grammar}")
+        if grammar == "python":
+            return self.parse_python_file(content)
+        parser = self._parsers.get(grammar)
+        if parser is None:
+            parser = self._parsers[grammar] = self._make_parser(self._load_language(grammar))
+        return parser.parse(content or b"")
 
     def parse_python_file(self, content: bytes) -> Tree:
         """
@@ -54,27 +211,15 @@ class CodeParserService:
         Returns:
             List[str]: A list of function names.
         """
-        query_scm = """
-        (function_definition
-          name: (identifier) @function.name)
-        """
-        query = self._LANGUAGE.query(query_scm)
-        captures = query.captures(tree.root_node)
-        
-        return [node.text.decode('utf-8') for node, _ in captures]
+        captures = self._captures(tree, "function_names")
+        return [node.text.decode('utf-8', errors='replace') for node in captures.get("name", [])]
 
     def extract_class_names(self, tree: Tree) -> List[str]:
         """
         Extracts names of all classes defined in the AST.
         """
-        query_scm = """
-        (class_definition
-          name: (identifier) @class.name)
-        """
-        query = self._LANGUAGE.query(query_scm)
-        captures = query.captures(tree.root_node)
-        
-        return [node.text.decode('utf-8') for node, _ in captures]
+        captures = self._captures(tree, "class_names")
+        return [node.text.decode('utf-8', errors='replace') for node in captures.get("name", [])]
 
     def extract_functions(self, tree: Tree, content: bytes) -> List[Dict[str, Any]]:
         """
@@ -84,16 +229,8 @@ class CodeParserService:
         if not content:
             return []
 
-        functions: List[Dict[str, Any]] = []
-        stack = [tree.root_node]
-
-        while stack:
-            node = stack.pop()
-            if node.type == "function_definition":
-                functions.append(self._build_function_data(node, content))
-            stack.extend(node.named_children)
-
-        return functions
+        nodes = self._captures(tree, "functions").get("function", [])
+        return self._function_list(nodes, content, self.extract_docstrings(tree, content))
 
     def extract_classes(self, tree: Tree, content: bytes) -> List[Dict[str, Any]]:
         """
@@ -103,14 +240,166 @@ class CodeParserService:
         if not content:
             return []
 
-        classes: List[Dict[str, Any]] = []
-        for node in tree.root_node.named_children:
-            if node.type == "class_definition":
-                classes.append(self._build_class_data(node, content, parent_name=None))
+        nodes = self._captures(tree, "classes").get("class", [])
+        return self._class_list(nodes, content, self.extract_docstrings(tree, content))
+
+    def extract_imports(self, tree: Tree, content: bytes) -> List[str]:
+        """Source of every import statement, in file order."""
+        nodes = self._captures(tree, "imports").get("import", [])
+        return [self._node_text(content, node) for node in sorted(nodes, key=lambda n: n.start_byte)]
+
+    def extract_docstrings(self, tree: Tree, content: bytes) -> Dict[int, str]:
+        """
+        Docstrings, or the JSDoc comment right above a JS/TS definition,
+        keyed by the start byte of the definition they document.
+        """
+        docstrings: Dict[int, str] = {}
+        query = self._QUERIES[(self.grammar_of(tree), "docstrings")]
+        for _, match in query.matches(tree.root_node):
+            self._add_docstring(docstrings, match, content)
+        return docstrings
+
+    def extract_outline(self, tree: Tree, content: bytes) -> Dict[str, List[Any]]:
+        """
+        Functions, classes and imports from a single query pass; same
+        results as calling the three extractors separately.
+        """
+        captures: Dict[str, List[Any]] = {"function": [], "class": [], "import": []}
+        if not content:
+            return {"functions": [], "classes": [], "imports": []}
 
+        docstrings: Dict[int, str] = {}
+        for _, match in self._QUERIES[(self.grammar_of(tree), "outline")].matches(tree.root_node):
+            if "docstring" in match:
+                self._add_docstring(docstrings, match, content)
+                continue
+            for name, nodes in match.items():
+                captures[name].extend(nodes)
+
+        root = tree.root_node
+        classes = [node for node in captures["class"] if self._definition_span(node).parent == root]
+        imports = sorted(captures["import"], key=lambda n: n.start_byte)
+        return {
+            "functions": self._function_list(captures["function"], content, docstrings),
+            "classes": self._class_list(classes, content, docstrings),
+            "imports": [self._node_text(content, node) for node in imports],
+        }
+
+    def _add_docstring(self, docstrings: Dict[int, str], match: Dict[str, List[Any]], content: bytes) -> None:
+        definition = match["definition"][0]
+        comment = match["docstring"][0]
+        raw = self._node_text(content, comment)
+        if definition.type in {"function_definition", "class_definition"}:
+            docstrings[definition.start_byte] = self._clean_docstring(raw)
+        # JSDoc only; checked here rather than with a #match? predicate,
+        # which would decode the comment strictly as UTF-8.
+        elif raw.startswith("/**") and comment.end_point[0] >= definition.start_point[0] - 1:
+            docstrings[definition.start_byte] = self._clean_jsdoc(raw)
+
+    def _function_list(
+        self, nodes: List[Any], content: bytes, docstrings: Dict[int, str]
+    ) -> List[Dict[str, Any]]:
+        functions: List[Dict[str, Any]] = []
+        for node in self._definitions(nodes, content):
+            span = self._definition_span(node)
+            _, _, name = self.resolve_definition(span, content)
+            functions.append(self.function_data(span, node, name, content, docstrings))
+        return functions
+
+    def _class_list(
+        self, nodes: List[Any], content: bytes, docstrings: Dict[int, str]
+    ) -> List[Dict[str, Any]]:
+        classes: List[Dict[str, Any]] = []
+        for node in self._definitions(nodes, content):
+            span = self._definition_span(node)
+            _, _, name = self.resolve_definition(span, content)
+            classes.append(self.class_data(span, node, name, content, docstrings))
         return classes
 
-    def _build_function_data(self, node, content: bytes) -> Dict[str, Any]:
+    def _definitions(self, nodes: List[Any], content: bytes) -> List[Any]:
+        """
+        Captured definition nodes, in file order, that ``resolve_definition``
+        agrees on (e.g. only single-declarator ``const f = () => {}``).
+        """
+        definitions = []
+        for node in sorted(nodes, key=lambda n: n.start_byte):
+            _, definition, _ = self.resolve_definition(self._definition_span(node), content)
+            if definition == node:
+                definitions.append(node)
+        return definitions
+
+    @staticmethod
+    def _definition_span(node):
+        """The node ``resolve_definition`` unwraps to ``node``."""
+        span = node
+        if span.parent is not None and span.parent.type == "variable_declarator":
+            span = span.parent.parent
+        if span.parent is not None and span.parent.type in {"decorated_definition", "export_statement"}:
+            span = span.parent
+        return span
+
+    def function_data(
+        self, span, node, name: Optional[str], content: bytes, docstrings: Optional[Dict[int, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Metadata for a function found by ``resolve_definition``; ``span`` is
+        the node that was resolved (decorators or ``export`` included).
+        Docstrings come from ``docstrings`` (see ``extract_docstrings``)
+        when given, otherwise from the nodes around the definition.
+        """
+        if node.type == "function_definition":
+            return self._build_function_data(node, content, docstrings)
+        return self._build_js_function_data(span, node, name, content, docstrings)
+
+    def class_data(
+        self, span, node, name: Optional[str], content: bytes, docstrings: Optional[Dict[int, str]] = None
+    ) -> Dict[str, Any]:
+        """Metadata for a top-level class found by ``resolve_definition``."""
+        if node.type == "class_definition":
+            return self._build_class_data(node, content, parent_name=None, docstrings=docstrings)
+        return self._build_js_class_data(span, node, name, content, docstrings)
+
+    def resolve_definition(self, node, content: bytes) -> Tuple[Optional[str], Any, Optional[str]]:
+        """
+        Classify ``node`` as a "function" or "class" definition.
+
+        Returns ``(kind, definition, name)``. Decorators, ``export`` and
+        ``const f = () => {}`` declarations are unwrapped to the function or
+        class node, with ``name`` taken from the wrapper when the definition
+        has none of its own. ``kind`` is None for anything else, and
+        ``definition`` is then ``node`` itself.
+        """
+        if node.type in {"decorated_definition", "export_statement"}:
+            for field in ("definition", "declaration", "value"):
+                inner = node.child_by_field_name(field)
+                if inner is not None and inner.type in FUNCTION_VALUES:
+                    return "function", inner, "default"
+                if inner is not None:
+                    kind, definition, name = self.resolve_definition(inner, content)
+                    if kind is None:
+                        break
+                    if name is None and definition.child_by_field_name("name") is None:
+                        name = "default"
+                    return kind, definition, name
+            return None, node, None
+        if node.type in FUNCTION_TYPES:
+            # Function expressions only count when exported or assigned,
+            # not as callbacks.
+            return "function", node, None
+        if node.type in CLASS_TYPES:
+            return "class", node, None
+        if node.type in {"lexical_declaration", "variable_declaration"}:
+            declarators = [c for c in node.named_children if c.type == "variable_declarator"]
+            if len(declarators) == 1:
+                value = declarators[0].child_by_field_name("value")
+                if value is not None and value.type in FUNCTION_VALUES:
+                    name_node = declarators[0].child_by_field_name("name")
+                    return "function", value, self._node_text(content, name_node)
+        return None, node, None
+
+    def _build_function_data(
+        self, node, content: bytes, docstrings: Optional[Dict[int, str]] = None
+    ) -> Dict[str, Any]:
         name_node = node.child_by_field_name("name")
         params_node = node.child_by_field_name("parameters")
         return_node = node.child_by_field_name("return_type")
@@ -140,11 +429,15 @@ class CodeParserService:
             "parameters": parameters,
             "parameters_text": params_text,
             "return_type": return_type,
-            "docstring": self._extract_docstring(body_node, content),
+            "docstring": self._docstring(node, body_node, content, docstrings),
         }
 
     def _build_class_data(
-        self, node, content: bytes, parent_name: Optional[str]
+        self,
+        node,
+        content: bytes,
+        parent_name: Optional[str],
+        docstrings: Optional[Dict[int, str]] = None,
     ) -> Dict[str, Any]:
         name_node = node.child_by_field_name("name")
         body_node = node.child_by_field_name("body")
@@ -160,10 +453,10 @@ class CodeParserService:
                     continue
                 bases.append(self._node_text(content, child))
 
-        methods = self._extract_class_methods(body_node, content)
+        methods = self._extract_class_methods(body_node, content, docstrings)
         attributes = self._extract_class_attributes(body_node, content)
-        docstring = self._extract_docstring(body_node, content)
-        nested_classes = self._extract_nested_classes(body_node, content, qualified_name)
+        docstring = self._docstring(node, body_node, content, docstrings)
+        nested_classes = self._extract_nested_classes(body_node, content, qualified_name, docstrings)
 
         return {
             "name": name,
@@ -175,14 +468,16 @@ class CodeParserService:
             "nested_classes": nested_classes,
         }
 
-    def _extract_class_methods(self, body_node, content: bytes) -> List[Dict[str, Any]]:
+    def _extract_class_methods(
+        self, body_node, content: bytes, docstrings: Optional[Dict[int, str]] = None
+    ) -> List[Dict[str, Any]]:
         if body_node is None:
             return []
 
         methods: List[Dict[str, Any]] = []
         for child in body_node.named_children:
             if child.type == "function_definition":
-                methods.append(self._build_function_data(child, content))
+                methods.append(self._build_function_data(child, content, docstrings))
         return methods
 
     def _extract_class_attributes(self, body_node, content: bytes) -> List[str]:
@@ -232,7 +527,11 @@ class CodeParserService:
         return identifiers
 
     def _extract_nested_classes(
-        self, body_node, content: bytes, parent_name: str
+        self,
+        body_node,
+        content: bytes,
+        parent_name: str,
+        docstrings: Optional[Dict[int, str]] = None,
     ) -> List[Dict[str, Any]]:
         if body_node is None:
             return []
@@ -240,9 +539,128 @@ class CodeParserService:
         nested: List[Dict[str, Any]] = []
         for child in body_node.named_children:
             if child.type == "class_definition":
-                nested.append(self._build_class_data(child, content, parent_name=parent_name))
+                nested.append(
+                    self._build_class_data(child, content, parent_name=parent_name, docstrings=docstrings)
+                )
         return nested
 
+    def _build_js_function_data(
+        self,
+        span,
+        node,
+        name: Optional[str],
+        content: bytes,
+        docstrings: Optional[Dict[int, str]] = None,
+    ) -> Dict[str, Any]:
+        name_node = node.child_by_field_name("name")
+        params_node = node.child_by_field_name("parameters") or node.child_by_field_name("parameter")
+        return_node = node.child_by_field_name("return_type")
+
+        if name is None:
+            name = self._node_text(content, name_node) if name_node else ""
+        params_text = self._node_text(content, params_node) if params_node else "()"
+        return_type = self._node_text(content, return_node).lstrip(":").strip() if return_node else None
+
+        parameters = []
+        if params_node is not None and params_node.type == "formal_parameters":
+            for child in params_node.named_children:
+                if child.type == "comment":
+                    continue
+                parameters.append(self._node_text(content, child))
+        elif params_node is not None:
+            parameters.append(params_text)
+            params_text = f"({params_text})"
+
+        return {
+            "name": name,
+            "signature": self.js_signature(span, node, content),
+            "parameters": parameters,
+            "parameters_text": params_text,
+            "return_type": return_type,
+            "docstring": self._docstring(span, None, content, docstrings),
+        }
+
+    def _build_js_class_data(
+        self,
+        span,
+        node,
+        name: Optional[str],
+        content: bytes,
+        docstrings: Optional[Dict[int, str]] = None,
+    ) -> Dict[str, Any]:
+        name_node = node.child_by_field_name("name")
+        body_node = node.child_by_field_name("body")
+        if name is None:
+            name = self._node_text(content, name_node) if name_node else ""
+
+        bases: List[str] = []
+        heritage = next((c for c in node.named_children if c.type == "class_heritage"), None)
+        if heritage is not None:
+            for child in heritage.named_children:
+                if child.type in {"extends_clause", "implements_clause"}:
+                    bases.extend(
+                        self._node_text(content, base)
+                        for base in child.named_children
+                        if base.type != "type_arguments"
+                    )
+                elif child.type != "comment":
+                    bases.append(self._node_text(content, child))
+
+        methods: List[Dict[str, Any]] = []
+        attributes: List[str] = []
+        if body_node is not None:
+            for child in body_node.named_children:
+                if child.type in {"method_definition", "abstract_method_signature", "method_signature"}:
+                    methods.append(self._build_js_function_data(child, child, None, content, docstrings))
+                elif child.type in {"public_field_definition", "field_definition"}:
+                    field_name = child.child_by_field_name("name") or child.child_by_field_name("property")
+                    if field_name is not None:
+                        attributes.append(self._node_text(content, field_name))
+
+        return {
+            "name": name,
+            "qualified_name": name,
+            "bases": bases,
+            "docstring": self._docstring(span, None, content, docstrings),
+            "attributes": attributes,
+            "methods": methods,
+            "nested_classes": [],
+        }
+
+    def js_signature(self, span, node, content: bytes) -> str:
+        """
+        Source of a JS/TS function from its start (``export``, ``const``
+        and modifiers included) up to the body, on one line.
+        """
+        body_node = node.child_by_field_name("body")
+        end = body_node.start_byte if body_node is not None else node.end_byte
+        header = content[span.start_byte:end].decode("utf-8", errors="replace")
+        return " ".join(header.split())
+
+    def _extract_jsdoc(self, node, content: bytes) -> Optional[str]:
+        comment = node.prev_named_sibling
+        if comment is None or comment.type != "comment":
+            return None
+        if comment.end_point[0] < node.start_point[0] - 1:
+            return None
+        raw = self._node_text(content, comment)
+        if not raw.startswith("/**"):
+            return None
+        return self._clean_jsdoc(raw)
+
+    def _clean_jsdoc(self, raw: str) -> Optional[str]:
+        lines = [line.strip().lstrip("*").strip() for line in raw[3:-2].splitlines()]
+        return "\n".join(line for line in lines if line) or None
+
+    def _docstring(
+        self, node, body_node, content: bytes, docstrings: Optional[Dict[int, str]]
+    ) -> Optional[str]:
+        if docstrings is not None:
+            return docstrings.get(node.start_byte)
+        if body_node is None and node.type != "function_definition":
+            return self._extract_jsdoc(node, content)
+        return self._extract_docstring(body_node, content)
+
     def _extract_docstring(self, body_node, content: bytes) -> Optional[str]:
         if body_node is None:
             return None
@@ -269,4 +687,7 @@ class CodeParserService:
     def _node_text(self, content: bytes, node) -> str:
         if node is None:
             return ""
-        return content[node.start_byte:node.end_byte].decode("utf-8")
+        return content[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
+
+
+CodeParserService._compile_queries()
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+from qdrant_client import models
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """
+    Named set of Qdrant storage and index parameters for a code collection.
+    """
+
+    name: str
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    # None leaves Qdrant's default (ef = limit) in place at query time.
+    search_ef: Optional[int] = None
+    # None, "scalar" (int8) or "product".
+    quantization: Optional[str] = None
+    product_compression: models.CompressionRatio = models.CompressionRatio.X16
+    quantization_always_ram: bool = True
+    rescore: bool = True
+    oversampling: float = 2.0
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+    indexing_threshold: Optional[int] = None
+
+    def vectors_config(
+        self,
+        size: int,
+        distance: models.Distance = models.Distance.COSINE,
+    ) -> models.VectorParams:
+        return models.VectorParams(size=size, distance=distance, on_disk=self.on_disk_vectors)
+
+    def hnsw_config(self, multitenant: bool = False) -> models.HnswConfigDiff:
+        if multitenant:
+            # No global graph: every search is filtered to one tenant, so
+            # Qdrant only needs the per-tenant graphs built from payload_m.
+            return models.HnswConfigDiff(
+                m=0, payload_m=self.hnsw_m, ef_construct=self.hnsw_ef_construct
+            )
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def optimizers_config(self) -> Optional[models.OptimizersConfigDiff]:
+        if self.indexing_threshold is None:
+            return None
+        return models.OptimizersConfigDiff(indexing_threshold=self.indexing_threshold)
+
+    def quantization_config(
+        self,
+    ) -> Optional[Union[models.ScalarQuantization, models.ProductQuantization]]:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "product":
+            return models.ProductQuantization(
+                product=models.ProductQuantizationConfig(
+                    compression=self.product_compression,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        quantization = None
+        if self.quantization:
+            # Search the compressed vectors, then rescore the best
+            # candidates with the originals to recover precision.
+            quantization = models.QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling,
+            )
+        if self.search_ef is None and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+    def estimate_memory_bytes(self, num_vectors: int, dimension: int) -> Dict[str, int]:
+        """
+        Rough resident-memory estimate for ``num_vectors`` points.
+
+        Follows Qdrant's sizing guidance: full vectors cost 4 bytes per
+        dimension, scalar-quantized ones 1 byte, product-quantized ones
+        4 / compression bytes, and the HNSW graph about m * 2 links of
+        4 bytes per point. Payload and on-disk data are excluded.
+        """
+        original = num_vectors * dimension * 4
+        if self.quantization == "scalar":
+            quantized = num_vectors * dimension
+        elif self.quantization == "product":
+            ratio = int(self.product_compression.value.lstrip("x"))
+            quantized = num_vectors * dimension * 4 // ratio
+        else:
+            quantized = 0
+
+        vectors_in_ram = 0 if self.on_disk_vectors else original
+        if quantized and not self.quantization_always_ram:
+            quantized = 0
+        graph = num_vectors * self.hnsw_m * 2 * 4
+
+        return {
+            "vectors": vectors_in_ram,
+            "quantized": quantized,
+            "hnsw": graph,
+            "total": int((vectors_in_ram + quantized + graph) * 1.5),
+        }
+
+
+COLLECTION_PROFILES: Dict[str, CollectionProfile] = {
+    profile.name: profile
+    for profile in (
+        # Qdrant defaults: everything in RAM, exact float32 vectors.
+        CollectionProfile(name="default"),
+        # Searches int8 copies and rescores with the float32 originals; faster
+        # than default at the cost of ~25% more RAM.
+        CollectionProfile(
+            name="balanced",
+            search_ef=128,
+            quantization="scalar",
+            on_disk_payload=True,
+        ),
+        # Originals and payloads on disk, only int8 copies and the graph in
+        # RAM. Fits millions of chunks on one node.
+        CollectionProfile(
+            name="low_memory",
+            search_ef=128,
+            quantization="scalar",
+            on_disk_vectors=True,
+            on_disk_payload=True,
+            indexing_threshold=20000,
+        ),
+        # Product quantization for the largest deployments; needs more
+        # oversampling to keep recall.
+        CollectionProfile(
+            name="compact",
+            hnsw_m=12,
+            search_ef=128,
+            quantization="product",
+            oversampling=3.0,
+            on_disk_vectors=True,
+            on_disk_payload=True,
+            indexing_threshold=20000,
+        ),
+        # Denser graph and wider search for small, accuracy-sensitive installs.
+        CollectionProfile(name="high_recall", hnsw_m=32, hnsw_ef_construct=256, search_ef=256),
+    )
+}
+
+
+def get_collection_profile(name: str) -> CollectionProfile:
+    profile = COLLECTION_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(
+            f"Unknown collection profile '{name}'. "
+            f"Expected one of: {', '.join(sorted(COLLECTION_PROFILES))}"
+        )
+    return profile
@@ -0,0 +1,209 @@
+import hashlib
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.database import SessionLocal
+from app.models.chunk_content import ChunkContent
+from app.services.embedding_cache import normalize_chunk_text
+
+logger = logging.getLogger(__name__)
+
+
+class ContentStore:
+    """
+    Content-addressed chunk text, zlib-compressed in the chunk_contents table.
+
+    Vector payloads only carry the content hash, so identical chunks across
+    files, forks and repositories are stored once and the vector store keeps
+    nothing but metadata in memory.
+    """
+
+    COMPRESSION_LEVEL = 6
+    DELETE_BATCH_SIZE = 500
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        self.session_factory = session_factory
+
+    def put_many(self, texts: Sequence[str]) -> List[str]:
+        """
+        Store ``texts`` and return their hashes in input order.
+        """
+        hashes = [content_hash(text) for text in texts]
+        pending: Dict[str, str] = {}
+        for digest, text in zip(hashes, texts):
+            pending.setdefault(digest, text)
+        if not pending:
+            return hashes
+
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            existing = {
+                row[0]
+                for row in db.query(ChunkContent.content_hash)
+                .filter(ChunkContent.content_hash.in_(list(pending)))
+                .all()
+            }
+            if existing:
+                # Reused text is about to be referenced again; keep it out
+                # of delete_unreferenced's reach.
+                db.query(ChunkContent).filter(ChunkContent.content_hash.in_(list(existing))).update(
+                    {ChunkContent.used_at: now}, synchronize_session=False
+                )
+            rows = [
+                self._row(digest, text, now) for digest, text in pending.items() if digest not in existing
+            ]
+            if not rows:
+                db.commit()
+                return hashes
+            try:
+                db.add_all(rows)
+                db.commit()
+            except IntegrityError:
+                # Another worker stored some of the same chunks concurrently;
+                # merge skips over the rows that now exist.
+                db.rollback()
+                for row in rows:
+                    db.merge(row)
+                db.commit()
+        finally:
+            db.close()
+        return hashes
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        wanted = list({digest for digest in hashes if digest})
+        if not wanted:
+            return {}
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(ChunkContent.content_hash, ChunkContent.data)
+                .filter(ChunkContent.content_hash.in_(wanted))
+                .all()
+            )
+        finally:
+            db.close()
+        return {digest: zlib.decompress(data).decode("utf-8") for digest, data in rows}
+
+    def delete_unreferenced(
+        self,
+        referenced: Callable[[List[str]], Set[str]],
+        hashes: Optional[Iterable[str]] = None,
+        dry_run: bool = False,
+        grace_seconds: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Delete stored text that no vector point references any more.
+
+        ``referenced`` returns which of a batch of hashes are still in use.
+        Only ``hashes`` are considered when given, otherwise every row.
+        Rows stored or reused within ``grace_seconds``
+        (CONTENT_GC_GRACE_SECONDS by default) are kept: a writer stores text
+        before it upserts the points that reference it. Returns the rows and
+        compressed bytes removed, or that would be with ``dry_run``.
+        """
+        if grace_seconds is None:
+            grace_seconds = settings.CONTENT_GC_GRACE_SECONDS
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+        idle = (ChunkContent.used_at.is_(None)) | (ChunkContent.used_at < cutoff)
+        report = {"rows": 0, "bytes": 0}
+
+        db = self.session_factory()
+        try:
+            for batch in self._candidate_batches(db, idle, hashes):
+                unused = [digest for digest in batch if digest not in referenced(batch)]
+                if not unused:
+                    continue
+                condition = ChunkContent.content_hash.in_(unused) & idle
+                rows, size = (
+                    db.query(func.count(), func.coalesce(func.sum(func.length(ChunkContent.data)), 0))
+                    .filter(condition)
+                    .one()
+                )
+                report["rows"] += int(rows)
+                report["bytes"] += int(size)
+                if not dry_run:
+                    db.query(ChunkContent).filter(condition).delete(synchronize_session=False)
+                    db.commit()
+        finally:
+            db.close()
+        return report
+
+    def _candidate_batches(self, db: Session, idle: Any, hashes: Optional[Iterable[str]]) -> Iterable[List[str]]:
+        if hashes is not None:
+            wanted = sorted(set(hashes))
+            for start in range(0, len(wanted), self.DELETE_BATCH_SIZE):
+                batch = wanted[start:start + self.DELETE_BATCH_SIZE]
+                yield [
+                    digest
+                    for (digest,) in db.query(ChunkContent.content_hash)
+                    .filter(ChunkContent.content_hash.in_(batch) & idle)
+                ]
+            return
+        after = ""
+        while True:
+            batch = [
+                digest
+                for (digest,) in db.query(ChunkContent.content_hash)
+                .filter(ChunkContent.content_hash > after, idle)
+                .order_by(ChunkContent.content_hash)
+                .limit(self.DELETE_BATCH_SIZE)
+            ]
+            if not batch:
+                return
+            yield batch
+            after = batch[-1]
+
+    def _row(self, digest: str, text: str, used_at: datetime) -> ChunkContent:
+        raw = text.encode("utf-8")
+        return ChunkContent(
+            content_hash=digest,
+            data=zlib.compress(raw, self.COMPRESSION_LEVEL),
+            size=len(raw),
+            used_at=used_at,
+        )
+
+
+def content_hash(code: str) -> str:
+    return hashlib.sha256(normalize_chunk_text(code).encode("utf-8")).hexdigest()
+
+
+def fill_contents(
+    results: List[Dict[str, Any]],
+    store: Optional[ContentStore] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Add chunk text to search results whose payload only has a content hash.
+
+    All missing texts are fetched in one query. Results are updated in place
+    and returned.
+    """
+    missing = [
+        item["payload"]["content_hash"]
+        for item in results
+        if item.get("payload")
+        and not item["payload"].get("content")
+        and item["payload"].get("content_hash")
+    ]
+    if not missing:
+        return results
+
+    try:
+        contents = (store or ContentStore()).get_many(missing)
+    except Exception as exc:
+        logger.warning("Could not load chunk contents: %s", exc)
+        return results
+
+    for item in results:
+        payload = item.get("payload") or {}
+        text = contents.get(payload.get("content_hash"))
+        if text is not None and not payload.get("content"):
+            payload["content"] = text
+    return results
@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Retrieval diversification modes accepted by VectorStore.search_code.
+DIVERSITY_MODES = ("none", "mmr", "group")
+
+
+def resolve_diversity(mode: Optional[str], default: str) -> str:
+    mode = mode or default
+    if mode not in DIVERSITY_MODES:
+        raise ValueError(
+            f"Unknown diversity mode '{mode}'. Expected one of: {', '.join(DIVERSITY_MODES)}"
+        )
+    return mode
+
+
+def mmr_select(
+    query_vector: Sequence[float],
+    vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+    relevance: Optional[Sequence[float]] = None,
+) -> List[int]:
+    """
+    Pick ``k`` rows by maximal marginal relevance.
+
+    Each step takes the candidate with the best trade-off between relevance
+    to the query and similarity to what is already selected, so a class and
+    its near-identical method chunks do not all make the cut. Relevance
+    defaults to the cosine similarity with ``query_vector``; vectors are
+    expected to be L2-normalized.
+    """
+    count = len(vectors)
+    if count == 0 or k <= 0:
+        return []
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if relevance is None:
+        relevance = vectors @ np.asarray(query_vector, dtype=np.float32)
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[:, selected[0]].copy()
+    while len(selected) < min(k, count):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, similarity[:, best], out=redundancy)
+    return selected
+
+
+def mmr_rerank(
+    query_vector: Sequence[float],
+    results: List[Dict[str, Any]],
+    vectors: Sequence[Sequence[float]],
+    top_k: int,
+    lambda_mult: float,
+    fused: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Reorder candidate search results by MMR and keep ``top_k`` of them.
+
+    ``fused`` results carry rank-fusion scores rather than cosine
+    similarities; those are divided by the best score and used as the
+    relevance term so lexical matches keep their place.
+    """
+    if not results:
+        return []
+    relevance = None
+    if fused:
+        scores = np.asarray([item["score"] for item in results], dtype=np.float32)
+        relevance = scores / scores.max() if scores.max() > 0 else np.ones_like(scores)
+    order = mmr_select(query_vector, np.asarray(vectors, dtype=np.float32), top_k, lambda_mult, relevance)
+    return [results[i] for i in order]
+
+
+def cap_per_path(results: List[Dict[str, Any]], per_path: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Keep at most ``per_path`` results per file, in score order.
+    """
+    counts: Dict[Any, int] = {}
+    kept = []
+    for item in results:
+        path = (item.get("payload") or {}).get("path")
+        if counts.get(path, 0) >= per_path:
+            continue
+        counts[path] = counts.get(path, 0) + 1
+        kept.append(item)
+        if len(kept) >= limit:
+            break
+    return kept
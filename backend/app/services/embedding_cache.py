@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache with a Redis hot tier and a
+    size-bounded SQLite disk tier.
+
+    Keys are sha256(model_id + normalized text), so identical chunks are
+    embedded once no matter which repository, fork or file they come from.
+    Vectors are stored as float16 to halve the footprint of both tiers.
+    """
+
+    _REDIS_PREFIX = "emb:"
+    # Skip Redis for a while after a failure instead of paying a connect
+    # timeout for every batch.
+    _REDIS_RETRY_SECONDS = 30.0
+
+    def __init__(
+        self,
+        model_id: str,
+        redis_url: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        redis_ttl: Optional[int] = None,
+    ) -> None:
+        self.model_id = model_id
+        self.redis_url = redis_url if redis_url is not None else settings.REDIS_URL
+        self.cache_dir = cache_dir or settings.EMBEDDING_CACHE_DIR
+        self.max_bytes = max_bytes or settings.EMBEDDING_CACHE_MAX_BYTES
+        self.redis_ttl = redis_ttl or settings.EMBEDDING_CACHE_REDIS_TTL
+
+        self._redis = redis.Redis.from_url(self.redis_url) if self.redis_url else None
+        self._redis_down_until = 0.0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._counters = {"hot_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.model_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(normalize_chunk_text(text).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        keys = [self.key(text) for text in texts]
+        found: Dict[str, np.ndarray] = self._redis_get(keys)
+
+        missing = [key for key in keys if key not in found]
+        disk_found = self._disk_get(missing) if missing else {}
+        if disk_found:
+            # Promote disk hits so the next lookup stays in memory.
+            self._redis_set(disk_found)
+
+        results: List[Optional[np.ndarray]] = []
+        for key in keys:
+            if key in found:
+                self._counters["hot_hits"] += 1
+                results.append(found[key].astype(np.float32))
+            elif key in disk_found:
+                self._counters["disk_hits"] += 1
+                results.append(disk_found[key].astype(np.float32))
+            else:
+                self._counters["misses"] += 1
+                results.append(None)
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        if not len(texts):
+            return
+        entries = {
+            self.key(text): np.asarray(vector, dtype=np.float16)
+            for text, vector in zip(texts, vectors)
+        }
+        self._redis_set(entries)
+        self._disk_set(entries)
+        self._counters["writes"] += len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._counters)
+        lookups = stats["hot_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning("Embedding cache Redis tier unavailable: %s", exc)
+        self._redis_down_until = time.monotonic() + self._REDIS_RETRY_SECONDS
+
+    def _redis_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not keys or not self._redis_available():
+            return {}
+        try:
+            values = self._redis.mget([self._REDIS_PREFIX + key for key in keys])
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return {}
+        return {
+            key: np.frombuffer(value, dtype=np.float16)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def _redis_set(self, entries: Dict[str, np.ndarray]) -> None:
+        if not entries or not self._redis_available():
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key, vector in entries.items():
+                pipe.setex(self._REDIS_PREFIX + key, self.redis_ttl, vector.tobytes())
+            pipe.execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork, so reopen per process.
+        if self._db is None or self._db_pid != os.getpid():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            db = sqlite3.connect(
+                os.path.join(self.cache_dir, "embeddings.sqlite3"),
+                timeout=30,
+                check_same_thread=False,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)"
+            )
+            self._db = db
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            db = self._connection()
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16)
+            if found:
+                now = time.time()
+                db.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                db.commit()
+        return found
+
+    def _disk_set(self, entries: Dict[str, np.ndarray]) -> None:
+        now = time.time()
+        entry_bytes = next(iter(entries.values())).nbytes
+        with self._lock:
+            db = self._connection()
+            db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in entries.items()],
+            )
+            self._evict(db, entry_bytes)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, entry_bytes: int) -> None:
+        # Vectors of one model share a size, so bound the row count rather
+        # than summing blob lengths on every write.
+        max_entries = max(1, self.max_bytes // max(1, entry_bytes))
+        (count,) = db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - max_entries
+        if excess <= 0:
+            return
+        db.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        self._counters["evictions"] += excess
+
+
+def normalize_chunk_text(text: str) -> str:
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+
+
+def get_embedding_cache(model_id: str) -> EmbeddingCache:
+    cache = _caches.get(model_id)
+    if cache is None:
+        cache = _caches[model_id] = EmbeddingCache(model_id)
+    return cache
@@ -1,14 +1,193 @@
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+from app.config import settings
+from app.services.embedding_backends import EmbeddingBackend, load_embedding_backend
 
 
 class EmbeddingService:
-    def __init__(self) -> None:
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        backend: Optional[str] = None,
+        long_text_mode: Optional[str] = None,
+    ) -> None:
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_MAX_BATCH_TOKENS
+        self.long_text_mode = long_text_mode or settings.EMBEDDING_LONG_TEXT_MODE
+        self.window_overlap = settings.EMBEDDING_WINDOW_OVERLAP
+        self.max_tokens_per_text = settings.EMBEDDING_MAX_TOKENS_PER_CHUNK
+        self.backend: EmbeddingBackend = load_embedding_backend(
+            backend or settings.EMBEDDING_BACKEND, self.model_name
+        )
+        self.window_stats: Dict[str, int] = {"texts": 0, "windowed": 0, "clipped": 0, "windows": 0}
 
     def generate_embedding(self, text: str) -> List[float]:
         if not text:
             raise ValueError("text is required")
-        embedding = self.model.encode([text], normalize_embeddings=True)[0]
-        return embedding.tolist()
+        return self.generate_embeddings([text])[0].tolist()
+
+    def generate_embeddings(
+        self,
+        texts: Sequence[str],
+        batch_size: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Embed many texts with length-bucketed batching.
+
+        Inputs are sorted by token length so each batch pads to a similar
+        length, and a batch is closed early once its padded token count would
+        exceed ``max_batch_tokens``.
+
+        In ``window`` mode, texts longer than the model's sequence window are
+        split into overlapping token windows that are embedded in the same
+        batches and mean-pooled back into one vector per text.
+
+        Returns:
+            np.ndarray: A contiguous float32 array of shape (len(texts), dim)
+            with rows in the same order as ``texts``.
+        """
+        if any(not text for text in texts):
+            raise ValueError("text is required")
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        self.window_stats["texts"] += len(texts)
+        if self.long_text_mode == "window" and getattr(self.backend.tokenizer, "is_fast", False):
+            segments, lengths, owners = self._split_windows(texts)
+        else:
+            segments, lengths, owners = list(texts), self._token_lengths(texts), None
+
+        vectors = self._encode_bucketed(segments, lengths, batch_size or self.batch_size)
+        if owners is None or len(segments) == len(texts):
+            return vectors
+
+        pooled = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, vectors)
+        pooled /= np.linalg.norm(pooled, axis=1, keepdims=True).clip(min=1e-12)
+        return np.ascontiguousarray(pooled)
+
+    def _encode_bucketed(
+        self,
+        texts: Sequence[str],
+        lengths: List[int],
+        batch_size: int,
+    ) -> np.ndarray:
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+        output: Optional[np.ndarray] = None
+
+        for batch in self._pack_batches(order, lengths, batch_size):
+            vectors = self.backend.encode([texts[i] for i in batch], batch_size=len(batch))
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[batch] = vectors
+
+        return np.ascontiguousarray(output)
+
+    def _split_windows(
+        self, texts: Sequence[str]
+    ) -> Tuple[List[str], List[int], np.ndarray]:
+        # Reserve room for the [CLS]/[SEP] tokens the model adds per window.
+        window = max(1, self.backend.max_seq_length - 2)
+        stride = max(1, window - self.window_overlap)
+        # Generous bound so pathological inputs (minified bundles) are never
+        # tokenized in full just to be clipped afterwards.
+        char_limit = self.max_tokens_per_text * 16
+
+        encoded = self.backend.tokenizer(
+            [text[:char_limit] for text in texts],
+            add_special_tokens=False,
+            truncation=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
+        )
+
+        segments: List[str] = []
+        lengths: List[int] = []
+        owners: List[int] = []
+        for index, (text, offsets) in enumerate(zip(texts, encoded["offset_mapping"])):
+            if len(offsets) > self.max_tokens_per_text or len(text) > char_limit:
+                self.window_stats["clipped"] += 1
+                offsets = offsets[:self.max_tokens_per_text]
+                text = text[:offsets[-1][1]] if offsets else text[:char_limit]
+
+            if len(offsets) <= window:
+                segments.append(text)
+                lengths.append(len(offsets) + 2)
+                owners.append(index)
+                continue
+
+            self.window_stats["windowed"] += 1
+            for start in range(0, len(offsets), stride):
+                span = offsets[start:start + window]
+                # Windows are cut on token boundaries via the offset mapping.
+                segments.append(text[span[0][0]:span[-1][1]])
+                lengths.append(len(span) + 2)
+                owners.append(index)
+                self.window_stats["windows"] += 1
+                if start + window >= len(offsets):
+                    break
+
+        return segments, lengths, np.asarray(owners)
+
+    @property
+    def model_id(self) -> str:
+        # Backends of one model yield interchangeable vectors, so cached
+        # embeddings are shared across them. How long texts are split does
+        # change the vector, so the window settings are part of the ID.
+        if self.long_text_mode != "window":
+            return f"{self.model_name}:{self.long_text_mode}"
+        return f"{self.model_name}:window:{self.window_overlap}:{self.max_tokens_per_text}"
+
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def _pack_batches(
+        self,
+        order: List[int],
+        lengths: List[int],
+        batch_size: int,
+    ) -> List[List[int]]:
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for index in order:
+            # Sorted ascending, so the newest item sets the padded length.
+            padded_tokens = (len(current) + 1) * lengths[index]
+            if current and (
+                len(current) >= batch_size or padded_tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+            current.append(index)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _token_lengths(self, texts: Sequence[str]) -> List[int]:
+        tokenizer = self.backend.tokenizer
+        if tokenizer is None:
+            return [len(text) for text in texts]
+
+        encoded = tokenizer(
+            list(texts),
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self.backend.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+def preload_embedding_model() -> None:
+    """
+    Load the configured embedding model into the process-wide registry.
+    """
+    EmbeddingService()
@@ -0,0 +1,84 @@
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded ML models.
+
+    Models are loaded once per process and shared by every service instance.
+    Loading before a prefork worker forks lets the children share the weights
+    copy-on-write instead of each reading them from disk.
+    """
+
+    def __init__(self) -> None:
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                model = loader()
+                load_seconds = time.perf_counter() - start
+                rss_after = _rss_bytes()
+
+                self._models[key] = model
+                self._stats[key] = {
+                    "load_seconds": round(load_seconds, 3),
+                    "rss_delta_bytes": rss_after - rss_before,
+                    "loaded_in_pid": os.getpid(),
+                }
+                logger.info(
+                    "Loaded model %s in %.2fs (rss %+.1f MB, pid %s)",
+                    key,
+                    load_seconds,
+                    (rss_after - rss_before) / 1024 / 1024,
+                    os.getpid(),
+                )
+        return model
+
+    def preload(self, loaders: Dict[str, Callable[[], Any]]) -> None:
+        for key, loader in loaders.items():
+            self.get(key, loader)
+
+    def loaded(self) -> Iterable[str]:
+        return list(self._models)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": _rss_bytes(),
+            "models": {key: dict(value) for key, value in self._stats.items()},
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as handle:
+            resident_pages = int(handle.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but good enough where /proc is missing.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+model_registry = ModelRegistry()
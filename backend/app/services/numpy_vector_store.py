@@ -0,0 +1,547 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, Iterator, List, Optional, Sequence, Set, Tuple
+import json
+import os
+import shutil
+import sqlite3
+import threading
+
+import numpy as np
+from qdrant_client import models
+
+from app.config import settings
+from app.services.diversify import cap_per_path, mmr_rerank, resolve_diversity
+from app.services.result_cutoff import SearchResults
+from app.services.vector_store import POSITION_FIELDS, ChunkItem, VectorStore, _batched
+
+
+class RepoVectorIndex:
+    """
+    Brute-force vector index for one repository of one collection.
+
+    Vectors live in a memory-mapped float16 ``vectors.npy`` matrix; point IDs,
+    filter fields and payloads live in a sidecar SQLite table keyed by matrix
+    row. Deleted rows are masked out and reused by later writes. Every write
+    bumps a version counter so other processes reload their mapping lazily.
+    """
+
+    INITIAL_ROWS = 1024
+    # Up to this many rows a float32 copy is kept in RAM so a search is one
+    # BLAS matrix-vector product; converting float16 on every query costs
+    # several times more than the product itself. Larger indexes are
+    # scanned straight from the mapping in blocks.
+    RESIDENT_MAX_ROWS = 100_000
+    SEARCH_BLOCK_ROWS = 4096
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.db_path = os.path.join(directory, "points.sqlite")
+        self._db = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "row INTEGER PRIMARY KEY, point_id TEXT UNIQUE NOT NULL, path TEXT, "
+            "language TEXT, chunk_index INTEGER, payload TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_points_path ON points(path)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+        self._file_id = _file_id(self.db_path)
+        self._lock = threading.RLock()
+        self._version = -1
+        self._matrix: Optional[np.memmap] = None
+        self._resident: Optional[np.ndarray] = None
+        self._size = 0
+        self._active = np.zeros(0, dtype=bool)
+        self._point_ids = np.empty(0, dtype=object)
+        self._paths = np.empty(0, dtype=object)
+        self._languages = np.empty(0, dtype=object)
+
+    def is_current(self) -> bool:
+        """Whether this handle's files are still the ones on disk."""
+        return _file_id(self.db_path) == self._file_id
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return int(self._active.sum())
+
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+        with_vectors: bool = False,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        ``(point_id, score, payload)`` of the best rows, with the stored
+        vector appended when ``with_vectors`` is set.
+        """
+        with self._lock:
+            self._refresh()
+            if self._matrix is None or not self._size:
+                return []
+            mask = self._active[: self._size].copy()
+            if path is not None:
+                mask &= self._paths[: self._size] == path
+            if language is not None:
+                mask &= self._languages[: self._size] == language
+            candidates = int(mask.sum())
+            if not candidates:
+                return []
+
+            query = np.asarray(vector, dtype=np.float32)
+            if self._resident is not None:
+                scores = self._resident @ query
+            else:
+                scores = np.empty(self._size, dtype=np.float32)
+                for start in range(0, self._size, self.SEARCH_BLOCK_ROWS):
+                    end = min(start + self.SEARCH_BLOCK_ROWS, self._size)
+                    scores[start:end] = self._matrix[start:end].astype(np.float32) @ query
+            scores[~mask] = -np.inf
+
+            k = min(top_k, candidates)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            payloads = self._payloads([int(row) for row in top])
+            # A concurrent delete may have removed a row since the refresh.
+            hits = [
+                (self._point_ids[row], float(scores[row]), payloads[int(row)])
+                for row in top
+                if int(row) in payloads
+            ]
+            if not with_vectors:
+                return hits
+            rows = [int(row) for row in top if int(row) in payloads]
+            vectors = self._resident if self._resident is not None else self._matrix
+            return [hit + (vectors[row].astype(np.float32),) for hit, row in zip(hits, rows)]
+
+    def write(
+        self,
+        point_ids: Sequence[str],
+        vectors: np.ndarray,
+        payloads: Sequence[Dict[str, Any]],
+    ) -> None:
+        if not len(point_ids):
+            return
+        # Row allocation happens inside the write transaction, so two
+        # processes writing the same index never claim the same row.
+        with self._transaction():
+            self._refresh()
+            placeholders = ",".join("?" * len(point_ids))
+            existing = dict(
+                self._db.execute(
+                    f"SELECT point_id, row FROM points WHERE point_id IN ({placeholders})",
+                    list(point_ids),
+                ).fetchall()
+            )
+            used = {row for (row,) in self._db.execute("SELECT row FROM points")}
+            free = (row for row in range(len(used) + len(point_ids)) if row not in used)
+            rows = [
+                existing[point_id] if point_id in existing else next(free)
+                for point_id in point_ids
+            ]
+
+            self._ensure_capacity(max(rows) + 1, vectors.shape[1])
+            self._matrix[rows] = vectors.astype(np.float16)
+            self._matrix.flush()
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row,
+                        point_id,
+                        payload.get("path"),
+                        payload.get("language"),
+                        payload.get("chunk_index"),
+                        json.dumps(payload),
+                    )
+                    for row, point_id, payload in zip(rows, point_ids, payloads)
+                ],
+            )
+            self._bump_version()
+
+    def delete(self, point_ids: Optional[Sequence[str]] = None, path: Optional[str] = None) -> int:
+        with self._transaction():
+            if path is not None:
+                cursor = self._db.execute("DELETE FROM points WHERE path = ?", (path,))
+            else:
+                cursor = self._db.executemany(
+                    "DELETE FROM points WHERE point_id = ?",
+                    [(point_id,) for point_id in point_ids or []],
+                )
+            # Vectors stay in the matrix; their rows are masked and reused.
+            self._bump_version()
+            return cursor.rowcount
+
+    def points(
+        self, after_row: int = -1, limit: int = 1000
+    ) -> List[Tuple[int, str, str, Optional[int], Optional[str]]]:
+        """
+        ``(row, point_id, path, chunk_index, content_hash)`` of live points
+        past ``after_row``.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT row, point_id, path, chunk_index, json_extract(payload, '$.content_hash') "
+                "FROM points WHERE row > ? ORDER BY row LIMIT ?",
+                (after_row, limit),
+            ).fetchall()
+
+    def content_hashes(self, hashes: Sequence[str]) -> Set[str]:
+        """Which of ``hashes`` a live point references."""
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock:
+            return {
+                digest
+                for (digest,) in self._db.execute(
+                    "SELECT DISTINCT json_extract(payload, '$.content_hash') FROM points "
+                    f"WHERE json_extract(payload, '$.content_hash') IN ({placeholders})",
+                    list(hashes),
+                )
+            }
+
+    def positions(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """``POSITION_FIELDS`` of every point of ``path``, by point ID."""
+        with self._lock:
+            rows = self._db.execute("SELECT point_id, payload FROM points WHERE path = ?", (path,))
+            return {
+                point_id: {key: value for key, value in json.loads(payload).items() if key in POSITION_FIELDS}
+                for point_id, payload in rows
+            }
+
+    def set_positions(self, moved: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE points SET chunk_index = ?, payload = json_patch(payload, ?) WHERE point_id = ?",
+                [
+                    (position["chunk_index"], json.dumps(position), point_id)
+                    for point_id, position in moved
+                ],
+            )
+
+    @contextmanager
+    def _transaction(self) -> Generator[None, None, None]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, serializing writers
+            # across processes.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._resident = None
+            self._db.close()
+
+    def _payloads(self, rows: List[int]) -> Dict[int, Dict[str, Any]]:
+        placeholders = ",".join("?" * len(rows))
+        return {
+            row: json.loads(payload)
+            for row, payload in self._db.execute(
+                f"SELECT row, payload FROM points WHERE row IN ({placeholders})", rows
+            )
+        }
+
+    def _bump_version(self) -> None:
+        self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _refresh(self) -> None:
+        (version,) = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version == self._version:
+            return
+
+        self._matrix = (
+            np.load(self.vectors_path, mmap_mode="r+") if os.path.exists(self.vectors_path) else None
+        )
+        rows = self._db.execute("SELECT row, point_id, path, language FROM points").fetchall()
+        self._size = max((row for row, *_ in rows), default=-1) + 1
+        self._active = np.zeros(self._size, dtype=bool)
+        self._point_ids = np.empty(self._size, dtype=object)
+        self._paths = np.empty(self._size, dtype=object)
+        self._languages = np.empty(self._size, dtype=object)
+        for row, point_id, path, language in rows:
+            self._active[row] = True
+            self._point_ids[row] = point_id
+            self._paths[row] = path
+            self._languages[row] = language
+        self._resident = (
+            np.asarray(self._matrix[: self._size], dtype=np.float32)
+            if self._matrix is not None and self._size <= self.RESIDENT_MAX_ROWS
+            else None
+        )
+        self._version = version
+
+    def _ensure_capacity(self, rows: int, dimension: int) -> None:
+        if self._matrix is not None:
+            if self._matrix.shape[1] != dimension:
+                raise ValueError(
+                    f"Vector dimension {dimension} does not match index dimension "
+                    f"{self._matrix.shape[1]}"
+                )
+            if self._matrix.shape[0] >= rows:
+                return
+
+        capacity = self.INITIAL_ROWS if self._matrix is None else self._matrix.shape[0]
+        while capacity < rows:
+            capacity *= 2
+        tmp_path = f"{self.vectors_path}.{os.getpid()}.tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float16, shape=(capacity, dimension)
+        )
+        if self._matrix is not None:
+            grown[: self._matrix.shape[0]] = self._matrix
+        grown.flush()
+        del grown
+        # Readers holding the old mapping keep a valid (stale) file until
+        # they see the version bump and reload.
+        os.replace(tmp_path, self.vectors_path)
+        self._matrix = np.load(self.vectors_path, mmap_mode="r+")
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+# Open indexes per process, shared by every store instance.
+_indexes: Dict[Tuple[int, str], RepoVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store for single-node installs.
+
+    Each repository is a separate memory-mapped float16 matrix, so a search
+    is a brute-force matrix-vector product over that repository only, with no
+    network hop. Only dense vectors are stored; QDRANT_HYBRID_SEARCH does not
+    apply.
+    """
+
+    name = "numpy"
+
+    # Chunks embedded and written per index transaction.
+    WRITE_BATCH_SIZE = 256
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        super().__init__()
+        self.root = root or settings.VECTOR_STORE_DIR
+
+    def create_collection(
+        self,
+        name: str,
+        vector_size: Optional[int] = None,
+        distance: models.Distance = models.Distance.COSINE,
+        recreate: bool = False,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if not name:
+            raise ValueError("Collection name is required")
+        if distance not in (models.Distance.COSINE, models.Distance.DOT):
+            # Stored vectors are normalized, so cosine is a dot product.
+            raise ValueError(f"Unsupported distance for the numpy store: {distance.value}")
+
+        directory = self._collection_dir(name)
+        if os.path.isdir(directory):
+            if not recreate:
+                return {"status": "exists", "collection": name}
+            self._close_indexes(directory)
+            shutil.rmtree(directory)
+        os.makedirs(directory, exist_ok=True)
+
+        return {
+            "status": "created",
+            "collection": name,
+            "vector_size": vector_size or self.embedding_service.dimension,
+            "distance": distance.value,
+            "backend": self.name,
+        }
+
+    def search_code(
+        self,
+        query: str,
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+        query_vector: Optional[Sequence[float]] = None,
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+        diversity: Optional[str] = None,
+        min_score: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ) -> SearchResults:
+        if not query:
+            raise ValueError("query is required")
+        if top_k <= 0:
+            raise ValueError("top_k must be positive")
+        mode = resolve_diversity(diversity, settings.RETRIEVAL_DIVERSITY)
+
+        index = self._index(collection_name, repo_id, create=False)
+        if index is None:
+            return SearchResults()
+        if query_vector is None:
+            query_vector = self.embedding_service.generate_embedding(query)
+        vector = np.asarray(query_vector, dtype=np.float32)
+
+        if mode == "none":
+            results = [
+                {"score": score, "id": point_id, "payload": payload}
+                for point_id, score, payload in index.search(vector, top_k, path, language)
+            ]
+            return self._cutoff(results, min_score, adaptive)
+
+        hits = index.search(
+            vector,
+            top_k * settings.RETRIEVAL_CANDIDATE_FACTOR,
+            path,
+            language,
+            with_vectors=mode == "mmr",
+        )
+        results = [{"score": hit[1], "id": hit[0], "payload": hit[2]} for hit in hits]
+        if mode == "group":
+            results = cap_per_path(results, settings.RETRIEVAL_MAX_PER_FILE, top_k)
+        else:
+            results = mmr_rerank(
+                vector, results, [hit[3] for hit in hits], top_k, settings.RETRIEVAL_MMR_LAMBDA
+            )
+        return self._cutoff(results, min_score, adaptive)
+
+    def iter_repo_points(
+        self,
+        repo_id: int,
+        collection_name: str,
+        page_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        index = self._index(collection_name, repo_id, create=False)
+        if index is None:
+            return
+        after_row = -1
+        while True:
+            rows = index.points(after_row, page_size)
+            if not rows:
+                return
+            yield [
+                {"id": point_id, "path": path, "chunk_index": chunk_index, "content_hash": digest}
+                for _, point_id, path, chunk_index, digest in rows
+            ]
+            after_row = rows[-1][0]
+
+    def referenced_hashes(self, collection_name: str, hashes: Sequence[str]) -> Set[str]:
+        directory = self._collection_dir(collection_name)
+        wanted = set(hashes)
+        found: Set[str] = set()
+        if not wanted or not os.path.isdir(directory):
+            return found
+        for entry in sorted(os.listdir(directory)):
+            if not entry.startswith("repo_") or not wanted - found:
+                continue
+            index = self._index(collection_name, int(entry[len("repo_"):]), create=False)
+            if index is not None:
+                found |= index.content_hashes(sorted(wanted - found))
+        return found
+
+    def delete_by_path(self, repo_id: int, collection_name: str, file_path: str) -> None:
+        index = self._index(collection_name, repo_id, create=False)
+        if index is not None:
+            index.delete(path=file_path)
+
+    def delete_repo(self, repo_id: int, collection_name: str) -> Dict[str, int]:
+        directory = self._repo_dir(collection_name, repo_id)
+        if not os.path.isdir(directory):
+            return {"points": 0, "bytes": 0}
+        index = self._index(collection_name, repo_id, create=False)
+        points = len(index) if index is not None else 0
+        with _indexes_lock:
+            index = _indexes.pop((os.getpid(), directory), None)
+            if index is not None:
+                index.close()
+        reclaimed = sum(
+            os.path.getsize(os.path.join(dirpath, filename))
+            for dirpath, _, filenames in os.walk(directory)
+            for filename in filenames
+        )
+        shutil.rmtree(directory, ignore_errors=True)
+        return {"points": points, "bytes": reclaimed}
+
+    def _store_items(self, repo_id: int, collection_name: str, items: Iterator[ChunkItem]) -> int:
+        index = self._index(collection_name, repo_id)
+        written = 0
+        for batch in _batched(items, self.WRITE_BATCH_SIZE):
+            vectors = self.embed_documents([chunk["code"] for _, chunk, _ in batch])
+            self._save_contents(batch)
+            index.write(
+                [point_id for _, _, point_id in batch],
+                vectors,
+                [self._chunk_payload(repo_id, file_path, chunk) for file_path, chunk, _ in batch],
+            )
+            written += len(batch)
+        return written
+
+    def _stored_positions(
+        self,
+        repo_id: int,
+        collection_name: str,
+        file_path: str,
+    ) -> Dict[Any, Dict[str, Any]]:
+        index = self._index(collection_name, repo_id, create=False)
+        return index.positions(file_path) if index is not None else {}
+
+    def _delete_points(self, repo_id: int, collection_name: str, point_ids: List[Any]) -> None:
+        self._index(collection_name, repo_id).delete(point_ids=[str(point_id) for point_id in point_ids])
+
+    def _set_positions(
+        self,
+        repo_id: int,
+        collection_name: str,
+        moved: List[Tuple[Any, Dict[str, Any]]],
+    ) -> None:
+        self._index(collection_name, repo_id).set_positions(moved)
+
+    def _collection_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _repo_dir(self, collection_name: str, repo_id: int) -> str:
+        return os.path.join(self._collection_dir(collection_name), f"repo_{repo_id}")
+
+    def _index(self, collection_name: str, repo_id: int, create: bool = True) -> Optional[RepoVectorIndex]:
+        directory = self._repo_dir(collection_name, repo_id)
+        key = (os.getpid(), directory)
+        index = _indexes.get(key)
+        if index is not None and not index.is_current():
+            # Another process deleted (and maybe recreated) the repo's
+            # directory; this handle still points at the removed files.
+            with _indexes_lock:
+                if _indexes.get(key) is index:
+                    _indexes.pop(key).close()
+            index = None
+        if index is None:
+            if not create and not os.path.isdir(directory):
+                return None
+            with _indexes_lock:
+                index = _indexes.get(key)
+                if index is None:
+                    index = _indexes[key] = RepoVectorIndex(directory)
+        return index
+
+    def _close_indexes(self, directory: str) -> None:
+        with _indexes_lock:
+            for key in [key for key in _indexes if key[1].startswith(directory + os.sep)]:
+                _indexes.pop(key).close()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import zlib
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.parse_cache import ParseCacheEntry
+from app.services.chunking import FileAnalysis, module_path_fields
+
+logger = logging.getLogger(__name__)
+
+# (git blob SHA, grammar)
+ParseKey = Tuple[str, str]
+
+
+class ParseCache:
+    """
+    FileAnalysis results keyed by git blob SHA, grammar and parser version,
+    zlib-compressed in the parse_cache table.
+
+    A blob SHA only depends on file content, so unchanged files and files
+    shared by forks are parsed once. Paths, and chunk fields derived from
+    them, are not part of the entry; they are filled in on the way out.
+    """
+
+    COMPRESSION_LEVEL = 6
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        parser_version: str,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.parser_version = parser_version
+        self.session_factory = session_factory
+
+    def get_many(self, files: Dict[str, ParseKey]) -> Dict[str, FileAnalysis]:
+        """
+        Cached analyses for ``files`` (path -> key), by path. Misses are
+        left out.
+        """
+        by_key: Dict[ParseKey, List[str]] = {}
+        for path, key in files.items():
+            by_key.setdefault(key, []).append(path)
+        if not by_key:
+            return {}
+
+        keys = list(by_key)
+        found: Dict[str, FileAnalysis] = {}
+        db = self.session_factory()
+        try:
+            for start in range(0, len(keys), self.LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + self.LOOKUP_BATCH_SIZE]
+                rows = (
+                    db.query(ParseCacheEntry.blob_sha, ParseCacheEntry.grammar, ParseCacheEntry.data)
+                    .filter(
+                        ParseCacheEntry.parser_version == self.parser_version,
+                        tuple_(ParseCacheEntry.blob_sha, ParseCacheEntry.grammar).in_(batch),
+                    )
+                    .all()
+                )
+                for blob_sha, grammar, data in rows:
+                    entry = json.loads(zlib.decompress(data))
+                    for path in by_key[(blob_sha, grammar)]:
+                        found[path] = _with_path(entry, path)
+        finally:
+            db.close()
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[ParseKey, FileAnalysis]]) -> int:
+        """Store analyses under their keys; returns how many rows were added."""
+        pending: Dict[ParseKey, FileAnalysis] = {}
+        for key, analysis in entries:
+            pending.setdefault(key, analysis)
+        if not pending:
+            return 0
+
+        rows = [self._row(key, analysis) for key, analysis in pending.items()]
+        db = self.session_factory()
+        try:
+            try:
+                db.add_all(rows)
+                db.commit()
+            except IntegrityError:
+                # Another worker cached some of the same blobs concurrently.
+                db.rollback()
+                for row in rows:
+                    db.merge(row)
+                db.commit()
+        finally:
+            db.close()
+        return len(rows)
+
+    def _row(self, key: ParseKey, analysis: FileAnalysis) -> ParseCacheEntry:
+        entry = asdict(analysis)
+        entry.pop("path")
+        for chunk in entry["chunks"]:
+            chunk.pop("file_path", None)
+            chunk.pop("imports", None)
+            if chunk["type"] == "module":
+                for field in module_path_fields(""):
+                    chunk.pop(field, None)
+        raw = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+        return ParseCacheEntry(
+            blob_sha=key[0],
+            grammar=key[1],
+            parser_version=self.parser_version,
+            data=zlib.compress(raw, self.COMPRESSION_LEVEL),
+            size=len(raw),
+        )
+
+
+def _with_path(entry: Dict, path: str) -> FileAnalysis:
+    analysis = FileAnalysis(path=path, **entry)
+    # Chunks share the file's import list, as in CodeChunkingService.
+    module_fields = module_path_fields(path)
+    analysis.chunks = [
+        dict(
+            chunk,
+            file_path=path,
+            imports=analysis.imports,
+            **(module_fields if chunk["type"] == "module" else {}),
+        )
+        for chunk in analysis.chunks
+    ]
+    return analysis
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA-1 git gives ``content`` as a blob (what ``git ls-tree`` prints)."""
+    header = f"blob {len(content)}\0".encode("ascii")
+    return hashlib.sha1(header + content).hexdigest()
+
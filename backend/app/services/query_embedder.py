@@ -0,0 +1,140 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.embeddings import EmbeddingService
+
+
+class QueryEmbeddingBatcher:
+    """
+    Coalesce query embeddings from concurrent requests into batched encodes.
+
+    Queries arriving within ``max_wait_ms`` of each other are embedded in one
+    forward pass (up to ``max_batch_size``), and an LRU cache in front of the
+    batcher answers repeated queries without touching the model at all.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[Sequence[str]], np.ndarray],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        cache_size: Optional[int] = None,
+    ) -> None:
+        self._embed_fn = embed_fn
+        self.max_batch_size = max_batch_size or settings.QUERY_EMBED_MAX_BATCH_SIZE
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None else settings.QUERY_EMBED_MAX_WAIT_MS
+        ) / 1000
+        self.cache_size = cache_size if cache_size is not None else settings.QUERY_EMBED_CACHE_SIZE
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # A single encoder thread: batches queue up behind each other instead of
+        # fighting over CPU cores, which also makes the next batch larger.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._counters = {"cache_hits": 0, "embedded": 0, "batches": 0, "max_batch": 0}
+
+    async def embed(self, query: str) -> np.ndarray:
+        if not query:
+            raise ValueError("query is required")
+
+        cached = self._cache_get(query)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._bind(loop)
+
+        future = self._inflight.get(query)
+        if future is None:
+            future = loop.create_future()
+            self._inflight[query] = future
+            self._pending.append((query, future))
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+
+        # Shield so one cancelled request does not cancel a shared result.
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._counters)
+        stats["cache_entries"] = len(self._cache)
+        stats["avg_batch"] = (
+            round(stats["embedded"] / stats["batches"], 2) if stats["batches"] else 0.0
+        )
+        return stats
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Pending futures belong to the previous loop and can never resolve.
+        self._loop = loop
+        self._pending = []
+        self._inflight = {}
+        self._timer = None
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        queries = [query for query, _ in batch]
+        try:
+            vectors = await self._loop.run_in_executor(self._executor, self._embed_fn, queries)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            self._counters["batches"] += 1
+            self._counters["embedded"] += len(batch)
+            self._counters["max_batch"] = max(self._counters["max_batch"], len(batch))
+            for (query, future), vector in zip(batch, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                vector.setflags(write=False)
+                self._cache_put(query, vector)
+                if not future.done():
+                    future.set_result(vector)
+        finally:
+            for query in queries:
+                self._inflight.pop(query, None)
+
+    def _cache_get(self, query: str) -> Optional[np.ndarray]:
+        vector = self._cache.get(query)
+        if vector is not None:
+            self._cache.move_to_end(query)
+            self._counters["cache_hits"] += 1
+        return vector
+
+    def _cache_put(self, query: str, vector: np.ndarray) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[query] = vector
+        self._cache.move_to_end(query)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+_query_embedder: Optional[QueryEmbeddingBatcher] = None
+
+
+def get_query_embedder() -> QueryEmbeddingBatcher:
+    global _query_embedder
+    if _query_embedder is None:
+        _query_embedder = QueryEmbeddingBatcher(
+            lambda texts: EmbeddingService().generate_embeddings(texts)
+        )
+    return _query_embedder
@@ -1,10 +1,12 @@
 import os
 from typing import Any, Dict, List
 
+from app.services.code_parser import EXTENSION_GRAMMARS
+
 
 class RepoFileService:
     def __init__(self) -> None:
-        self._extensions = {".py", ".js", ".ts"}
+        self._extensions = set(EXTENSION_GRAMMARS)
         self._ignore_dirs = {".git", "node_modules", "__pycache__"}
 
     def get_repo_file_tree(self, root_path: str) -> Dict[str, Any]:
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.content_store import content_hash, fill_contents
+from app.services.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+ScoreFn = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+
+class CrossEncoderReranker:
+    """
+    Rescore retrieved chunks with a small CPU cross-encoder.
+
+    Retrieval over-fetches candidates and the cross-encoder reads each
+    (query, chunk) pair jointly in one batch, which ranks far better than
+    cosine similarity, so fewer chunks need to reach the LLM. Pair scores
+    are cached by (query hash, chunk content hash). Reranking is skipped
+    when the uncached pairs are predicted to exceed the latency budget, and
+    the async variant falls back to retrieval order at the deadline.
+    """
+
+    # Weight of the newest sample in the per-pair latency estimate.
+    _LATENCY_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        budget_ms: Optional[float] = None,
+        cache_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        score_fn: Optional[ScoreFn] = None,
+    ) -> None:
+        self.model_name = model_name or settings.RERANK_MODEL
+        self.budget_ms = budget_ms if budget_ms is not None else settings.RERANK_BUDGET_MS
+        self.cache_size = cache_size if cache_size is not None else settings.RERANK_CACHE_SIZE
+        self.batch_size = batch_size or settings.RERANK_BATCH_SIZE
+        self._score_fn = score_fn or self._predict
+
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One scoring thread so concurrent requests queue instead of
+        # splitting the CPU; queueing time counts against the budget.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._ms_per_pair: Optional[float] = None
+        self._counters = {"reranked": 0, "skipped": 0, "timeouts": 0, "cache_hits": 0, "scored": 0}
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Best ``top_k`` of ``results`` by cross-encoder score.
+
+        Returned items are copies with a ``rerank_score``; when reranking is
+        skipped the first ``top_k`` results come back unchanged.
+        """
+        if len(results) <= 1:
+            return results[:top_k]
+
+        fill_contents(results)
+        query_key = self._query_key(query)
+        keys = [(query_key, self._chunk_key(item)) for item in results]
+        scores: List[Optional[float]] = self._cache_get(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            if self._over_budget(len(missing)):
+                self._counters["skipped"] += 1
+                return results[:top_k]
+
+            pairs = [(query, _chunk_text(results[i])) for i in missing]
+            start = time.perf_counter()
+            fresh = self._score_fn(pairs)
+            self._observe((time.perf_counter() - start) * 1000, len(pairs))
+            self._counters["scored"] += len(pairs)
+
+            for i, score in zip(missing, fresh):
+                scores[i] = float(score)
+            self._cache_put({keys[i]: scores[i] for i in missing})
+
+        self._counters["reranked"] += 1
+        order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)
+        return [{**results[i], "rerank_score": scores[i]} for i in order[:top_k]]
+
+    async def rerank_async(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self._executor, self.rerank, query, results, top_k)
+        try:
+            return await asyncio.wait_for(task, timeout=self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            # The scoring thread keeps running and still fills the cache.
+            self._counters["timeouts"] += 1
+            logger.info("Rerank exceeded %.0fms budget; using retrieval order", self.budget_ms)
+            return results[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._counters)
+        stats["cache_entries"] = len(self._cache)
+        stats["ms_per_pair"] = round(self._ms_per_pair, 3) if self._ms_per_pair is not None else None
+        return stats
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        model = model_registry.get(f"cross-encoder:{self.model_name}", self._load)
+        return model.predict(
+            pairs,
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+
+    def _load(self) -> Any:
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(self.model_name, device="cpu", max_length=settings.RERANK_MAX_LENGTH)
+
+    def _over_budget(self, pairs: int) -> bool:
+        # Unknown until the first batch; the async deadline covers that one.
+        if self._ms_per_pair is None:
+            return False
+        return pairs * self._ms_per_pair > self.budget_ms
+
+    def _observe(self, elapsed_ms: float, pairs: int) -> None:
+        sample = elapsed_ms / pairs
+        with self._lock:
+            if self._ms_per_pair is None:
+                self._ms_per_pair = sample
+            else:
+                alpha = self._LATENCY_SMOOTHING
+                self._ms_per_pair = alpha * sample + (1 - alpha) * self._ms_per_pair
+
+    def _query_key(self, query: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(query.strip().encode("utf-8"))
+        return digest.hexdigest()
+
+    def _chunk_key(self, item: Dict[str, Any]) -> str:
+        payload = item.get("payload") or {}
+        return payload.get("content_hash") or content_hash(payload.get("content") or "")
+
+    def _cache_get(self, keys: List[Tuple[str, str]]) -> List[Optional[float]]:
+        scores: List[Optional[float]] = []
+        with self._lock:
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    self._counters["cache_hits"] += 1
+                scores.append(score)
+        return scores
+
+    def _cache_put(self, entries: Dict[Tuple[str, str], float]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            for key, score in entries.items():
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def _chunk_text(item: Dict[str, Any]) -> str:
+    payload = item.get("payload") or {}
+    symbol = payload.get("symbol")
+    content = payload.get("content") or ""
+    header = f"{payload.get('path', '')} {symbol}" if symbol else payload.get("path", "")
+    return f"{header}\n{content}" if header else content
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+
+
+def get_reranker() -> CrossEncoderReranker:
+    global _reranker
+    if _reranker is None:
+        _reranker = CrossEncoderReranker()
+    return _reranker
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional
+
+
+class SearchResults(list):
+    """
+    Search hits in rank order, plus how many the score cutoff removed.
+    """
+
+    def __init__(self, results: List[Dict[str, Any]] = (), dropped: int = 0) -> None:
+        super().__init__(results)
+        self.dropped = dropped
+
+
+def elbow_threshold(scores: List[float], min_drop: float) -> Optional[float]:
+    """
+    Lowest score above the largest drop between consecutive scores.
+
+    Returns None when no drop reaches ``min_drop`` of the top score, i.e.
+    the scores fall off smoothly and there is no elbow to cut at. Only
+    relative gaps are used, so it works for fused rank scores as well as
+    cosine similarities.
+    """
+    ordered = sorted(scores, reverse=True)
+    if len(ordered) < 2 or ordered[0] <= 0:
+        return None
+    gaps = [ordered[i] - ordered[i + 1] for i in range(len(ordered) - 1)]
+    best = max(range(len(gaps)), key=gaps.__getitem__)
+    if gaps[best] < min_drop * ordered[0]:
+        return None
+    return ordered[best]
+
+
+def apply_cutoff(
+    results: List[Dict[str, Any]],
+    min_score: Optional[float] = None,
+    adaptive: bool = False,
+    min_drop: float = 0.25,
+    min_results: int = 1,
+) -> SearchResults:
+    """
+    Drop results below ``min_score`` and, when ``adaptive``, below the
+    elbow of the score curve. Order is preserved and at least
+    ``min_results`` of the best results are always kept.
+    """
+    threshold = min_score
+    if adaptive:
+        elbow = elbow_threshold([item["score"] for item in results], min_drop)
+        if elbow is not None:
+            threshold = elbow if threshold is None else max(threshold, elbow)
+    if threshold is None:
+        return SearchResults(results)
+
+    ranked = sorted(range(len(results)), key=lambda i: results[i]["score"], reverse=True)
+    keep = {i for i in ranked[:min_results]}
+    keep.update(i for i, item in enumerate(results) if item["score"] >= threshold)
+    kept = [item for i, item in enumerate(results) if i in keep]
+    return SearchResults(kept, dropped=len(results) - len(kept))
@@ -0,0 +1,69 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+import re
+import zlib
+
+from qdrant_client import models
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+# Boundaries inside an identifier: fooBar, HTTPServer, parse2json.
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+# BM25 term-frequency saturation. IDF is applied by Qdrant at query time
+# (Modifier.IDF), so stored weights only carry the per-document part.
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_DOC_TOKENS = 120
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Split source text into lowercase lexical terms.
+
+    Every identifier is kept whole and also broken into its camelCase and
+    snake_case parts, so ``parseFileTree`` matches ``parse_file_tree`` as
+    well as a query for "file tree".
+    """
+    tokens: List[str] = []
+    for identifier in _IDENTIFIER.findall(text):
+        whole = identifier.lower().strip("_")
+        if len(whole) < 2:
+            continue
+        tokens.append(whole)
+        parts = [
+            part.lower()
+            for piece in identifier.split("_")
+            for part in _CAMEL_BOUNDARY.split(piece)
+            if len(part) >= 2
+        ]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def term_index(term: str) -> int:
+    # Stable across processes, unlike hash(); collisions only add noise.
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def document_sparse_vector(text: str) -> models.SparseVector:
+    tokens = tokenize_code(text)
+    length_norm = 1 - BM25_B + BM25_B * len(tokens) / BM25_AVG_DOC_TOKENS
+    weights = {
+        term: tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+        for term, tf in Counter(tokens).items()
+    }
+    return _to_sparse(weights.items())
+
+
+def query_sparse_vector(text: str) -> models.SparseVector:
+    return _to_sparse((term, 1.0) for term in set(tokenize_code(text)))
+
+
+def _to_sparse(weights: Iterable) -> models.SparseVector:
+    merged: Dict[int, float] = {}
+    for term, weight in weights:
+        index = term_index(term)
+        merged[index] = merged.get(index, 0.0) + weight
+    indices = sorted(merged)
+    return models.SparseVector(indices=indices, values=[merged[i] for i in indices])
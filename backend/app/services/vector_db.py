@@ -1,50 +1,125 @@
-from typing import Any, Dict, List, Optional
-import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Type
+import asyncio
+import logging
+import threading
+import time
+import weakref
 
+import numpy as np
 from qdrant_client import QdrantClient, models
 
 from app.config import settings
-from app.services.embeddings import EmbeddingService
+from app.core.qdrant import get_async_qdrant_client, get_qdrant_client
+from app.services.collection_profiles import CollectionProfile, get_collection_profile
+from app.services.diversify import mmr_rerank, resolve_diversity
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.query_embedder import get_query_embedder
+from app.services.result_cutoff import SearchResults
+from app.services.sparse_vectors import document_sparse_vector, query_sparse_vector
+from app.services.vector_store import (
+    POSITION_FIELDS,
+    ChunkItem,
+    VectorStore,
+    _batched,
+    _validate_queries,
+)
 
+logger = logging.getLogger(__name__)
 
-class VectorDBService:
-    def __init__(self, url: Optional[str] = None) -> None:
+# Named vectors used by hybrid collections.
+DENSE_VECTOR = "dense"
+SPARSE_VECTOR = "lexical"
+
+# Keyword copy of repo_id indexed with is_tenant, so Qdrant co-locates each
+# repo's points and builds a per-repo HNSW graph.
+TENANT_FIELD = "tenant"
+
+# Aliases of repos that have their own collection, per client.
+_routes: "weakref.WeakKeyDictionary[Any, Tuple[float, Set[str]]]" = weakref.WeakKeyDictionary()
+_routes_lock = threading.Lock()
+
+
+class VectorDBService(VectorStore):
+    """Qdrant-backed vector store."""
+
+    name = "qdrant"
+
+    def __init__(self, url: Optional[str] = None, client: Optional[QdrantClient] = None) -> None:
+        super().__init__()
         self.url = url or settings.QDRANT_URL
-        self.client = QdrantClient(url=self.url)
-        self.embedding_service = EmbeddingService()
+        # Shared per process so requests reuse one connection pool.
+        self.client = client or get_qdrant_client(self.url)
+        self.profile: CollectionProfile = get_collection_profile(settings.QDRANT_COLLECTION_PROFILE)
+        self.hybrid = settings.QDRANT_HYBRID_SEARCH
 
     def create_collection(
         self,
         name: str,
-        vector_size: int = 1536,
+        vector_size: Optional[int] = None,
         distance: models.Distance = models.Distance.COSINE,
         recreate: bool = False,
+        profile: Optional[str] = None,
+        multitenant: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
         Create a Qdrant collection with vector + payload schema.
+
+        The vector size defaults to the active embedding model's dimension and
+        HNSW, quantization and storage settings come from the named collection
+        profile (QDRANT_COLLECTION_PROFILE by default). Multitenant
+        collections (QDRANT_TENANT_PARTITIONING by default) index the tenant
+        field and only build per-repo graphs.
         """
         if not name:
             raise ValueError("Collection name is required")
+        if multitenant is None:
+            multitenant = settings.QDRANT_TENANT_PARTITIONING
+
+        collection_profile = get_collection_profile(profile) if profile else self.profile
+        if vector_size is None:
+            vector_size = self.embedding_service.dimension
 
         if self._collection_exists(name):
             if not recreate:
                 return {"status": "exists", "collection": name}
             self.client.delete_collection(collection_name=name)
 
+        vectors_config = collection_profile.vectors_config(vector_size, distance)
+        sparse_vectors_config = None
+        if self.hybrid:
+            vectors_config = {DENSE_VECTOR: vectors_config}
+            sparse_vectors_config = {
+                SPARSE_VECTOR: models.SparseVectorParams(
+                    index=models.SparseIndexParams(on_disk=collection_profile.on_disk_vectors),
+                    modifier=models.Modifier.IDF,
+                )
+            }
+
         self.client.create_collection(
             collection_name=name,
-            vectors_config=models.VectorParams(size=vector_size, distance=distance),
+            vectors_config=vectors_config,
+            sparse_vectors_config=sparse_vectors_config,
+            hnsw_config=collection_profile.hnsw_config(multitenant),
+            quantization_config=collection_profile.quantization_config(),
+            optimizers_config=collection_profile.optimizers_config(),
+            on_disk_payload=collection_profile.on_disk_payload,
         )
 
-        payload_schema = {
+        payload_schema: Dict[str, Any] = {
             "repo_id": models.PayloadSchemaType.INTEGER,
             "path": models.PayloadSchemaType.KEYWORD,
             "language": models.PayloadSchemaType.KEYWORD,
             "doc_type": models.PayloadSchemaType.KEYWORD,
             "symbol": models.PayloadSchemaType.KEYWORD,
             "chunk_index": models.PayloadSchemaType.INTEGER,
-            "content": models.PayloadSchemaType.TEXT,
+            "content_hash": models.PayloadSchemaType.KEYWORD,
         }
+        if settings.QDRANT_TENANT_PARTITIONING:
+            payload_schema[TENANT_FIELD] = models.KeywordIndexParams(
+                type=models.KeywordIndexType.KEYWORD,
+                is_tenant=True,
+            )
 
         for field_name, field_type in payload_schema.items():
             try:
@@ -62,6 +137,9 @@ class VectorDBService:
             "collection": name,
             "vector_size": vector_size,
             "distance": distance.value,
+            "profile": collection_profile.name,
+            "hybrid": self.hybrid,
+            "multitenant": multitenant,
         }
 
     def search_code(
@@ -70,42 +148,294 @@ class VectorDBService:
         repo_id: int,
         collection_name: str,
         top_k: int = 5,
-    ) -> List[Dict[str, Any]]:
+        query_vector: Optional[Sequence[float]] = None,
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+        diversity: Optional[str] = None,
+        min_score: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ) -> SearchResults:
         if not query:
             raise ValueError("query is required")
         if top_k <= 0:
             raise ValueError("top_k must be positive")
+        mode = resolve_diversity(diversity, settings.RETRIEVAL_DIVERSITY)
 
-        vector = self.embedding_service.generate_embedding(query)
+        if query_vector is None:
+            vector = self.embedding_service.generate_embedding(query)
+        else:
+            vector = [float(value) for value in query_vector]
 
-        query_filter = models.Filter(
-            must=[
-                models.FieldCondition(
-                    key="repo_id",
-                    match=models.MatchValue(value=repo_id),
-                )
-            ]
+        collection_name = self.route(collection_name, repo_id)
+        method, request = self._search_call(
+            vector, repo_id, top_k, query, path, language, mode, self._min_score(min_score)
         )
 
         # Newer qdrant-client uses query_points; keep search for backward compatibility.
-        if hasattr(self.client, "search"):
+        if mode == "none" and not self.hybrid and hasattr(self.client, "search"):
             results = self.client.search(
                 collection_name=collection_name,
-                query_vector=vector,
-                limit=top_k,
+                query_vector=request["query"],
+                limit=request["limit"],
                 with_payload=True,
-                query_filter=query_filter,
+                query_filter=request["query_filter"],
+                search_params=request.get("search_params"),
             )
+            return self._cutoff(self._format_results(results), min_score, adaptive)
+
+        response = getattr(self.client, method)(collection_name=collection_name, **request)
+        return self._cutoff(
+            self._search_results(response, vector, query, top_k, mode),
+            min_score,
+            adaptive,
+            fused=self._fused(query),
+        )
+
+    async def search_code_async(
+        self,
+        query: str,
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+        diversity: Optional[str] = None,
+        min_score: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ) -> SearchResults:
+        """
+        Async variant of search_code for request handlers.
+
+        The query is embedded through the shared micro-batcher so concurrent
+        chat requests share forward passes, and the search goes through the
+        async Qdrant client instead of blocking the event loop.
+        """
+        if not query:
+            raise ValueError("query is required")
+        if top_k <= 0:
+            raise ValueError("top_k must be positive")
+        mode = resolve_diversity(diversity, settings.RETRIEVAL_DIVERSITY)
+
+        vector = [float(value) for value in await get_query_embedder().embed(query)]
+        client = get_async_qdrant_client(self.url)
+        method, request = self._search_call(
+            vector, repo_id, top_k, query, path, language, mode, self._min_score(min_score)
+        )
+        response = await getattr(client, method)(
+            collection_name=self.route(collection_name, repo_id), **request
+        )
+        return self._cutoff(
+            self._search_results(response, vector, query, top_k, mode),
+            min_score,
+            adaptive,
+            fused=self._fused(query),
+        )
+
+    def _search_call(
+        self,
+        vector: List[float],
+        repo_id: int,
+        top_k: int,
+        query: str,
+        path: Optional[str],
+        language: Optional[str],
+        mode: str,
+        min_score: Optional[float] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Client method and keyword arguments for one search in ``mode``.
+
+        "mmr" over-fetches candidates with their dense vectors for reranking
+        in _search_results. "group" uses Qdrant's grouped query on path, so
+        one file can fill at most RETRIEVAL_MAX_PER_FILE slots. Fused
+        searches with a ``min_score`` also fetch dense vectors, so the
+        threshold can be checked against cosine similarity.
+        """
+        if mode == "group":
+            request = self._query_request(vector, repo_id, top_k, query, path, language)
+            request.update(group_by="path", group_size=settings.RETRIEVAL_MAX_PER_FILE)
+            method = "query_points_groups"
+        elif mode == "mmr":
+            candidates = top_k * settings.RETRIEVAL_CANDIDATE_FACTOR
+            request = self._query_request(vector, repo_id, candidates, query, path, language)
+            request["with_vectors"] = [DENSE_VECTOR] if self.hybrid else True
+            return "query_points", request
         else:
-            response = self.client.query_points(
-                collection_name=collection_name,
-                query=vector,
-                limit=top_k,
-                with_payload=True,
-                query_filter=query_filter,
+            request = self._query_request(vector, repo_id, top_k, query, path, language)
+            method = "query_points"
+        if min_score is not None and self._fused(query):
+            request["with_vectors"] = [DENSE_VECTOR]
+        return method, request
+
+    def _search_results(
+        self,
+        response: Any,
+        vector: List[float],
+        query: str,
+        top_k: int,
+        mode: str,
+    ) -> List[Dict[str, Any]]:
+        if mode == "group":
+            points = [hit for group in response.groups for hit in group.hits]
+            points.sort(key=lambda hit: hit.score, reverse=True)
+            points = points[:top_k]
+        else:
+            points = getattr(response, "points", response)
+        results = self._format_results(points)
+        vectors = [
+            point.vector[DENSE_VECTOR] if isinstance(point.vector, dict) else point.vector
+            for point in points
+        ]
+        if self._fused(query) and points and all(v is not None for v in vectors):
+            # For _cutoff: min_score applies to cosine, not the RRF score.
+            similarities = _cosine(vector, vectors)
+            for result, similarity in zip(results, similarities):
+                result["dense_score"] = float(similarity)
+        if mode != "mmr":
+            return results
+        # Hybrid scores come from RRF, so the fused ranking stays the relevance term.
+        return mmr_rerank(
+            vector,
+            results,
+            vectors,
+            top_k,
+            settings.RETRIEVAL_MMR_LAMBDA,
+            fused=self._fused(query),
+        )
+
+    def _fused(self, query: str) -> bool:
+        # Mirrors _query_request: only hybrid queries with terms use RRF.
+        return self.hybrid and bool(query_sparse_vector(query).indices)
+
+    def _search_vectors(
+        self,
+        queries: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        repo_id: int,
+        collection_name: str,
+        top_k: int,
+    ) -> List[List[Dict[str, Any]]]:
+        # One round trip for every query instead of one per query.
+        responses = self.client.query_batch_points(
+            collection_name=self.route(collection_name, repo_id),
+            requests=self._batch_requests(queries, vectors, repo_id, top_k),
+        )
+        return [self._format_results(response.points) for response in responses]
+
+    async def search_many_async(
+        self,
+        queries: Sequence[str],
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+    ) -> List[List[Dict[str, Any]]]:
+        _validate_queries(queries, top_k)
+        if not queries:
+            return []
+        embedder = get_query_embedder()
+        vectors = await asyncio.gather(*(embedder.embed(query) for query in queries))
+        client = get_async_qdrant_client(self.url)
+        responses = await client.query_batch_points(
+            collection_name=self.route(collection_name, repo_id),
+            requests=self._batch_requests(queries, vectors, repo_id, top_k),
+        )
+        return [self._format_results(response.points) for response in responses]
+
+    def _batch_requests(
+        self,
+        queries: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        repo_id: int,
+        top_k: int,
+    ) -> List[models.QueryRequest]:
+        requests = []
+        for query, vector in zip(queries, vectors):
+            request = self._query_request([float(value) for value in vector], repo_id, top_k, query)
+            requests.append(
+                models.QueryRequest(
+                    query=request["query"],
+                    using=request.get("using"),
+                    prefetch=request.get("prefetch"),
+                    filter=request.get("query_filter"),
+                    params=request.get("search_params"),
+                    limit=request["limit"],
+                    with_payload=True,
+                )
             )
-            results = getattr(response, "points", response)
+        return requests
+
+    def _query_request(
+        self,
+        vector: List[float],
+        repo_id: int,
+        top_k: int,
+        query: str = "",
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Keyword arguments for query_points.
+
+        Hybrid collections run the dense and sparse searches as prefetches of
+        a single request and fuse the two rankings with reciprocal rank
+        fusion, so exact identifier matches surface even when the dense
+        similarity is mediocre.
+        """
+        conditions = {"path": path, "language": language}
+        query_filter = models.Filter(
+            must=[self._repo_condition(repo_id)]
+            + [
+                models.FieldCondition(key=key, match=models.MatchValue(value=value))
+                for key, value in conditions.items()
+                if value is not None
+            ]
+        )
+        search_params = self.profile.search_params()
+        if not self.hybrid:
+            request: Dict[str, Any] = {
+                "query": vector,
+                "limit": top_k,
+                "with_payload": True,
+                "query_filter": query_filter,
+            }
+            if search_params is not None:
+                request["search_params"] = search_params
+            return request
 
+        sparse = query_sparse_vector(query)
+        if not sparse.indices:
+            return {
+                "query": vector,
+                "using": DENSE_VECTOR,
+                "limit": top_k,
+                "with_payload": True,
+                "query_filter": query_filter,
+                "search_params": search_params,
+            }
+
+        prefetch_limit = max(top_k * settings.QDRANT_HYBRID_PREFETCH_FACTOR, 20)
+        return {
+            "prefetch": [
+                models.Prefetch(
+                    query=vector,
+                    using=DENSE_VECTOR,
+                    filter=query_filter,
+                    params=search_params,
+                    limit=prefetch_limit,
+                ),
+                models.Prefetch(
+                    query=sparse,
+                    using=SPARSE_VECTOR,
+                    filter=query_filter,
+                    limit=prefetch_limit,
+                ),
+            ],
+            "query": models.FusionQuery(fusion=models.Fusion.RRF),
+            "limit": top_k,
+            "with_payload": True,
+        }
+
+    def _format_results(self, results: Iterable[Any]) -> List[Dict[str, Any]]:
         return [
             {
                 "score": result.score,
@@ -121,47 +451,440 @@ class VectorDBService:
         collection_name: str,
         file_path: str,
         chunks: List[Dict[str, Any]],
+    ) -> Dict[str, int]:
+        return self.upsert_points(
+            self.route(collection_name, repo_id),
+            self.iter_chunk_points(repo_id, [(file_path, chunks)]),
+        )
+
+    def iter_chunk_points(
+        self,
+        repo_id: int,
+        files: Iterable[Tuple[str, List[Dict[str, Any]]]],
+        embed_batch_size: Optional[int] = None,
+    ) -> Iterator[models.PointStruct]:
+        """
+        Yield points for the chunks of many files.
+
+        Chunks are buffered across file boundaries so each encode call sees a
+        full batch even when most files only have a few chunks.
+        """
+
+        return self._iter_item_points(repo_id, self._file_items(repo_id, files), embed_batch_size)
+
+    def _store_items(self, repo_id: int, collection_name: str, items: Iterator[ChunkItem]) -> int:
+        return self.upsert_points(
+            self.route(collection_name, repo_id), self._iter_item_points(repo_id, items)
+        )["points"]
+
+    def _delete_points(self, repo_id: int, collection_name: str, point_ids: List[Any]) -> None:
+        self.client.delete(
+            collection_name=self.route(collection_name, repo_id),
+            points_selector=models.PointIdsList(points=point_ids),
+        )
+
+    def _set_positions(
+        self,
+        repo_id: int,
+        collection_name: str,
+        moved: List[Tuple[Any, Dict[str, Any]]],
     ) -> None:
-        if not chunks:
+        self.client.batch_update_points(
+            collection_name=self.route(collection_name, repo_id),
+            update_operations=[
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(payload=position, points=[point_id])
+                )
+                for point_id, position in moved
+            ],
+        )
+
+    def iter_repo_points(
+        self,
+        repo_id: int,
+        collection_name: str,
+        page_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        collection_name = self.route(collection_name, repo_id)
+        if not self._collection_exists(collection_name):
             return
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=self._any_repo_filter(repo_id),
+                limit=page_size,
+                offset=offset,
+                with_payload=["path", "chunk_index", "content_hash"],
+                with_vectors=False,
+            )
+            yield [
+                {
+                    "id": record.id,
+                    "path": (record.payload or {}).get("path"),
+                    "chunk_index": (record.payload or {}).get("chunk_index"),
+                    "content_hash": (record.payload or {}).get("content_hash"),
+                }
+                for record in records
+            ]
+            if offset is None:
+                return
 
-        points = []
-        for chunk in chunks:
-            content = chunk.get("code", "")
-            if not content:
+    def referenced_hashes(self, collection_name: str, hashes: Sequence[str]) -> Set[str]:
+        """Checks the shared collection and every dedicated repo collection."""
+        wanted = set(hashes)
+        prefix = f"{collection_name}_repo_"  # see dedicated_collection_name
+        collections = [collection_name] + sorted(
+            alias for alias in self._dedicated_aliases(refresh=True) if alias.startswith(prefix)
+        )
+        found: Set[str] = set()
+        for name in collections:
+            if not self._collection_exists(name):
                 continue
-            chunk_index = chunk.get("chunk_index", 0)
-            point_id = self._point_id(repo_id, file_path, chunk_index)
-            vector = self.embedding_service.generate_embedding(content)
-
-            payload = {
-                "repo_id": repo_id,
-                "path": file_path,
-                "language": chunk.get("language"),
-                "doc_type": chunk.get("type"),
-                "symbol": chunk.get("name"),
-                "chunk_index": chunk_index,
-                "content": content,
-            }
-            points.append(models.PointStruct(id=point_id, vector=vector, payload=payload))
+            offset = None
+            while wanted - found:
+                records, offset = self.client.scroll(
+                    collection_name=name,
+                    scroll_filter=models.Filter(
+                        must=[
+                            models.FieldCondition(
+                                key="content_hash", match=models.MatchAny(any=sorted(wanted - found))
+                            )
+                        ]
+                    ),
+                    limit=1000,
+                    offset=offset,
+                    with_payload=["content_hash"],
+                    with_vectors=False,
+                )
+                found.update((record.payload or {}).get("content_hash") for record in records)
+                if offset is None:
+                    break
+        return found & wanted
+
+    def _stored_positions(
+        self,
+        repo_id: int,
+        collection_name: str,
+        file_path: str,
+    ) -> Dict[Any, Dict[str, Any]]:
+        stored: Dict[Any, Dict[str, Any]] = {}
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.route(collection_name, repo_id),
+                scroll_filter=self._path_filter(repo_id, file_path),
+                limit=256,
+                offset=offset,
+                with_payload=list(POSITION_FIELDS),
+                with_vectors=False,
+            )
+            for record in records:
+                stored[record.id] = record.payload or {}
+            if offset is None:
+                return stored
+
+    def _iter_item_points(
+        self,
+        repo_id: int,
+        items: Iterator[ChunkItem],
+        embed_batch_size: Optional[int] = None,
+    ) -> Iterator[models.PointStruct]:
+        embed_batch_size = embed_batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+        for batch in _batched(items, embed_batch_size):
+            yield from self._build_points(repo_id, batch)
+
+    def upsert_points(
+        self,
+        collection_name: str,
+        points: Iterable[models.PointStruct],
+        batch_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        retries: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Stream points to Qdrant in fixed-size batches.
+
+        Up to ``max_in_flight`` batches are sent concurrently with
+        ``wait=False``. The final batch is held back and sent with
+        ``wait=True`` once every other batch has been acknowledged; Qdrant
+        applies updates in order, so its completion is a consistency barrier
+        for the whole stream.
+        """
+        batch_size = batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+        max_in_flight = max_in_flight or settings.QDRANT_UPSERT_MAX_IN_FLIGHT
+        retries = retries if retries is not None else settings.QDRANT_UPSERT_RETRIES
+
+        stats = {"points": 0, "batches": 0, "retries": 0}
+        in_flight: Set[Future] = set()
+        held_back: Optional[List[models.PointStruct]] = None
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            for batch in _batched(points, batch_size):
+                if held_back is not None:
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        stats["retries"] += sum(future.result() for future in done)
+                    in_flight.add(
+                        executor.submit(
+                            self._upsert_batch, collection_name, held_back, False, retries
+                        )
+                    )
+                held_back = batch
+                stats["points"] += len(batch)
+                stats["batches"] += 1
+
+            stats["retries"] += sum(future.result() for future in in_flight)
 
-        if points:
-            self.client.upsert(collection_name=collection_name, points=points)
+        if held_back is not None:
+            stats["retries"] += self._upsert_batch(collection_name, held_back, True, retries)
+        return stats
+
+    def _upsert_batch(
+        self,
+        collection_name: str,
+        points: List[models.PointStruct],
+        wait_result: bool,
+        retries: int,
+    ) -> int:
+        for attempt in range(retries + 1):
+            try:
+                self.client.upsert(
+                    collection_name=collection_name,
+                    points=points,
+                    wait=wait_result,
+                )
+                return attempt
+            except Exception as exc:
+                if attempt >= retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(
+                    "Qdrant upsert of %s points failed (%s); retrying in %.1fs",
+                    len(points),
+                    exc,
+                    delay,
+                )
+                time.sleep(delay)
+        return retries
+
+    def _build_points(
+        self,
+        repo_id: int,
+        items: List[ChunkItem],
+    ) -> List[models.PointStruct]:
+        vectors = self.embed_documents([chunk["code"] for _, chunk, _ in items])
+        self._save_contents(items)
+
+        points = []
+        for (file_path, chunk, point_id), vector in zip(items, vectors):
+            payload = self._chunk_payload(repo_id, file_path, chunk)
+            if settings.QDRANT_TENANT_PARTITIONING:
+                payload[TENANT_FIELD] = tenant_key(repo_id)
+            if self.hybrid:
+                point_vector: Any = {
+                    DENSE_VECTOR: vector.tolist(),
+                    SPARSE_VECTOR: document_sparse_vector(chunk["code"]),
+                }
+            else:
+                point_vector = vector.tolist()
+            points.append(models.PointStruct(id=point_id, vector=point_vector, payload=payload))
+        return points
 
     def delete_by_path(self, repo_id: int, collection_name: str, file_path: str) -> None:
         self.client.delete(
-            collection_name=collection_name,
-            points_selector=models.Filter(
-                must=[
-                    models.FieldCondition(key="repo_id", match=models.MatchValue(value=repo_id)),
-                    models.FieldCondition(key="path", match=models.MatchValue(value=file_path)),
+            collection_name=self.route(collection_name, repo_id),
+            points_selector=self._path_filter(repo_id, file_path),
+        )
+
+    def delete_repo(self, repo_id: int, collection_name: str) -> Dict[str, int]:
+        """
+        Remove every point of ``repo_id``, including its own collection if
+        it was promoted out of the shared one.
+        """
+        points = 0
+        reclaimed = 0
+        alias = dedicated_collection_name(collection_name, repo_id)
+        if alias in self._dedicated_aliases(refresh=True):
+            dedicated = self.client.count(collection_name=alias, exact=True).count
+            vector_size = self._vector_size(alias)
+            self.client.update_collection_aliases(
+                change_aliases_operations=[
+                    models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias))
                 ]
-            ),
+            )
+            self.client.delete_collection(collection_name=f"{alias}_data")
+            self._dedicated_aliases(refresh=True)
+            points += dedicated
+            reclaimed += self.profile.estimate_memory_bytes(dedicated, vector_size)["total"]
+
+        if not self._collection_exists(collection_name):
+            return {"points": points, "bytes": reclaimed}
+
+        repo_filter = self._any_repo_filter(repo_id)
+        shared = self.client.count(
+            collection_name=collection_name, count_filter=repo_filter, exact=True
+        ).count
+        if shared:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=repo_filter),
+                wait=True,
+            )
+            points += shared
+            reclaimed += self.profile.estimate_memory_bytes(
+                shared, self._vector_size(collection_name)
+            )["total"]
+        return {"points": points, "bytes": reclaimed}
+
+    def _path_filter(self, repo_id: int, file_path: str) -> models.Filter:
+        return models.Filter(
+            must=[
+                self._repo_condition(repo_id),
+                models.FieldCondition(key="path", match=models.MatchValue(value=file_path)),
+            ]
+        )
+
+    def _any_repo_filter(self, repo_id: int) -> models.Filter:
+        # Match on repo_id too so points indexed before tenant backfill count.
+        return models.Filter(
+            should=[
+                self._repo_condition(repo_id),
+                models.FieldCondition(key="repo_id", match=models.MatchValue(value=repo_id)),
+            ]
+        )
+
+    def _repo_condition(self, repo_id: int) -> models.FieldCondition:
+        if settings.QDRANT_TENANT_PARTITIONING:
+            return models.FieldCondition(
+                key=TENANT_FIELD, match=models.MatchValue(value=tenant_key(repo_id))
+            )
+        return models.FieldCondition(key="repo_id", match=models.MatchValue(value=repo_id))
+
+    # Repo routing and partition migration.
+
+    def route(self, collection_name: str, repo_id: int) -> str:
+        """
+        Collection that holds ``repo_id``'s points.
+
+        A repo moved out of the shared collection is reached through an alias
+        named after it, so callers keep passing the shared collection name.
+        The alias list is cached per client for QDRANT_ROUTING_CACHE_SECONDS.
+        """
+        alias = dedicated_collection_name(collection_name, repo_id)
+        return alias if alias in self._dedicated_aliases() else collection_name
+
+    def _dedicated_aliases(self, refresh: bool = False) -> Set[str]:
+        now = time.monotonic()
+        cached = _routes.get(self.client)
+        if cached is not None and cached[0] > now and not refresh:
+            return cached[1]
+        with _routes_lock:
+            try:
+                response = self.client.get_aliases()
+                aliases = {alias.alias_name for alias in response.aliases}
+            except AttributeError:
+                # Test doubles without alias support never route.
+                aliases = set()
+            _routes[self.client] = (now + settings.QDRANT_ROUTING_CACHE_SECONDS, aliases)
+        return aliases
+
+    def backfill_tenants(self, collection_name: str, batch_size: int = 1000) -> int:
+        """
+        Add the tenant field to points indexed before partitioning.
+        """
+        updated = 0
+        missing = models.Filter(
+            must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=TENANT_FIELD))]
+        )
+        while True:
+            # Updated points drop out of the filter, so always read page one.
+            records, _ = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=missing,
+                limit=batch_size,
+                with_payload=["repo_id"],
+                with_vectors=False,
+            )
+            by_repo: Dict[int, List[Any]] = {}
+            for record in records:
+                repo_id = (record.payload or {}).get("repo_id")
+                if repo_id is not None:
+                    by_repo.setdefault(repo_id, []).append(record.id)
+            if not by_repo:
+                return updated
+            self.client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=[
+                    models.SetPayloadOperation(
+                        set_payload=models.SetPayload(
+                            payload={TENANT_FIELD: tenant_key(repo_id)},
+                            points=point_ids,
+                        )
+                    )
+                    for repo_id, point_ids in by_repo.items()
+                ],
+            )
+            updated += sum(len(point_ids) for point_ids in by_repo.values())
+
+    def repo_point_counts(self, collection_name: str, limit: int = 100_000) -> Dict[int, int]:
+        response = self.client.facet(
+            collection_name=collection_name, key=TENANT_FIELD, limit=limit, exact=True
+        )
+        return {int(hit.value): hit.count for hit in response.hits}
+
+    def promote_repo(self, repo_id: int, collection_name: str, batch_size: int = 256) -> int:
+        """
+        Move a repo's points from the shared collection into its own.
+
+        Points are copied into a new collection first and the routing alias
+        is created last, so searches keep hitting the complete shared copy
+        until the switch. The shared copy is deleted afterwards.
+        """
+        alias = dedicated_collection_name(collection_name, repo_id)
+        if alias in self._dedicated_aliases(refresh=True):
+            return 0
+        target = f"{alias}_data"
+        self.create_collection(
+            target,
+            vector_size=self._vector_size(collection_name),
+            recreate=True,
+            multitenant=False,
         )
 
-    def _point_id(self, repo_id: int, file_path: str, chunk_index: int) -> int:
-        checksum = zlib.crc32(f"{file_path}:{chunk_index}".encode("utf-8")) % 1_000_000
-        return repo_id * 1_000_000 + checksum
+        repo_filter = models.Filter(must=[self._repo_condition(repo_id)])
+
+        def records() -> Iterator[models.PointStruct]:
+            offset = None
+            while True:
+                page, offset = self.client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=repo_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                for record in page:
+                    yield models.PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+                if offset is None:
+                    return
+
+        moved = self.upsert_points(target, records(), batch_size=batch_size)["points"]
+        self.client.update_collection_aliases(
+            change_aliases_operations=[
+                models.CreateAliasOperation(
+                    create_alias=models.CreateAlias(collection_name=target, alias_name=alias)
+                )
+            ]
+        )
+        self._dedicated_aliases(refresh=True)
+        self.client.delete(collection_name=collection_name, points_selector=repo_filter)
+        return moved
+
+    def _vector_size(self, collection_name: str) -> int:
+        vectors = self.client.get_collection(collection_name).config.params.vectors
+        return (vectors[DENSE_VECTOR] if isinstance(vectors, dict) else vectors).size
 
     def _collection_exists(self, name: str) -> bool:
         try:
@@ -169,3 +892,36 @@ class VectorDBService:
         except AttributeError:
             collections = self.client.get_collections()
             return any(col.name == name for col in collections.collections)
+
+
+def tenant_key(repo_id: int) -> str:
+    return str(repo_id)
+
+
+def dedicated_collection_name(collection_name: str, repo_id: int) -> str:
+    return f"{collection_name}_repo_{repo_id}"
+
+
+def _cosine(query: Sequence[float], vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    query_array = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_array)
+    return matrix @ query_array / np.where(norms > 0, norms, 1.0)
+
+
+VECTOR_STORES: Dict[str, Type[VectorStore]] = {
+    store.name: store for store in (VectorDBService, NumpyVectorStore)
+}
+
+
+def get_vector_store() -> VectorStore:
+    """
+    Build the vector store selected by VECTOR_STORE_BACKEND.
+    """
+    store_cls = VECTOR_STORES.get(settings.VECTOR_STORE_BACKEND)
+    if store_cls is None:
+        raise ValueError(
+            f"Unknown vector store backend '{settings.VECTOR_STORE_BACKEND}'. "
+            f"Expected one of: {', '.join(sorted(VECTOR_STORES))}"
+        )
+    return store_cls()
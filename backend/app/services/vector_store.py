@@ -0,0 +1,513 @@
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import asyncio
+import uuid
+
+import numpy as np
+from qdrant_client import models
+
+from app.config import settings
+from app.services.content_store import ContentStore, content_hash
+from app.services.embedding_cache import EmbeddingCache, get_embedding_cache
+from app.services.embeddings import EmbeddingService
+from app.services.query_embedder import get_query_embedder
+from app.services.result_cutoff import SearchResults, apply_cutoff
+
+_POINT_NAMESPACE = uuid.UUID("6f1c2b7e-3d4a-5b8c-9e0f-1a2b3c4d5e6f")
+
+# (file path, chunk, point id) waiting to be embedded and stored.
+ChunkItem = Tuple[str, Dict[str, Any], str]
+
+# Payload fields that locate a chunk in its file. They can change while the
+# chunk text, and so its point ID, stays the same.
+POSITION_FIELDS = ("chunk_index", "start_byte", "end_byte", "parent")
+
+
+class VectorStore:
+    """
+    Storage and similarity search for embedded code chunks.
+
+    Subclasses provide the storage primitives; embedding, point IDs, payload
+    layout and the incremental file sync are shared so every backend indexes
+    a repository the same way.
+    """
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self.embedding_service = EmbeddingService()
+        self.embedding_cache: Optional[EmbeddingCache] = (
+            get_embedding_cache(self.embedding_service.model_id)
+            if settings.EMBEDDING_CACHE_ENABLED
+            else None
+        )
+        self.content_store: Optional[ContentStore] = (
+            ContentStore() if settings.CONTENT_STORE_ENABLED else None
+        )
+
+    def create_collection(
+        self,
+        name: str,
+        vector_size: Optional[int] = None,
+        distance: models.Distance = models.Distance.COSINE,
+        recreate: bool = False,
+        profile: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def search_code(
+        self,
+        query: str,
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+        query_vector: Optional[Sequence[float]] = None,
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+        diversity: Optional[str] = None,
+        min_score: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ) -> SearchResults:
+        """
+        Up to ``top_k`` chunks of ``repo_id`` for ``query``.
+
+        ``diversity`` ("none", "mmr" or "group", RETRIEVAL_DIVERSITY by
+        default) trades a little relevance for fewer overlapping chunks.
+        ``min_score`` and ``adaptive`` (RETRIEVAL_MIN_SCORE and
+        RETRIEVAL_ADAPTIVE_CUTOFF by default) drop weak hits; the returned
+        list's ``dropped`` says how many.
+        """
+        raise NotImplementedError
+
+    async def search_code_async(
+        self,
+        query: str,
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+        path: Optional[str] = None,
+        language: Optional[str] = None,
+        diversity: Optional[str] = None,
+        min_score: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ) -> SearchResults:
+        """
+        Async variant of search_code for request handlers.
+
+        The query is embedded through the shared micro-batcher so concurrent
+        chat requests share forward passes.
+        """
+        if not query:
+            raise ValueError("query is required")
+        vector = await get_query_embedder().embed(query)
+        return self.search_code(
+            query,
+            repo_id,
+            collection_name,
+            top_k,
+            query_vector=vector,
+            path=path,
+            language=language,
+            diversity=diversity,
+            min_score=min_score,
+            adaptive=adaptive,
+        )
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches against one repo; results are in query order.
+
+        All queries are embedded in a single batch.
+        """
+        _validate_queries(queries, top_k)
+        if not queries:
+            return []
+        vectors = self.embedding_service.generate_embeddings(list(queries))
+        return self._search_vectors(queries, vectors, repo_id, collection_name, top_k)
+
+    async def search_many_async(
+        self,
+        queries: Sequence[str],
+        repo_id: int,
+        collection_name: str,
+        top_k: int = 5,
+    ) -> List[List[Dict[str, Any]]]:
+        _validate_queries(queries, top_k)
+        if not queries:
+            return []
+        # Concurrent embeds are coalesced into one forward pass by the batcher.
+        embedder = get_query_embedder()
+        vectors = await asyncio.gather(*(embedder.embed(query) for query in queries))
+        return self._search_vectors(queries, vectors, repo_id, collection_name, top_k)
+
+    def _search_vectors(
+        self,
+        queries: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        repo_id: int,
+        collection_name: str,
+        top_k: int,
+    ) -> List[List[Dict[str, Any]]]:
+        return [
+            self.search_code(query, repo_id, collection_name, top_k, query_vector=vector)
+            for query, vector in zip(queries, vectors)
+        ]
+
+    def _cutoff(
+        self,
+        results: List[Dict[str, Any]],
+        min_score: Optional[float],
+        adaptive: Optional[bool],
+        fused: bool = False,
+    ) -> SearchResults:
+        """
+        Apply the score cutoff. ``fused`` results carry rank-fusion scores,
+        so ``min_score`` is checked against the cosine similarity each hit
+        carries as ``dense_score`` instead; the elbow works on either.
+        """
+        min_score = self._min_score(min_score)
+        if adaptive is None:
+            adaptive = settings.RETRIEVAL_ADAPTIVE_CUTOFF
+        dropped = 0
+        if fused:
+            dense_scores = [item.pop("dense_score", None) for item in results]
+            if min_score is not None and None not in dense_scores:
+                kept = [item for item, score in zip(results, dense_scores) if score >= min_score]
+                # Like apply_cutoff, always keep the best result.
+                kept = kept or results[:1]
+                dropped = len(results) - len(kept)
+                results = kept
+        cut = apply_cutoff(
+            results,
+            min_score=None if fused else min_score,
+            adaptive=adaptive,
+            min_drop=settings.RETRIEVAL_ELBOW_MIN_DROP,
+        )
+        cut.dropped += dropped
+        return cut
+
+    @staticmethod
+    def _min_score(min_score: Optional[float]) -> Optional[float]:
+        if min_score is None:
+            return settings.RETRIEVAL_MIN_SCORE or None
+        return min_score
+
+    def upsert_code_chunks(
+        self,
+        repo_id: int,
+        collection_name: str,
+        file_path: str,
+        chunks: List[Dict[str, Any]],
+    ) -> Dict[str, int]:
+        items = self._file_items(repo_id, [(file_path, chunks)])
+        return {"points": self._store_items(repo_id, collection_name, items)}
+
+    def delete_by_path(self, repo_id: int, collection_name: str, file_path: str) -> None:
+        raise NotImplementedError
+
+    def delete_repo(self, repo_id: int, collection_name: str) -> Dict[str, int]:
+        """
+        Remove every point of ``repo_id``.
+
+        Returns the number of points removed and an estimate of the bytes
+        reclaimed.
+        """
+        raise NotImplementedError
+
+    def sync_files(
+        self,
+        repo_id: int,
+        collection_name: str,
+        files: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    ) -> Dict[str, int]:
+        """
+        Bring the stored points of each file in line with its current chunks.
+
+        Point IDs derive from chunk content, so unchanged chunks keep their ID
+        and are left in place: only new chunks are embedded and upserted, and
+        only vanished ones are deleted. Kept points whose position in the
+        file changed (POSITION_FIELDS) get their payload updated.
+        """
+        stats = {"upserted": 0, "deleted": 0, "unchanged": 0, "moved": 0}
+        new_items: List[ChunkItem] = []
+
+        for file_path, chunks in files:
+            chunks = [chunk for chunk in chunks if chunk.get("code")]
+            point_ids = self._chunk_point_ids(repo_id, file_path, chunks)
+            stored = self._stored_positions(repo_id, collection_name, file_path)
+
+            current = set(point_ids)
+            vanished = [point_id for point_id in stored if point_id not in current]
+            moved = []
+            new_count = 0
+            for chunk, point_id in zip(chunks, point_ids):
+                if point_id not in stored:
+                    new_items.append((file_path, chunk, point_id))
+                    new_count += 1
+                else:
+                    position = _chunk_position(chunk)
+                    if any(stored[point_id].get(key) != value for key, value in position.items()):
+                        moved.append((point_id, position))
+
+            if vanished:
+                self._delete_points(repo_id, collection_name, vanished)
+            if moved:
+                # Same content at a new position: fix the payload, keep the vector.
+                self._set_positions(repo_id, collection_name, moved)
+
+            stats["deleted"] += len(vanished)
+            stats["moved"] += len(moved)
+            stats["unchanged"] += len(chunks) - new_count - len(moved)
+
+        if new_items:
+            stats["upserted"] = self._store_items(repo_id, collection_name, iter(new_items))
+        return stats
+
+    def collect_orphans(
+        self,
+        repo_id: int,
+        collection_name: str,
+        known_paths: Set[str],
+        dry_run: bool = False,
+        page_size: int = 1000,
+        sample_size: int = 20,
+        recheck: Optional[Callable[[Set[str]], Set[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Check a repo's points against the files it is known to have.
+
+        Points whose path is not in ``known_paths`` are orphans left by
+        missed webhooks or failed deletes and are removed in bulk unless
+        ``dry_run``. ``known_paths`` is read before the scan, so ``recheck``
+        is given the orphan paths after it and returns those that are still
+        unknown; points of files added during the scan are kept. Chunk text
+        that only deleted orphans referenced goes with them.
+        Known files without points and stale chunk versions (legacy integer
+        IDs, or several points in one chunk slot) are only reported; the
+        next sync of those files replaces them.
+        """
+        orphans: List[Tuple[Any, str, Optional[str]]] = []
+        orphan_paths: Set[str] = set()
+        indexed_paths: Set[str] = set()
+        slots: Dict[Tuple[str, Any], int] = {}
+        scanned = 0
+        legacy = 0
+
+        for page in self.iter_repo_points(repo_id, collection_name, page_size):
+            for point in page:
+                scanned += 1
+                path = point["path"]
+                if path not in known_paths:
+                    orphans.append((point["id"], path, point.get("content_hash")))
+                    orphan_paths.add(path)
+                    continue
+                indexed_paths.add(path)
+                slots[(path, point["chunk_index"])] = slots.get((path, point["chunk_index"]), 0) + 1
+                if not isinstance(point["id"], str):
+                    legacy += 1
+
+        if recheck is not None and orphan_paths:
+            orphan_paths = recheck(orphan_paths)
+        orphans = [orphan for orphan in orphans if orphan[1] in orphan_paths]
+
+        deleted = 0
+        if not dry_run:
+            for batch in _batched((point_id for point_id, _, _ in orphans), page_size):
+                self._delete_points(repo_id, collection_name, batch)
+                deleted += len(batch)
+        contents = {"rows": 0, "bytes": 0}
+        if deleted:
+            contents = self.collect_contents(collection_name, {digest for _, _, digest in orphans if digest})
+
+        missing = sorted(known_paths - indexed_paths)
+        stale_paths = sorted({path for (path, _), count in slots.items() if count > 1})
+        return {
+            "scanned": scanned,
+            "orphans": len(orphans),
+            "deleted": deleted,
+            "orphan_paths": sorted(orphan_paths, key=str)[:sample_size],
+            "missing_files": len(missing),
+            "missing_paths": missing[:sample_size],
+            "stale_chunks": sum(count - 1 for count in slots.values() if count > 1),
+            "stale_paths": stale_paths[:sample_size],
+            "legacy_ids": legacy,
+            "contents": contents,
+            "dry_run": dry_run,
+        }
+
+    def repo_content_hashes(self, repo_id: int, collection_name: str) -> Set[str]:
+        """Content hashes referenced by ``repo_id``'s points."""
+        return {
+            point["content_hash"]
+            for page in self.iter_repo_points(repo_id, collection_name)
+            for point in page
+            if point.get("content_hash")
+        }
+
+    def collect_contents(
+        self,
+        collection_name: str,
+        hashes: Optional[Iterable[str]] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Delete chunk text that no point in ``collection_name`` references.
+
+        chunk_contents is shared by every repo, so each hash is checked
+        against the whole collection; only ``hashes`` are checked when given.
+        """
+        if self.content_store is None:
+            return {"rows": 0, "bytes": 0}
+        return self.content_store.delete_unreferenced(
+            lambda batch: self.referenced_hashes(collection_name, batch),
+            hashes=hashes,
+            dry_run=dry_run,
+        )
+
+    # Storage primitives.
+
+    def iter_repo_points(
+        self,
+        repo_id: int,
+        collection_name: str,
+        page_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield pages of ``{"id", "path", "chunk_index", "content_hash"}`` for
+        every point of a repo.
+        """
+        raise NotImplementedError
+
+    def referenced_hashes(self, collection_name: str, hashes: Sequence[str]) -> Set[str]:
+        """Which of ``hashes`` some point of any repo still references."""
+        raise NotImplementedError
+
+    def _store_items(self, repo_id: int, collection_name: str, items: Iterator[ChunkItem]) -> int:
+        """Embed and write ``items``; return the number of points written."""
+        raise NotImplementedError
+
+    def _stored_positions(
+        self,
+        repo_id: int,
+        collection_name: str,
+        file_path: str,
+    ) -> Dict[Any, Dict[str, Any]]:
+        """Map point ID to its stored POSITION_FIELDS for one file."""
+        raise NotImplementedError
+
+    def _delete_points(self, repo_id: int, collection_name: str, point_ids: List[Any]) -> None:
+        raise NotImplementedError
+
+    def _set_positions(
+        self,
+        repo_id: int,
+        collection_name: str,
+        moved: List[Tuple[Any, Dict[str, Any]]],
+    ) -> None:
+        raise NotImplementedError
+
+    # Shared helpers.
+
+    def _file_items(
+        self,
+        repo_id: int,
+        files: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    ) -> Iterator[ChunkItem]:
+        for file_path, chunks in files:
+            chunks = [chunk for chunk in chunks if chunk.get("code")]
+            point_ids = self._chunk_point_ids(repo_id, file_path, chunks)
+            for chunk, point_id in zip(chunks, point_ids):
+                yield file_path, chunk, point_id
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed chunk texts, reusing cached vectors for content seen before.
+        """
+        if self.embedding_cache is None or not texts:
+            return self.embedding_service.generate_embeddings(texts)
+
+        cached = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            # One batched encode for every miss instead of one pass per chunk.
+            fresh = self.embedding_service.generate_embeddings([texts[i] for i in missing])
+            self.embedding_cache.put_many([texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh):
+                cached[i] = vector
+
+        return np.ascontiguousarray(np.vstack(cached), dtype=np.float32)
+
+    def _chunk_payload(self, repo_id: int, file_path: str, chunk: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {
+            "repo_id": repo_id,
+            "path": file_path,
+            "language": chunk.get("language"),
+            "doc_type": chunk.get("type"),
+            "symbol": chunk.get("name"),
+            "content_hash": content_hash(chunk["code"]),
+        }
+        payload.update(_chunk_position(chunk))
+        if payload["parent"] is None:
+            del payload["parent"]
+        if self.content_store is None:
+            payload["content"] = chunk["code"]
+        return payload
+
+    def _save_contents(self, items: Sequence[ChunkItem]) -> None:
+        """Store the text of ``items`` before their points reference it."""
+        if self.content_store is not None:
+            self.content_store.put_many([chunk["code"] for _, chunk, _ in items])
+
+    def _chunk_point_ids(
+        self,
+        repo_id: int,
+        file_path: str,
+        chunks: List[Dict[str, Any]],
+    ) -> List[str]:
+        """
+        Deterministic UUIDs from repo, path and chunk content.
+
+        Identical chunks within one file are told apart by their occurrence
+        number, so duplicates never overwrite each other.
+        """
+        seen: Dict[str, int] = {}
+        point_ids = []
+        for chunk in chunks:
+            digest = content_hash(chunk["code"])
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+            point_ids.append(
+                str(uuid.uuid5(_POINT_NAMESPACE, f"{repo_id}:{file_path}:{digest}:{occurrence}"))
+            )
+        return point_ids
+
+
+def _chunk_position(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "chunk_index": chunk.get("chunk_index", 0),
+        "start_byte": chunk.get("start_byte"),
+        "end_byte": chunk.get("end_byte"),
+        "parent": chunk.get("parent") or None,
+    }
+
+
+def _validate_queries(queries: Sequence[str], top_k: int) -> None:
+    if any(not query for query in queries):
+        raise ValueError("query is required")
+    if top_k <= 0:
+        raise ValueError("top_k must be positive")
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
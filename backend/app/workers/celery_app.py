@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from app.config import settings
 
 celery_app = Celery(
@@ -14,4 +15,27 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     include=["app.workers.tasks"],
+    beat_schedule={
+        "gc-orphaned-vectors": {
+            "task": "app.workers.tasks.gc_orphaned_vectors",
+            "schedule": settings.VECTOR_GC_INTERVAL_SECONDS,
+        },
+    },
 )
+
+
+@worker_init.connect
+def _preload_models_before_fork(**kwargs) -> None:
+    # Runs in the parent before the prefork pool starts.
+    if settings.EMBEDDING_PRELOAD:
+        from app.services.embeddings import preload_embedding_model
+
+        preload_embedding_model()
+
+
+@worker_process_init.connect
+def _load_models_in_worker(**kwargs) -> None:
+    # No-op when the parent already preloaded; the registry is inherited.
+    from app.services.embeddings import preload_embedding_model
+
+    preload_embedding_model()
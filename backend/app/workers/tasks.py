@@ -1,21 +1,34 @@
+import logging
 import os
 import shutil
 import subprocess
 import httpx
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
 
+import redis
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
 from app.core.database import SessionLocal
+from app.models.chat import ChatMessage, ChatSession
+from app.models.documentation import DocType, Documentation
 from app.models.repository import Repository
 from app.models.repository_cache import RepositoryCache
 from app.models.repository_file import RepositoryFile
 from app.models.user import User
-from app.services.code_parser import CodeParserService
-from app.services.chunking import CodeChunkingService
+from app.services.cache import CacheService
+from app.services.code_parser import EXTENSION_GRAMMARS
+from app.services.chunking import CodeChunkingService, FileAnalysis
+from app.services.parse_cache import ParseCache, git_blob_sha
 from app.services.repo_file_tree import RepoFileService
 from app.services.documentation import generate_readme, generate_api_docs
 from app.workers.celery_app import celery_app
-from app.services.vector_db import VectorDBService
+from app.services.vector_db import get_vector_store
+
+logger = logging.getLogger(__name__)
 
 @celery_app.task
 def generate_documentation(repository_id: int):
@@ -35,6 +48,8 @@ def analyze_repository(repository_id: int) -> Dict[str, Any]:
         repo = db.query(Repository).filter(Repository.id == repository_id).first()
         if not repo:
             return {"status": "not_found", "repository_id": repository_id}
+        if not _lock_active_repository(db, repo.id):
+            return _inactive_result(repository_id)
 
         # Persist status so UI can track progress without polling logs.
         _upsert_cache(db, repo.id, "analysis_status", _status_payload("running"))
@@ -57,17 +72,23 @@ def analyze_repository(repository_id: int) -> Dict[str, Any]:
         file_tree = file_service.get_repo_file_tree(clone_path)
         files = _collect_files(clone_path)
 
-        parser = CodeParserService()
-        parsed_files: List[Dict[str, Any]] = []
+        # Unchanged files (and files shared with forks) come from the parse
+        # cache by blob SHA and are neither read nor parsed.
+        blob_shas = _blob_shas(clone_path)
+        entries: List[Tuple[str, str, str, Callable[[], bytes]]] = []
         for file_path in files:
             rel_path = os.path.relpath(file_path, clone_path).replace(os.sep, "/")
-            ext = os.path.splitext(file_path)[1].lower()
-            with open(file_path, "rb") as handle:
-                content = handle.read()
-
-            parsed_files.append(
-                _parse_file(parser, rel_path, ext, content)
-            )
+            grammar = EXTENSION_GRAMMARS[os.path.splitext(file_path)[1].lower()]
+            read = partial(_read_file, file_path)
+            blob_sha = blob_shas.get(rel_path)
+            if blob_sha is None:
+                content = read()
+                blob_sha = git_blob_sha(content)
+                read = partial(bytes, content)
+            entries.append((rel_path, grammar, blob_sha, read))
+
+        analyses, parse_cache_stats = _analyze_files(CodeChunkingService(), entries)
+        parsed_files = [_file_summary(analyses[path]) for path, _, _, _ in entries]
 
         # Cache the structured analysis for README/API generation.
         analysis_payload = {
@@ -79,15 +100,21 @@ def analyze_repository(repository_id: int) -> Dict[str, Any]:
                 "python_files": sum(1 for item in parsed_files if item["language"] == "python"),
                 "js_files": sum(1 for item in parsed_files if item["language"] == "javascript"),
                 "ts_files": sum(1 for item in parsed_files if item["language"] == "typescript"),
+                "parse_cache": parse_cache_stats,
             },
         }
 
-        _upsert_cache(db, repo.id, "analysis", analysis_payload)
+        # The repo may have been deleted while it was cloned and parsed.
+        if not _lock_active_repository(db, repo.id):
+            return _inactive_result(repository_id)
+        _upsert_cache(db, repo.id, "analysis", analysis_payload, commit=False)
         _upsert_cache(db, repo.id, "analysis_status", _status_payload("completed"))
 
-        return {"status": "completed", "repository_id": repo.id}
+        return {"status": "completed", "repository_id": repo.id, "parse_cache": parse_cache_stats}
     except Exception as exc:
-        _upsert_cache(db, repository_id, "analysis_status", _status_payload("failed", error=str(exc)))
+        db.rollback()
+        if _lock_active_repository(db, repository_id):
+            _upsert_cache(db, repository_id, "analysis_status", _status_payload("failed", error=str(exc)))
         raise
     finally:
         _cleanup_clone_path(repository_id)
@@ -120,15 +147,17 @@ def analyze_changed_files(
         repo = db.query(Repository).filter(Repository.id == repository_id).first()
         if not repo:
             return {"status": "not_found", "repository_id": repository_id}
+        if not repo.is_active:
+            return _inactive_result(repository_id)
 
         user = db.query(User).filter(User.id == repo.user_id).first()
         if not user or not user.github_access_token:
             return {"status": "failed", "error": "GitHub token missing"}
 
         collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
-        vector_service = VectorDBService()
+        vector_service = get_vector_store()
+        vector_service.create_collection(collection_name)
         chunking_service = CodeChunkingService()
-        parser = CodeParserService()
 
         changed_files = _filter_code_files(list(set(added + modified)))
         removed_files = _filter_code_files(removed)
@@ -141,44 +170,32 @@ def analyze_changed_files(
                 RepositoryFile.path == path,
             ).delete()
 
-        # Re-parse only changed files to keep indexing fast.
+        # Re-parse only changed files to keep indexing fast; reverted or
+        # copied files can still come from the parse cache.
+        entries: List[Tuple[str, str, str, Callable[[], bytes]]] = []
         for path in changed_files:
             content = _fetch_github_file(repo.full_name, path, user.github_access_token)
             if content is None:
                 continue
+            grammar = EXTENSION_GRAMMARS[os.path.splitext(path)[1].lower()]
+            entries.append((path, grammar, git_blob_sha(content), partial(bytes, content)))
+        analyses, parse_cache_stats = _analyze_files(chunking_service, entries)
 
-            ext = os.path.splitext(path)[1].lower()
-            if ext == ".py":
-                tree = parser.parse_python_file(content)
-                functions = parser.extract_functions(tree, content)
-                classes = parser.extract_classes(tree, content)
-                chunks = chunking_service.chunk_python_file(content, path)
-                language = "python"
-            else:
-                functions = []
-                classes = []
-                chunks = [
-                    {
-                        "type": "file",
-                        "name": os.path.basename(path),
-                        "signature": os.path.basename(path),
-                        "file_path": path,
-                        "imports": [],
-                        "language": "javascript" if ext == ".js" else "typescript",
-                        "code": content.decode("utf-8", errors="ignore"),
-                        "chunk_index": 0,
-                        "start_byte": 0,
-                        "end_byte": len(content),
-                    }
-                ]
-                language = "javascript" if ext == ".js" else "typescript"
+        # Fetching can take a while; the repo may have been deleted since.
+        # The row lock keeps it active until these rows are committed.
+        if not _lock_active_repository(db, repo.id):
+            return _inactive_result(repository_id)
 
-            vector_service.delete_by_path(repo.id, collection_name, path)
-            vector_service.upsert_code_chunks(repo.id, collection_name, path, chunks)
+        indexed_files: List[Tuple[str, List[Dict[str, Any]]]] = []
+        for path, _, _, _ in entries:
+            analysis = analyses[path]
+            language = analysis.language
+
+            indexed_files.append((path, analysis.chunks))
 
             payload = {
-                "functions": functions,
-                "classes": classes,
+                "functions": analysis.functions,
+                "classes": analysis.classes,
             }
 
             entry = db.query(RepositoryFile).filter(
@@ -198,23 +215,234 @@ def analyze_changed_files(
                 entry.language = language
                 entry.payload = payload
 
+        # File rows land before their points; the orphan collector re-reads
+        # repository_files before deleting, so these points are never taken
+        # for orphans even if its scan started before this commit.
+        db.commit()
+
+        # Diff each file against its stored points so an edit only touches
+        # the chunks that changed; new chunks go through one bulk upload.
+        sync_stats = vector_service.sync_files(repo.id, collection_name, indexed_files)
+
+        # A purge that started during the sync may have run before these
+        # points were written; is_active is cleared before it is queued.
+        if not _lock_active_repository(db, repo.id):
+            vector_service.delete_repo(repo.id, collection_name)
+            return _inactive_result(repository_id)
         db.commit()
         if changed_files:
             generate_docs.delay(repo.id, "api")
 
-        return {
+        result = {
             "status": "completed",
             "repository_id": repo.id,
             "changed_files": len(changed_files),
             "removed_files": len(removed_files),
+            "vector_sync": sync_stats,
+            "parse_cache": parse_cache_stats,
         }
+        if vector_service.embedding_cache is not None:
+            result["embedding_cache"] = vector_service.embedding_cache.stats()
+        result["embedding_windows"] = dict(vector_service.embedding_service.window_stats)
+        return result
+    finally:
+        db.close()
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=settings.PURGE_MAX_RETRIES,
+)
+def purge_repository(self, repository_id: int) -> Dict[str, Any]:
+    """
+    Delete everything stored for a repository that was marked inactive.
+
+    Vectors go first so search stops returning the repo, then the chunk
+    text no other repo shares, then the SQL rows in batches of
+    PURGE_BATCH_SIZE (one transaction each), then the Redis keys. Progress
+    is published as task state after every step. Every step can be re-run,
+    so a failed purge is retried with backoff and picks up where it stopped.
+    """
+    db = SessionLocal()
+    report: Dict[str, Any] = {"repository_id": repository_id, "rows": {}, "bytes": {}}
+
+    def progress(stage: str) -> None:
+        report["stage"] = stage
+        if self.request.id:
+            self.update_state(state="PROGRESS", meta=report)
+
+    try:
+        repo = db.query(Repository).filter(Repository.id == repository_id).first()
+        if not repo:
+            return {"status": "not_found", "repository_id": repository_id}
+        if repo.is_active:
+            return {"status": "skipped", "repository_id": repository_id, "reason": "repository is active"}
+        user_id = repo.user_id
+
+        collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
+        vector_store = get_vector_store()
+        hashes = vector_store.repo_content_hashes(repo.id, collection_name)
+        vectors = vector_store.delete_repo(repo.id, collection_name)
+        report["points"] = vectors["points"]
+        report["bytes"]["vectors"] = vectors["bytes"]
+        progress("vectors")
+
+        # Chunk text is shared with other repos; only drop what no point
+        # references any more.
+        contents = vector_store.collect_contents(collection_name, hashes)
+        report["rows"]["chunk_contents"] = contents["rows"]
+        report["bytes"]["chunk_contents"] = contents["bytes"]
+        progress("chunk_contents")
+
+        session_ids = [
+            session_id
+            for (session_id,) in db.query(ChatSession.id).filter(ChatSession.repository_id == repo.id)
+        ]
+        repo_sessions = select(ChatSession.id).where(ChatSession.repository_id == repo.id)
+        tables: List[Tuple[str, Any, Any, Any]] = [
+            ("chat_messages", ChatMessage, ChatMessage.session_id.in_(repo_sessions), ChatMessage.content),
+            ("chat_sessions", ChatSession, ChatSession.repository_id == repo.id, None),
+            ("repository_files", RepositoryFile, RepositoryFile.repository_id == repo.id, RepositoryFile.payload),
+            ("repository_cache", RepositoryCache, RepositoryCache.repository_id == repo.id, RepositoryCache.payload),
+            ("documentation", Documentation, Documentation.repository_id == repo.id, Documentation.content),
+            ("repositories", Repository, Repository.id == repo.id, None),
+        ]
+        for name, model, condition, size_column in tables:
+            report["rows"][name] = report["bytes"][name] = 0
+            for rows, reclaimed in _delete_in_batches(db, model, condition, size_column):
+                report["rows"][name] = rows
+                report["bytes"][name] = reclaimed
+                progress(name)
+
+        keys = [f"user:{user_id}:repos:list", f"user:{user_id}:repos:{repository_id}"]
+        keys += [f"repo:{repository_id}:docs:{doc_type.value}" for doc_type in DocType]
+        keys += [f"chat:session:{session_id}:history" for session_id in session_ids]
+        try:
+            report["redis_keys"] = CacheService().delete_many(keys)
+        except redis.RedisError as exc:
+            # Everything left behind expires with CACHE_TTL_SECONDS.
+            logger.warning("Could not clear cache keys of repository %s: %s", repository_id, exc)
+            report["redis_keys"] = 0
+        report["bytes"]["total"] = sum(report["bytes"].values())
+        report["status"] = "completed"
+        report.pop("stage", None)
+        return report
     finally:
         db.close()
 
 
+@celery_app.task
+def gc_orphaned_vectors(repository_id: int | None = None, dry_run: bool | None = None) -> Dict[str, Any]:
+    """
+    Delete vectors whose file no longer exists in repository_files.
+
+    Runs from Celery beat over every active repository, or over one when
+    ``repository_id`` is given. Repos without any file rows are skipped
+    rather than wiped. A run over every repository then sweeps the
+    chunk_contents rows no point references any more.
+    """
+    if dry_run is None:
+        dry_run = settings.VECTOR_GC_DRY_RUN
+    db = SessionLocal()
+    try:
+        repos = db.query(Repository.id).filter(Repository.is_active.is_(True))
+        if repository_id is not None:
+            repos = repos.filter(Repository.id == repository_id)
+        repo_ids = [repo_id for (repo_id,) in repos.order_by(Repository.id)]
+
+        collection_name = os.getenv("QDRANT_COLLECTION", "docubot_code")
+        vector_service = get_vector_store()
+        report: Dict[str, Any] = {
+            "status": "completed",
+            "dry_run": dry_run,
+            "orphans": 0,
+            "deleted": 0,
+            "missing_files": 0,
+            "stale_chunks": 0,
+            "repositories": {},
+            "skipped": [],
+        }
+        for repo_id in repo_ids:
+            known_paths = _known_paths(db, repo_id)
+            if not known_paths:
+                report["skipped"].append(repo_id)
+                continue
+            stats = vector_service.collect_orphans(
+                repo_id,
+                collection_name,
+                known_paths,
+                dry_run=dry_run,
+                page_size=settings.VECTOR_GC_PAGE_SIZE,
+                recheck=lambda paths, repo_id=repo_id: paths - _known_paths(db, repo_id, paths),
+            )
+            for key in ("orphans", "deleted", "missing_files", "stale_chunks"):
+                report[key] += stats[key]
+            if stats["orphans"] or stats["missing_files"] or stats["stale_chunks"]:
+                report["repositories"][repo_id] = stats
+        if repository_id is None:
+            report["contents"] = vector_service.collect_contents(collection_name, dry_run=dry_run)
+
+        logger.info(
+            "Vector GC%s: %s orphans (%s deleted), %s missing files, %s stale chunks",
+            " (dry run)" if dry_run else "",
+            report["orphans"],
+            report["deleted"],
+            report["missing_files"],
+            report["stale_chunks"],
+        )
+        return report
+    finally:
+        db.close()
+
+
+def _known_paths(db, repository_id: int, paths: Set[str] | None = None) -> Set[str]:
+    """File paths of a repository, or which of ``paths`` it has."""
+    query = db.query(RepositoryFile.path).filter(RepositoryFile.repository_id == repository_id)
+    if paths is not None:
+        query = query.filter(RepositoryFile.path.in_(sorted(paths)))
+    known = {path for (path,) in query}
+    # End the read transaction so the next call sees rows committed since.
+    db.commit()
+    return known
+
+
+def _delete_in_batches(db, model: Any, condition: Any, size_column: Any) -> Iterator[Tuple[int, int]]:
+    """
+    Delete the rows matching ``condition`` in primary-key batches.
+
+    Yields running totals of deleted rows and of the stored size of
+    ``size_column``, which is what the delete reclaims once the table is
+    vacuumed.
+    """
+    rows = 0
+    reclaimed = 0
+    while True:
+        ids = [
+            row_id
+            for (row_id,) in db.query(model.id)
+            .filter(condition)
+            .order_by(model.id)
+            .limit(settings.PURGE_BATCH_SIZE)
+        ]
+        if not ids:
+            return
+        if size_column is not None:
+            reclaimed += int(
+                db.query(func.coalesce(func.sum(func.length(cast(size_column, Text))), 0))
+                .filter(model.id.in_(ids))
+                .scalar()
+            )
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        rows += len(ids)
+        yield rows, reclaimed
+
+
 def _filter_code_files(paths: List[str]) -> List[str]:
-    allowed = {".py", ".js", ".ts"}
-    return [path for path in paths if os.path.splitext(path)[1].lower() in allowed]
+    return [path for path in paths if os.path.splitext(path)[1].lower() in EXTENSION_GRAMMARS]
 
 
 def _fetch_github_file(full_name: str, path: str, token: str) -> bytes | None:
@@ -258,7 +486,6 @@ def _clone_repo(full_name: str, token: str, clone_path: str) -> None:
 
 
 def _collect_files(root_path: str) -> List[str]:
-    allowed_extensions = {".py", ".js", ".ts"}
     ignored_dirs = {".git", "node_modules", "__pycache__"}
     results: List[str] = []
 
@@ -266,35 +493,90 @@ def _collect_files(root_path: str) -> List[str]:
         dirnames[:] = [d for d in dirnames if d not in ignored_dirs]
         for filename in filenames:
             ext = os.path.splitext(filename)[1].lower()
-            if ext in allowed_extensions:
+            if ext in EXTENSION_GRAMMARS:
                 results.append(os.path.join(dirpath, filename))
     return results
 
 
-def _parse_file(
-    parser: CodeParserService,
-    rel_path: str,
-    ext: str,
-    content: bytes,
-) -> Dict[str, Any]:
-    if ext == ".py":
-        tree = parser.parse_python_file(content)
-        functions = parser.extract_functions(tree, content)
-        classes = parser.extract_classes(tree, content)
-        return {
-            "path": rel_path,
-            "language": "python",
-            "functions": functions,
-            "classes": classes,
-        }
-    if ext == ".js":
-        return {"path": rel_path, "language": "javascript"}
-    if ext == ".ts":
-        return {"path": rel_path, "language": "typescript"}
-    return {"path": rel_path, "language": "unknown"}
+def _blob_shas(clone_path: str) -> Dict[str, str]:
+    """
+    Git blob SHA of every regular file at HEAD, by repo-relative path.
+    Empty when git cannot list the tree; callers then hash the content.
+    """
+    try:
+        listing = subprocess.run(
+            ["git", "-C", clone_path, "ls-tree", "-r", "-z", "HEAD"],
+            check=True,
+            capture_output=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as exc:
+        logger.warning("Could not list blobs in %s: %s", clone_path, exc)
+        return {}
+
+    shas: Dict[str, str] = {}
+    for record in listing.decode("utf-8", errors="surrogateescape").split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        mode, kind, sha = meta.split(" ")
+        # Symlink blobs hash the link target, not the file contents.
+        if kind == "blob" and mode != "120000":
+            shas[path] = sha
+    return shas
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def _analyze_files(
+    chunking_service: CodeChunkingService,
+    entries: List[Tuple[str, str, str, Callable[[], bytes]]],
+) -> Tuple[Dict[str, FileAnalysis], Dict[str, int]]:
+    """
+    Analyze ``(path, grammar, blob SHA, read)`` entries, taking files from
+    the parse cache when the same blob was analyzed by this parser version.
+    ``read`` is only called on a miss. Returns analyses by path and the
+    cache hit/miss counts.
+    """
+    cache = ParseCache(chunking_service.version) if settings.PARSE_CACHE_ENABLED else None
+    keys = {path: (blob_sha, grammar) for path, grammar, blob_sha, _ in entries}
+    analyses: Dict[str, FileAnalysis] = {}
+    if cache is not None:
+        try:
+            analyses = cache.get_many(keys)
+        except SQLAlchemyError as exc:
+            logger.warning("Parse cache lookup failed: %s", exc)
+            cache = None
+
+    fresh: List[Tuple[Tuple[str, str], FileAnalysis]] = []
+    for path, grammar, _, read in entries:
+        if path in analyses:
+            continue
+        analyses[path] = chunking_service.analyze_file(read(), path, grammar)
+        fresh.append((keys[path], analyses[path]))
+
+    if cache is not None and fresh:
+        try:
+            cache.put_many(fresh)
+        except SQLAlchemyError as exc:
+            logger.warning("Could not store parse results: %s", exc)
+    return analyses, {"hits": len(entries) - len(fresh), "misses": len(fresh)}
+
+
+def _file_summary(analysis: FileAnalysis) -> Dict[str, Any]:
+    return {
+        "path": analysis.path,
+        "language": analysis.language,
+        "functions": analysis.functions,
+        "classes": analysis.classes,
+    }
 
 
-def _upsert_cache(db, repository_id: int, cache_type: str, payload: Dict[str, Any]) -> None:
+def _upsert_cache(
+    db, repository_id: int, cache_type: str, payload: Dict[str, Any], commit: bool = True
+) -> None:
     entry = db.query(RepositoryCache).filter(
         RepositoryCache.repository_id == repository_id,
         RepositoryCache.cache_type == cache_type,
@@ -310,10 +592,33 @@ def _upsert_cache(db, repository_id: int, cache_type: str, payload: Dict[str, An
     else:
         entry.payload = payload
 
+    if not commit:
+        db.flush()
+        return
     db.commit()
     db.refresh(entry)
 
 
+def _lock_active_repository(db, repository_id: int) -> bool:
+    """
+    Whether the repository still exists and is active, read with a row lock
+    held until the next commit. The DELETE endpoint's is_active update waits
+    on that lock, so rows written before the commit are seen by
+    purge_repository.
+    """
+    active = (
+        db.query(Repository.is_active)
+        .filter(Repository.id == repository_id)
+        .with_for_update()
+        .scalar()
+    )
+    return bool(active)
+
+
+def _inactive_result(repository_id: int) -> Dict[str, Any]:
+    return {"status": "skipped", "repository_id": repository_id, "reason": "repository is inactive"}
+
+
 def _status_payload(status: str, error: str | None = None) -> Dict[str, Any]:
     payload = {
         "status": status,
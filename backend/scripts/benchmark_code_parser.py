@@ -0,0 +1,187 @@
+"""
+Compare the query-driven extractors of CodeParserService with the
+Python-level tree walkers they replaced.
+
+Generates a large synthetic Python module and TypeScript module, checks
+that the implementations return the same functions, classes and imports,
+then times the walkers, the three separate query extractors and the
+single-pass extract_outline. Queries are compiled once when code_parser is
+imported; the walkers visit every named node from Python.
+
+Usage:
+    python scripts/benchmark_code_parser.py [classes] [rounds]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.code_parser import CodeParserService  # noqa: E402
+
+
+def python_source(classes: int) -> bytes:
+    parts = ["import os\nfrom typing import Any, Dict\n"]
+    for i in range(classes):
+        parts.append(
+            f'''
+
+class Service{i}(Base):
+    """Service number {i}."""
+
+    name = "service-{i}"
+
+    def run(self, payload: Dict[str, Any]) -> int:
+        """Run it."""
+        total = 0
+        for key, value in payload.items():
+            if key.startswith("x"):
+                total += len(str(value))
+        return total
+
+    @property
+    def label(self) -> str:
+        return self.name.upper()
+
+
+def helper_{i}(value, *args, **kwargs):
+    """Helper {i}."""
+    def inner(x):
+        return x * 2
+    return [inner(v) for v in args if v is not None] + [value]
+'''
+        )
+    return "".join(parts).encode()
+
+
+def typescript_source(classes: int) -> bytes:
+    parts = ['import { api } from "./api";\n']
+    for i in range(classes):
+        parts.append(
+            f"""
+/** Store number {i}. */
+export class Store{i} extends Base {{
+  count: number = 0;
+
+  /** Adds an item. */
+  add(item: Item): void {{
+    if (item.id > 0) {{
+      this.items.push(item);
+    }}
+    this.count += 1;
+  }}
+}}
+
+/** Loads item {i}. */
+export async function load{i}(id: string): Promise<Item> {{
+  const result = await api.get(`/items/${{id}}`);
+  return result.data.map((row: Row) => row.value);
+}}
+
+export const format{i} = (value: string) => value.trim().toLowerCase();
+"""
+        )
+    return "".join(parts).encode()
+
+
+# The pre-query implementations: full Python-level walks of the tree.
+def walk_functions(parser, tree, content):
+    functions = []
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        kind, definition, name = parser.resolve_definition(node, content)
+        if kind == "function":
+            functions.append(parser.function_data(node, definition, name, content))
+        stack.extend(definition.named_children)
+    return functions
+
+
+def walk_classes(parser, tree, content):
+    classes = []
+    for node in tree.root_node.named_children:
+        kind, definition, name = parser.resolve_definition(node, content)
+        if kind == "class":
+            classes.append(parser.class_data(node, definition, name, content))
+    return classes
+
+
+def walk_imports(parser, tree, content):
+    imports = []
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type in {"import_statement", "import_from_statement"}:
+            imports.append(content[node.start_byte:node.end_byte].decode("utf-8"))
+        stack.extend(node.named_children)
+    return imports
+
+
+def walkers(parser, tree, content):
+    return (
+        walk_functions(parser, tree, content),
+        walk_classes(parser, tree, content),
+        walk_imports(parser, tree, content),
+    )
+
+
+def queries(parser, tree, content):
+    return (
+        parser.extract_functions(tree, content),
+        parser.extract_classes(tree, content),
+        parser.extract_imports(tree, content),
+    )
+
+
+def outline(parser, tree, content):
+    result = parser.extract_outline(tree, content)
+    return result["functions"], result["classes"], result["imports"]
+
+
+def same_results(left, right) -> bool:
+    def key(item):
+        return repr(sorted(item.items()))
+
+    return all(
+        sorted(map(key, a) if a and isinstance(a[0], dict) else a)
+        == sorted(map(key, b) if b and isinstance(b[0], dict) else b)
+        for a, b in zip(left, right)
+    )
+
+
+def time_ms(run, parser, tree, content, rounds: int) -> float:
+    run(parser, tree, content)  # warm up
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run(parser, tree, content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    classes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    parser = CodeParserService()
+
+    for grammar, content in (
+        ("python", python_source(classes)),
+        ("typescript", typescript_source(classes)),
+    ):
+        tree = parser.parse_file(content, grammar)
+        expected = walkers(parser, tree, content)
+        for run in (queries, outline):
+            if not same_results(expected, run(parser, tree, content)):
+                sys.exit(f"{run.__name__} results differ from the walkers for {grammar}")
+
+        walk = time_ms(walkers, parser, tree, content, rounds)
+        print(f"[*] {grammar}: {len(content) / 1024:.0f} KiB, {tree.root_node.descendant_count} nodes")
+        print(f"    walkers {walk:8.1f} ms")
+        for run in (queries, outline):
+            elapsed = time_ms(run, parser, tree, content, rounds)
+            print(f"    {run.__name__:<7} {elapsed:8.1f} ms  ({walk / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare per-item and batched embedding throughput.
+
+Usage:
+    python scripts/benchmark_embeddings.py [num_chunks] [batch_size]
+"""
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to allow importing app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embeddings import EmbeddingService
+
+
+def build_chunks(count: int) -> list[str]:
+    # Mix short helpers with long class bodies, like a real repository.
+    rng = random.Random(42)
+    chunks = []
+    for i in range(count):
+        lines = rng.choice([2, 5, 10, 40])
+        body = "\n".join(f"    value_{i}_{j} = compute_{j}(value_{i}_{j - 1})" for j in range(lines))
+        chunks.append(f"def function_{i}(value_{i}_-1):\n{body}\n    return value_{i}_{lines - 1}")
+    return chunks
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    service = EmbeddingService(batch_size=batch_size)
+    chunks = build_chunks(count)
+    service.generate_embeddings(chunks[:8])  # warm up
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        service.generate_embedding(chunk)
+    per_item = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service.generate_embeddings(chunks)
+    batched = time.perf_counter() - start
+
+    print(f"[*] {count} chunks, batch_size={service.batch_size}")
+    print(f"    per-item: {count / per_item:8.1f} chunks/sec ({per_item:.2f}s)")
+    print(f"    batched:  {count / batched:8.1f} chunks/sec ({batched:.2f}s)")
+    print(f"    speedup:  {per_item / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare per-file CPU time of the old multi-pass indexing path with
+CodeChunkingService.analyze_file.
+
+The old path parsed each file for extract_functions/extract_classes, each
+walking the tree, and then chunked it with a second parse. analyze_file
+parses once and collects everything in one walk. Both are timed with
+process CPU time over the same files.
+
+Usage:
+    python scripts/benchmark_file_analysis.py [source_dir] [rounds]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.chunking import CodeChunkingService  # noqa: E402
+from app.services.code_parser import EXTENSION_GRAMMARS  # noqa: E402
+
+
+def load_files(root: str) -> list[tuple[str, str, bytes]]:
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in {".git", "node_modules", "__pycache__"}]
+        for filename in sorted(filenames):
+            grammar = EXTENSION_GRAMMARS.get(os.path.splitext(filename)[1].lower())
+            if grammar is None:
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as handle:
+                files.append((path, grammar, handle.read()))
+    return files
+
+
+def multi_pass(service: CodeChunkingService, path: str, grammar: str, content: bytes) -> None:
+    # The calls analyze_changed_files used to make; chunk_file parses again.
+    tree = service.parser.parse_file(content, grammar)
+    service.parser.extract_functions(tree, content)
+    service.parser.extract_classes(tree, content)
+    service.chunk_file(content, path, grammar)
+
+
+def single_pass(service: CodeChunkingService, path: str, grammar: str, content: bytes) -> None:
+    service.analyze_file(content, path, grammar)
+
+
+def time_per_file(run, service, files, rounds: int) -> list[float]:
+    for path, grammar, content in files:
+        run(service, path, grammar, content)  # warm up
+    totals = []
+    for _ in range(rounds):
+        start = time.process_time()
+        for path, grammar, content in files:
+            run(service, path, grammar, content)
+        totals.append((time.process_time() - start) * 1000 / len(files))
+    return totals
+
+
+def main() -> None:
+    default_root = os.path.join(os.path.dirname(__file__), "..", "app")
+    root = sys.argv[1] if len(sys.argv) > 1 else default_root
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    files = load_files(root)
+    if not files:
+        sys.exit(f"No source files under {root}")
+
+    service = CodeChunkingService()
+    size = sum(len(content) for _, _, content in files)
+    print(f"[*] {len(files)} files, {size / 1024:.0f} KiB, {rounds} rounds, mode={service.mode}")
+
+    old = statistics.median(time_per_file(multi_pass, service, files, rounds))
+    new = statistics.median(time_per_file(single_pass, service, files, rounds))
+    print(f"    multi-pass   {old:7.3f} ms/file")
+    print(f"    analyze_file {new:7.3f} ms/file  ({(1 - new / old) * 100:.0f}% less CPU)")
+
+
+if __name__ == "__main__":
+    main()
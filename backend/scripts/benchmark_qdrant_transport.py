@@ -0,0 +1,79 @@
+"""
+Compare Qdrant search latency over HTTP and gRPC against a local instance.
+
+Usage:
+    python scripts/benchmark_qdrant_transport.py [qdrant_url] [num_queries]
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+COLLECTION = "transport_benchmark"
+DIMENSION = 384
+NUM_POINTS = 20_000
+
+
+def seed(client: QdrantClient, rng: np.random.Generator) -> None:
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=DIMENSION, distance=models.Distance.COSINE),
+    )
+    client.create_payload_index(COLLECTION, "repo_id", models.PayloadSchemaType.INTEGER)
+    for start in range(0, NUM_POINTS, 1000):
+        vectors = rng.standard_normal((1000, DIMENSION), dtype=np.float32)
+        client.upload_collection(
+            collection_name=COLLECTION,
+            vectors=vectors,
+            payload=[{"repo_id": int(i % 50)} for i in range(start, start + 1000)],
+            ids=list(range(start, start + 1000)),
+            wait=True,
+        )
+
+
+def measure(client: QdrantClient, queries: np.ndarray) -> list[float]:
+    query_filter = models.Filter(
+        must=[models.FieldCondition(key="repo_id", match=models.MatchValue(value=7))]
+    )
+    client.query_points(COLLECTION, query=queries[0].tolist(), limit=5)  # warm up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        client.query_points(
+            COLLECTION, query=query.tolist(), limit=5, query_filter=query_filter, with_payload=True
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"    {name:5s} p50={statistics.median(ordered):6.2f}ms  p95={p95:6.2f}ms  mean={statistics.mean(ordered):6.2f}ms")
+
+
+def main() -> None:
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:6333"
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = np.random.default_rng(42)
+
+    http_client = QdrantClient(url=url)
+    grpc_client = QdrantClient(url=url, prefer_grpc=True)
+
+    print(f"[*] Seeding {NUM_POINTS} points into '{COLLECTION}' at {url}...")
+    seed(http_client, rng)
+    queries = rng.standard_normal((num_queries, DIMENSION), dtype=np.float32)
+
+    print(f"[*] {num_queries} filtered top-5 searches per transport")
+    report("http", measure(http_client, queries))
+    report("grpc", measure(grpc_client, queries))
+
+    http_client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare filtered top-k search latency of the NumPy store and Qdrant.
+
+Seeds the same random unit vectors into a memory-mapped RepoVectorIndex and
+a Qdrant collection, then times per-repository searches at several corpus
+sizes. The NumPy store scans every vector of the repository, so it wins
+while repositories are small enough that the scan beats a network round
+trip; Qdrant's HNSW graph takes over as they grow.
+
+Usage:
+    python scripts/benchmark_vector_store.py [qdrant_url] [num_queries]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.numpy_vector_store import RepoVectorIndex  # noqa: E402
+
+COLLECTION = "vector_store_benchmark"
+DIMENSION = 384
+SIZES = (1_000, 10_000, 50_000, 200_000)
+TOP_K = 5
+
+
+def unit_vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, DIMENSION), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def seed_numpy(directory: str, vectors: np.ndarray) -> RepoVectorIndex:
+    index = RepoVectorIndex(directory)
+    for start in range(0, len(vectors), 5000):
+        batch = vectors[start : start + 5000]
+        ids = [str(i) for i in range(start, start + len(batch))]
+        index.write(ids, batch, [{"path": f"file_{i % 500}.py"} for i in range(start, start + len(batch))])
+    return index
+
+
+def seed_qdrant(client: QdrantClient, vectors: np.ndarray) -> None:
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=DIMENSION, distance=models.Distance.COSINE),
+    )
+    client.create_payload_index(COLLECTION, "repo_id", models.PayloadSchemaType.INTEGER)
+    client.upload_collection(
+        collection_name=COLLECTION,
+        vectors=vectors,
+        payload=[{"repo_id": 1} for _ in range(len(vectors))],
+        ids=list(range(len(vectors))),
+        batch_size=1000,
+        wait=True,
+    )
+
+
+def time_calls(search, queries: np.ndarray) -> list[float]:
+    search(queries[0])  # warm up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summary(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"p50={statistics.median(ordered):7.2f}ms p95={p95:7.2f}ms"
+
+
+def main() -> None:
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:6333"
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = np.random.default_rng(42)
+    client = QdrantClient(url=url)
+    query_filter = models.Filter(
+        must=[models.FieldCondition(key="repo_id", match=models.MatchValue(value=1))]
+    )
+
+    print(f"[*] {num_queries} top-{TOP_K} searches per size, {DIMENSION}d vectors")
+    for size in SIZES:
+        vectors = unit_vectors(rng, size)
+        queries = unit_vectors(rng, num_queries)
+
+        with tempfile.TemporaryDirectory() as directory:
+            index = seed_numpy(directory, vectors)
+            numpy_latencies = time_calls(lambda q: index.search(q, TOP_K), queries)
+            index.close()
+
+        seed_qdrant(client, vectors)
+        qdrant_latencies = time_calls(
+            lambda q: client.query_points(
+                COLLECTION, query=q.tolist(), limit=TOP_K, query_filter=query_filter, with_payload=True
+            ),
+            queries,
+        )
+
+        print(f"    {size:>7} points  numpy {summary(numpy_latencies)}  qdrant {summary(qdrant_latencies)}")
+
+    client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Migrate a shared code collection to tenant partitioning.
+
+1. Indexes the tenant field with is_tenant and switches the collection to
+   per-tenant HNSW graphs.
+2. Backfills the tenant field on points indexed before partitioning.
+3. Moves repos with at least QDRANT_DEDICATED_REPO_THRESHOLD points (or the
+   threshold given on the command line) to their own collection.
+
+Run it while the affected repos are not being reindexed, then set
+QDRANT_TENANT_PARTITIONING=true so searches filter on the tenant field.
+
+Usage:
+    python scripts/migrate_tenants.py [collection] [threshold] [--dry-run]
+"""
+import os
+import sys
+
+from qdrant_client import models
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings  # noqa: E402
+from app.services.collection_profiles import get_collection_profile  # noqa: E402
+from app.services.vector_db import TENANT_FIELD, VectorDBService  # noqa: E402
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if arg != "--dry-run"]
+    dry_run = "--dry-run" in sys.argv
+    collection = args[0] if args else os.getenv("QDRANT_COLLECTION", "docubot_code")
+    threshold = int(args[1]) if len(args) > 1 else settings.QDRANT_DEDICATED_REPO_THRESHOLD
+
+    service = VectorDBService()
+    client = service.client
+
+    if not dry_run:
+        print(f"[*] Indexing '{TENANT_FIELD}' as tenant key on '{collection}'...")
+        client.create_payload_index(
+            collection_name=collection,
+            field_name=TENANT_FIELD,
+            field_schema=models.KeywordIndexParams(
+                type=models.KeywordIndexType.KEYWORD, is_tenant=True
+            ),
+        )
+        client.update_collection(
+            collection_name=collection,
+            hnsw_config=get_collection_profile(settings.QDRANT_COLLECTION_PROFILE).hnsw_config(
+                multitenant=True
+            ),
+        )
+        print(f"[*] Backfilled tenant on {service.backfill_tenants(collection)} points")
+
+    counts = service.repo_point_counts(collection)
+    print(f"[*] {len(counts)} repos, {sum(counts.values())} points")
+    if threshold <= 0:
+        print("[*] No dedicated-collection threshold set; done")
+        return
+
+    large = sorted(
+        ((repo_id, count) for repo_id, count in counts.items() if count >= threshold),
+        key=lambda item: -item[1],
+    )
+    for repo_id, count in large:
+        if dry_run:
+            print(f"    repo {repo_id}: {count} points would move")
+            continue
+        moved = service.promote_repo(repo_id, collection)
+        print(f"    repo {repo_id}: moved {moved} points to {service.route(collection, repo_id)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Report estimated memory footprint and search latency for each collection profile.
+
+Seeds one collection per profile with random vectors on a running Qdrant
+instance, then measures filtered top-k search latency. Memory figures are
+the profile's estimate for the target corpus size, not the seeded sample.
+
+Usage:
+    python scripts/profile_collections.py [qdrant_url] [num_points] [target_points]
+"""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.collection_profiles import COLLECTION_PROFILES, CollectionProfile  # noqa: E402
+
+DIMENSION = 384
+NUM_QUERIES = 300
+
+
+def seed(client: QdrantClient, name: str, profile: CollectionProfile, vectors: np.ndarray) -> None:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=profile.vectors_config(DIMENSION),
+        hnsw_config=profile.hnsw_config(),
+        quantization_config=profile.quantization_config(),
+        optimizers_config=profile.optimizers_config(),
+        on_disk_payload=profile.on_disk_payload,
+    )
+    client.create_payload_index(name, "repo_id", models.PayloadSchemaType.INTEGER)
+    client.upload_collection(
+        collection_name=name,
+        vectors=vectors,
+        payload=[{"repo_id": int(i % 50)} for i in range(len(vectors))],
+        ids=list(range(len(vectors))),
+        batch_size=1000,
+        wait=True,
+    )
+
+
+def measure(client: QdrantClient, name: str, profile: CollectionProfile, queries: np.ndarray) -> list[float]:
+    query_filter = models.Filter(
+        must=[models.FieldCondition(key="repo_id", match=models.MatchValue(value=7))]
+    )
+    search_params = profile.search_params()
+    client.query_points(name, query=queries[0].tolist(), limit=5)  # warm up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        client.query_points(
+            name,
+            query=query.tolist(),
+            limit=5,
+            query_filter=query_filter,
+            search_params=search_params,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:6333"
+    num_points = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    target_points = int(sys.argv[3]) if len(sys.argv) > 3 else 5_000_000
+    rng = np.random.default_rng(42)
+    client = QdrantClient(url=url)
+
+    vectors = rng.standard_normal((num_points, DIMENSION), dtype=np.float32)
+    queries = rng.standard_normal((NUM_QUERIES, DIMENSION), dtype=np.float32)
+
+    print(f"[*] {num_points} seeded points, memory estimated for {target_points} x {DIMENSION}d")
+    for name, profile in COLLECTION_PROFILES.items():
+        collection = f"profile_benchmark_{name}"
+        seed(client, collection, profile, vectors)
+        ordered = sorted(measure(client, collection, profile, queries))
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        memory = profile.estimate_memory_bytes(target_points, DIMENSION)
+        print(
+            f"    {name:12s} ram~{memory['total'] / 1024 ** 3:6.2f}GiB  "
+            f"p50={statistics.median(ordered):6.2f}ms  p95={p95:6.2f}ms"
+        )
+        client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
@@ -64,7 +64,10 @@ def test_chat_endpoint_creates_messages(client: TestClient, db: Session, test_us
 
     token = get_auth_token(client, "chatuser@example.com", "password123")
 
-    with patch("app.api.v1.endpoints.chat.VectorDBService.search_code", return_value=[]), patch(
+    with patch(
+        "app.services.vector_db.VectorDBService.search_code_async",
+        new=AsyncMock(return_value=[]),
+    ), patch(
         "app.api.v1.endpoints.chat.LLMService.generate_text", return_value="Test answer"
     ):
         response = client.post(
@@ -120,3 +123,55 @@ def test_chat_history_endpoint(client: TestClient, db: Session, test_user):
     data = response.json()
     assert data["session_id"] == session.id
     assert len(data["messages"]) == 2
+
+
+def test_chat_search_endpoint_returns_results_per_query(client: TestClient, db: Session, test_user):
+    repo = Repository(
+        user_id=test_user.id,
+        github_id=6666,
+        name="chat-repo-3",
+        full_name="test/chat-repo-3",
+        description="Chat repo 3",
+        url="https://github.com/test/chat-repo-3",
+        is_active=True,
+    )
+    db.add(repo)
+    db.commit()
+    db.refresh(repo)
+
+    token = get_auth_token(client, "chatuser@example.com", "password123")
+    hit = {"score": 0.9, "id": "p1", "payload": {"path": "a.py"}}
+
+    with patch(
+        "app.services.vector_db.VectorDBService.search_many_async",
+        new=AsyncMock(return_value=[[hit], []]),
+    ) as search_many, patch("app.api.v1.endpoints.chat.LLMService") as llm:
+        response = client.post(
+            "/api/v1/chat/search",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"repo_id": repo.id, "queries": ["auth flow", "db setup"], "top_k": 3},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"query": "auth flow", "results": [hit]},
+        {"query": "db setup", "results": []},
+    ]
+    assert search_many.await_args.kwargs["top_k"] == 3
+    llm.assert_not_called()
+
+
+def test_format_context_respects_token_budget():
+    from app.api.v1.endpoints.chat import _format_context
+
+    results = [
+        {"score": 0.9 - i / 10, "payload": {"path": f"{i}.py", "content": "x" * 400}}
+        for i in range(5)
+    ]
+
+    context = _format_context(results, [], max_tokens=250)
+    tiny = _format_context(results, [], max_tokens=20)
+
+    assert context.count("path: ") == 2
+    assert tiny.count("path: ") == 1
+    assert tiny.endswith("[truncated]")
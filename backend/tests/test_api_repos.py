@@ -231,4 +231,34 @@ def test_get_repo_forbidden_other_user(client: TestClient, db: Session, test_use
     
     # Should return 404 because the query filters by current_user.id
     assert response.status_code == 404
-    assert response.json()["detail"] == "Repository not found"
\ No newline at end of file
+    assert response.json()["detail"] == "Repository not found"
+def test_create_repo_requeues_purge_of_inactive_repo(client: TestClient, db: Session, test_user):
+    """Re-adding a repo that is still being deleted restarts its purge."""
+    test_user.github_access_token = "gh_fake_token"
+    repo = Repository(
+        user_id=test_user.id,
+        github_id=54321,
+        name="old-repo",
+        full_name="test/old-repo",
+        is_active=False,
+    )
+    db.add_all([test_user, repo])
+    db.commit()
+
+    token = get_auth_token(client, "repotest@example.com", "password123")
+
+    with patch("app.api.v1.endpoints.repos.GitHubService") as MockService, patch(
+        "app.api.v1.endpoints.repos.purge_repository"
+    ) as purge:
+        MockService.return_value.get_repo_details = AsyncMock(
+            return_value={"id": 54321, "name": "old-repo", "full_name": "test/old-repo", "html_url": ""}
+        )
+
+        response = client.post(
+            "/api/v1/repos/",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"url": "https://github.com/test/old-repo"}
+        )
+
+    assert response.status_code == 409
+    purge.delay.assert_called_once_with(repo.id)
@@ -0,0 +1,205 @@
+from app.services.chunking import CodeChunkingService
+
+SOURCE = b'''import os
+
+
+class Repo(Base):
+    """A repository."""
+
+    kind = "git"
+    size: int = 0
+
+    @property
+    def name(self) -> str:
+        """Display name."""
+        value = os.path.basename(self.path)
+        return value.strip().lower() or "unnamed repository"
+
+    def sync(self, force=False):
+        for item in self.items:
+            item.refresh(force=force)
+            item.save()
+        return len(self.items)
+
+
+def a():
+    return 1
+
+
+def b():
+    return 2
+
+
+def c():
+    return 3
+'''
+
+
+def _by_name(chunks):
+    return {chunk["name"]: chunk for chunk in chunks}
+
+
+def test_class_chunk_is_a_skeleton():
+    chunks = CodeChunkingService(mode="hierarchical", min_bytes=0).chunk_python_file(SOURCE, "repo.py")
+    repo = _by_name(chunks)["Repo"]
+
+    assert repo["type"] == "class"
+    assert '"""A repository."""' in repo["code"]
+    assert 'kind = "git"' in repo["code"]
+    assert "size: int = 0" in repo["code"]
+    assert "def name(self) -> str: ..." in repo["code"]
+    assert "@property" in repo["code"]
+    assert "def sync(self, force=False): ..." in repo["code"]
+    assert "item.save()" not in repo["code"]
+    assert "basename" not in repo["code"]
+
+
+def test_method_chunks_reference_their_class():
+    chunks = CodeChunkingService(mode="hierarchical", min_bytes=0).chunk_python_file(SOURCE, "repo.py")
+    methods = [chunk for chunk in chunks if chunk.get("parent") == "Repo"]
+
+    assert [m["name"] for m in methods] == ["name", "sync"]
+    assert methods[0]["qualified_name"] == "Repo.name"
+    assert methods[0]["code"].startswith("@property")
+    assert [c["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    # Each method body is stored once.
+    assert sum("item.save()" in chunk["code"] for chunk in chunks) == 1
+
+
+def test_small_sibling_functions_are_merged():
+    chunks = CodeChunkingService(mode="hierarchical", min_bytes=40).chunk_python_file(SOURCE, "repo.py")
+    merged = [chunk for chunk in chunks if chunk.get("members")]
+
+    assert [m["members"] for m in merged] == [["a", "b"]]
+    assert "return 2" in merged[0]["code"]
+    assert _by_name(chunks)["c"]["code"] == "def c():\n    return 3"
+
+
+def test_large_functions_are_split_at_statements():
+    body = "".join(f"    value_{i} = compute({i})\n" for i in range(40))
+    source = f"def big(x):\n{body}    return x\n".encode()
+
+    chunks = CodeChunkingService(mode="hierarchical", max_bytes=300).chunk_python_file(source, "big.py")
+
+    assert len(chunks) > 1
+    assert all(chunk["name"] == "big" for chunk in chunks)
+    assert [chunk["part"] for chunk in chunks] == list(range(1, len(chunks) + 1))
+    assert all(chunk["code"].startswith("def big(x):") for chunk in chunks)
+    assert all(len(chunk["code"]) <= 300 for chunk in chunks)
+    assert "return x" in chunks[-1]["code"]
+
+
+def test_flat_mode_keeps_full_class_chunks():
+    chunks = CodeChunkingService(mode="flat").chunk_python_file(SOURCE, "repo.py")
+    repo = _by_name(chunks)["Repo"]
+
+    assert "item.save()" in repo["code"]
+    assert sum("item.save()" in chunk["code"] for chunk in chunks) == 2
+
+
+TS_SOURCE = b'''import { api } from "./api";
+
+/** Loads a widget. */
+export async function loadWidget(id: string): Promise<Widget> {
+  return api.get(id);
+}
+
+export const formatName = (name: string) => name.trim();
+
+export class WidgetStore extends Store {
+  count: number = 0;
+
+  add(widget: Widget): void {
+    this.items.push(widget);
+    this.count += 1;
+  }
+}
+'''
+
+
+def test_typescript_file_is_chunked_by_definition():
+    chunks = CodeChunkingService(mode="hierarchical", min_bytes=0).chunk_file(
+        TS_SOURCE, "store.ts", "typescript"
+    )
+    by_name = _by_name(chunks)
+
+    assert set(by_name) == {"loadWidget", "formatName", "WidgetStore", "add"}
+    assert all(chunk["language"] == "typescript" for chunk in chunks)
+    assert by_name["loadWidget"]["type"] == "function"
+    assert by_name["loadWidget"]["imports"] == ['import { api } from "./api";']
+    assert by_name["formatName"]["code"] == "export const formatName = (name: string) => name.trim();"
+    assert by_name["add"]["parent"] == "WidgetStore"
+    assert "add(widget: Widget): void;" in by_name["WidgetStore"]["code"]
+    assert "this.items.push" not in by_name["WidgetStore"]["code"]
+
+
+def test_tsx_uses_the_tsx_grammar():
+    source = b"export const Badge = ({ label }: Props) => <span>{label}</span>;\n"
+    chunks = CodeChunkingService(mode="hierarchical").chunk_file(source, "Badge.tsx", "tsx")
+
+    assert [chunk["name"] for chunk in chunks] == ["Badge"]
+    assert chunks[0]["language"] == "typescript"
+
+
+def test_analyze_file_matches_separate_extraction():
+    service = CodeChunkingService(mode="hierarchical", min_bytes=0)
+    analysis = service.analyze_file(SOURCE, "repo.py", "python")
+
+    tree = service.parser.parse_python_file(SOURCE)
+    functions = service.parser.extract_functions(tree, SOURCE)
+    assert sorted(f["name"] for f in analysis.functions) == sorted(f["name"] for f in functions)
+    assert analysis.classes == service.parser.extract_classes(tree, SOURCE)
+    assert analysis.imports == ["import os"]
+    assert analysis.language == "python"
+    assert analysis.chunks == service.chunk_python_file(SOURCE, "repo.py")
+
+
+def test_top_level_code_gets_a_module_chunk():
+    source = b'''const router = require("express").Router();
+
+router.get("/health", async (req, res) => {
+  res.json({ ok: true });
+});
+
+function helper() {
+  return 1;
+}
+
+module.exports = { router, helper };
+
+export default class extends Base {
+  run() {
+    return helper();
+  }
+}
+'''
+    service = CodeChunkingService(mode="hierarchical", min_bytes=0)
+    analysis = service.analyze_file(source, "routes.js", "javascript")
+    module, *rest = analysis.chunks
+
+    assert module["type"] == "module"
+    assert module["name"] == "routes.js"
+    assert 'router.get("/health"' in module["code"]
+    assert "module.exports = { router, helper };" in module["code"]
+    assert "return 1;" not in module["code"]
+    assert [(chunk["name"], chunk.get("parent")) for chunk in rest] == [
+        ("helper", None),
+        ("default", None),
+        ("run", "default"),
+    ]
+    assert [cls["name"] for cls in analysis.classes] == ["default"]
+
+
+def test_file_without_definitions_is_one_chunk():
+    source = b'export * from "./widgets";\n'
+    chunks = CodeChunkingService(mode="hierarchical").chunk_file(source, "index.ts", "typescript")
+
+    assert [(chunk["type"], chunk["code"]) for chunk in chunks] == [("module", source.decode().strip())]
+
+
+def test_non_utf8_source_is_decoded_with_replacement():
+    source = "// Café\nfunction greet() {\n  return 'olé';\n}\nexport const x = greet();\n".encode("latin-1")
+    chunks = CodeChunkingService(mode="hierarchical").chunk_file(source, "greet.js", "javascript")
+
+    assert {chunk["name"] for chunk in chunks} == {"greet.js", "greet"}
+    assert "ol�" in _by_name(chunks)["greet"]["code"]
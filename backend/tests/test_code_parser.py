@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import patch
 from app.services.code_parser import CodeParserService
 
 @pytest.fixture
@@ -104,3 +105,67 @@ class Outer(Base):
     assert inner["qualified_name"] == "Outer.Inner"
     assert inner["docstring"] == "Inner docstring."
     assert inner["attributes"] == ["enabled"]
+
+
+def test_extract_javascript_functions_and_classes(parser_service):
+    content = b'''/** Greets someone. */
+export function greet(name) {
+  return `hi ${name}`;
+}
+
+const double = (x) => x * 2;
+
+class Counter extends Base {
+  value = 0;
+  increment(step) { this.value += step; }
+}
+'''
+    tree = parser_service.parse_file(content, "javascript")
+
+    functions = {item["name"]: item for item in parser_service.extract_functions(tree, content)}
+    assert set(functions) == {"greet", "double", "increment"}
+    assert functions["greet"]["docstring"] == "Greets someone."
+    assert functions["greet"]["parameters"] == ["name"]
+    assert functions["double"]["signature"] == "const double = (x) =>"
+
+    classes = parser_service.extract_classes(tree, content)
+    assert [cls["name"] for cls in classes] == ["Counter"]
+    assert classes[0]["bases"] == ["Base"]
+    assert classes[0]["attributes"] == ["value"]
+    assert [method["name"] for method in classes[0]["methods"]] == ["increment"]
+
+
+def test_queries_are_compiled_once(parser_service):
+    tree = parser_service.parse_python_file(b"def a():\n    pass\n")
+
+    with patch("tree_sitter.Language.query", side_effect=AssertionError("compiled again")):
+        assert parser_service.extract_function_names(tree) == ["a"]
+        assert [f["name"] for f in parser_service.extract_functions(tree, b"def a():\n    pass\n")] == ["a"]
+
+
+def test_extract_outline_matches_separate_extractors(parser_service):
+    content = b'''import os
+from typing import Any
+
+
+class Outer:
+    """Outer docs."""
+
+    def method(self):
+        """Method docs."""
+        import json
+        return json
+
+
+def helper():
+    """Helper docs."""
+    return os
+'''
+    tree = parser_service.parse_python_file(content)
+    outline = parser_service.extract_outline(tree, content)
+
+    assert outline["functions"] == parser_service.extract_functions(tree, content)
+    assert outline["classes"] == parser_service.extract_classes(tree, content)
+    assert outline["imports"] == ["import os", "from typing import Any", "import json"]
+    assert [f["docstring"] for f in outline["functions"]] == ["Method docs.", "Helper docs."]
+    assert outline["classes"][0]["docstring"] == "Outer docs."
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.services.collection_profiles import COLLECTION_PROFILES, get_collection_profile
+from app.services.vector_db import VectorDBService
+from tests.test_vector_db import FakeEmbeddingService
+
+
+@pytest.fixture
+def vector_service():
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_db.settings.EMBEDDING_CACHE_ENABLED", False
+    ), patch("app.services.vector_db.settings.CONTENT_STORE_ENABLED", False), patch(
+        "app.services.vector_db.settings.QDRANT_HYBRID_SEARCH", True
+    ):
+        return VectorDBService(client=QdrantClient(":memory:"))
+
+
+def test_create_collection_uses_model_dimension(vector_service):
+    result = vector_service.create_collection("code")
+
+    assert result["vector_size"] == 8
+    assert result["profile"] == "default"
+    info = vector_service.client.get_collection("code")
+    assert info.config.params.vectors["dense"].size == 8
+
+
+def test_create_collection_applies_profile(vector_service):
+    with patch.object(
+        vector_service.client, "create_collection", wraps=vector_service.client.create_collection
+    ) as create:
+        vector_service.create_collection("code", profile="low_memory", multitenant=True)
+
+    kwargs = create.call_args.kwargs
+    assert kwargs["vectors_config"]["dense"].on_disk is True
+    assert kwargs["on_disk_payload"] is True
+    assert kwargs["quantization_config"].scalar.type == models.ScalarType.INT8
+    assert kwargs["optimizers_config"].indexing_threshold == 20000
+    # Shared collections only build per-tenant graphs.
+    assert kwargs["hnsw_config"].m == 0
+    assert kwargs["hnsw_config"].payload_m == 16
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        get_collection_profile("turbo")
+
+
+def test_search_params_only_for_tuned_profiles():
+    assert get_collection_profile("default").search_params() is None
+
+    params = get_collection_profile("balanced").search_params()
+    assert params.hnsw_ef == 128
+    assert params.quantization.rescore is True
+
+
+def test_memory_estimates_shrink_with_quantization_and_disk():
+    totals = {
+        name: profile.estimate_memory_bytes(1_000_000, 384)["total"]
+        for name, profile in COLLECTION_PROFILES.items()
+    }
+
+    assert totals["low_memory"] < totals["default"] / 2
+    assert totals["compact"] < totals["low_memory"]
+    assert totals["high_recall"] > totals["default"]
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from qdrant_client import QdrantClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.chunk_content import ChunkContent
+from app.services.content_store import ContentStore, content_hash, fill_contents
+from app.services.vector_db import VectorDBService
+from tests.test_vector_db import COLLECTION, FakeEmbeddingService, _chunks
+
+
+@pytest.fixture
+def store():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    ChunkContent.__table__.create(bind=engine)
+    return ContentStore(session_factory=sessionmaker(bind=engine))
+
+
+def test_put_many_dedupes_and_round_trips(store):
+    texts = ["def a():\n    pass", "def b():\n    pass", "def a():\n    pass  "]
+
+    hashes = store.put_many(texts)
+    store.put_many(texts[:1])
+
+    assert hashes[0] == hashes[2] == content_hash(texts[0])
+    assert store.get_many(hashes) == {hashes[0]: texts[0], hashes[1]: texts[1]}
+    db = store.session_factory()
+    assert db.query(ChunkContent).count() == 2
+    db.close()
+
+
+def test_fill_contents_batches_missing_texts(store):
+    (digest,) = store.put_many(["def a():\n    pass"])
+    results = [
+        {"score": 0.9, "id": 1, "payload": {"content_hash": digest}},
+        {"score": 0.5, "id": 2, "payload": {"content_hash": "unknown"}},
+        {"score": 0.4, "id": 3, "payload": {"content": "inline"}},
+    ]
+
+    with patch.object(store, "get_many", wraps=store.get_many) as get_many:
+        fill_contents(results, store)
+
+    get_many.assert_called_once()
+    assert results[0]["payload"]["content"] == "def a():\n    pass"
+    assert "content" not in results[1]["payload"]
+    assert results[2]["payload"]["content"] == "inline"
+
+
+def test_vector_payloads_reference_stored_content(store):
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_db.settings.EMBEDDING_CACHE_ENABLED", False
+    ):
+        service = VectorDBService(client=QdrantClient(":memory:"))
+    service.content_store = store
+    service.create_collection(COLLECTION)
+    chunks = _chunks("alpha")
+    chunks[0].update(start_byte=10, end_byte=42)
+
+    service.upsert_code_chunks(1, COLLECTION, "a.py", chunks)
+    results = service.search_code("alpha", 1, COLLECTION)
+
+    payload = results[0]["payload"]
+    assert "content" not in payload
+    assert (payload["start_byte"], payload["end_byte"]) == (10, 42)
+    assert fill_contents(results, store)[0]["payload"]["content"] == chunks[0]["code"]
+
+
+def test_delete_unreferenced_respects_references_and_grace(store):
+    kept, unused, recent = store.put_many(["def a():\n    pass", "def b():\n    pass", "def c():\n    pass"])
+    db = store.session_factory()
+    db.query(ChunkContent).filter(ChunkContent.content_hash != recent).update(
+        {ChunkContent.used_at: datetime.now(timezone.utc) - timedelta(hours=2)}, synchronize_session=False
+    )
+    db.commit()
+    db.close()
+
+    def referenced(batch):
+        return {digest for digest in batch if digest == kept}
+
+    preview = store.delete_unreferenced(referenced, dry_run=True)
+    report = store.delete_unreferenced(referenced, grace_seconds=3600)
+
+    assert preview == report
+    assert report["rows"] == 1 and report["bytes"] > 0
+    assert set(store.get_many([kept, unused, recent])) == {kept, recent}
+    assert store.delete_unreferenced(referenced, hashes=[recent], grace_seconds=0)["rows"] == 1
+
+
+def test_collect_contents_keeps_text_shared_with_other_repos(store):
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_db.settings.EMBEDDING_CACHE_ENABLED", False
+    ):
+        service = VectorDBService(client=QdrantClient(":memory:"))
+    service.content_store = store
+    service.create_collection(COLLECTION)
+    service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("shared", "only_one"))
+    service.upsert_code_chunks(2, COLLECTION, "a.py", _chunks("shared"))
+
+    hashes = service.repo_content_hashes(1, COLLECTION)
+    service.delete_repo(1, COLLECTION)
+    with patch("app.services.content_store.settings.CONTENT_GC_GRACE_SECONDS", 0):
+        report = service.collect_contents(COLLECTION, hashes)
+
+    assert len(hashes) == 2
+    assert report["rows"] == 1
+    shared = content_hash(_chunks("shared")[0]["code"])
+    assert set(store.get_many(hashes)) == {shared}
+
+
+def test_collect_orphans_removes_their_unshared_text(store):
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_db.settings.EMBEDDING_CACHE_ENABLED", False
+    ):
+        service = VectorDBService(client=QdrantClient(":memory:"))
+    service.content_store = store
+    service.create_collection(COLLECTION)
+    service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("kept"))
+    service.upsert_code_chunks(1, COLLECTION, "gone.py", _chunks("kept", "orphan"))
+
+    with patch("app.services.content_store.settings.CONTENT_GC_GRACE_SECONDS", 0):
+        preview = service.collect_orphans(1, COLLECTION, {"a.py"}, dry_run=True)
+        report = service.collect_orphans(1, COLLECTION, {"a.py"})
+
+    assert preview["contents"]["rows"] == 0
+    assert report["contents"]["rows"] == 1
+    kept, orphan = (content_hash(chunk["code"]) for chunk in _chunks("kept", "orphan"))
+    assert set(store.get_many([kept, orphan])) == {kept}
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.services.diversify import cap_per_path, mmr_rerank, mmr_select, resolve_diversity
+
+
+def _unit(*rows):
+    vectors = np.array(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_mmr_skips_near_duplicates():
+    query = _unit([1.0, 0.05, 0.0])[0]
+    vectors = _unit([1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7])
+
+    assert mmr_select(query, vectors, 2, lambda_mult=1.0) == [0, 1]
+    assert mmr_select(query, vectors, 2, lambda_mult=0.3) == [0, 2]
+    assert mmr_select(query, vectors, 10, lambda_mult=0.3) == [0, 2, 1]
+    assert mmr_select(query, vectors[:0], 3) == []
+
+
+def test_mmr_rerank_uses_fused_scores_as_relevance():
+    vectors = _unit([1.0, 0.0], [0.0, 1.0])
+    results = [{"score": 0.03, "id": "a"}, {"score": 0.01, "id": "b"}]
+
+    # The query is closer to "b", but the fused ranking puts "a" first.
+    reranked = mmr_rerank([0.0, 1.0], results, vectors, 1, 0.7, fused=True)
+
+    assert [item["id"] for item in reranked] == ["a"]
+
+
+def test_cap_per_path_keeps_score_order():
+    results = [
+        {"id": i, "payload": {"path": path}}
+        for i, path in enumerate(["a.py", "a.py", "a.py", "b.py", "c.py"])
+    ]
+
+    assert [item["id"] for item in cap_per_path(results, 2, 10)] == [0, 1, 3, 4]
+    assert [item["id"] for item in cap_per_path(results, 1, 2)] == [0, 3]
+
+
+def test_resolve_diversity_rejects_unknown_modes():
+    assert resolve_diversity(None, "group") == "group"
+    assert resolve_diversity("mmr", "none") == "mmr"
+    with pytest.raises(ValueError):
+        resolve_diversity("random", "none")
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from app.services.embedding_backends import (
+    EMBEDDING_BACKENDS,
+    QuantizedInt8Backend,
+    TorchBackend,
+    load_embedding_backend,
+)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+SAMPLES = [
+    "def add(a, b):\n    return a + b",
+    "class UserRepository:\n    def get_by_email(self, email):\n        return self.session.query(User).filter_by(email=email).first()",
+    "export const fetchRepos = async (token) => axios.get('/repos', { headers: { Authorization: token } })",
+    "How does the webhook handler verify the GitHub signature?",
+    "import os\nBASE_DIR = os.path.dirname(os.path.abspath(__file__))",
+]
+
+# Maximum allowed cosine distance between a backend and the torch reference.
+MAX_COSINE_DRIFT = {"onnx": 0.001, "int8": 0.03}
+
+
+def _load_or_skip(backend_cls):
+    try:
+        return backend_cls(MODEL_NAME)
+    except (OSError, RuntimeError, ImportError) as exc:
+        pytest.skip(f"{backend_cls.name} backend unavailable: {exc}")
+
+
+@pytest.fixture(scope="module")
+def reference_vectors():
+    return _load_or_skip(TorchBackend).encode(SAMPLES, batch_size=8)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_embedding_backend("tensorrt", MODEL_NAME)
+
+
+def test_backends_are_registered_by_name():
+    assert set(EMBEDDING_BACKENDS) == {"torch", "onnx", "int8"}
+
+
+@pytest.mark.parametrize("name", ["onnx", "int8"])
+def test_backend_vectors_match_torch(name, reference_vectors):
+    backend = _load_or_skip(EMBEDDING_BACKENDS[name])
+
+    vectors = backend.encode(SAMPLES, batch_size=8)
+
+    assert vectors.shape == reference_vectors.shape
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-3)
+    cosine = np.sum(vectors * reference_vectors, axis=1)
+    assert float(np.max(1.0 - cosine)) <= MAX_COSINE_DRIFT[name]
+
+
+def test_int8_backend_quantizes_linear_layers():
+    import torch
+
+    backend = _load_or_skip(QuantizedInt8Backend)
+
+    quantized = [
+        module
+        for module in backend.model.modules()
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+    ]
+    assert quantized
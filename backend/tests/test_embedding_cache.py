@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.vector_db import VectorDBService
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # An empty Redis URL disables the hot tier so only the disk tier is used.
+    return EmbeddingCache("test-model", redis_url="", cache_dir=str(tmp_path), max_bytes=10_000)
+
+
+def test_key_depends_on_model_and_normalized_text(cache, tmp_path):
+    other_model = EmbeddingCache("other-model", redis_url="", cache_dir=str(tmp_path))
+
+    assert cache.key("def f():\r\n    pass   \n") == cache.key("def f():\n    pass")
+    assert cache.key("def f(): pass") != cache.key("def g(): pass")
+    assert cache.key("def f(): pass") != other_model.key("def f(): pass")
+
+
+def test_cache_round_trip_and_counters(cache):
+    vectors = np.array([[0.5, 0.25, 0.125], [1.0, 0.0, -1.0]], dtype=np.float32)
+    cache.put_many(["a", "b"], vectors)
+
+    results = cache.get_many(["b", "missing", "a"])
+
+    np.testing.assert_allclose(results[0], vectors[1])
+    assert results[1] is None
+    np.testing.assert_allclose(results[2], vectors[0])
+    assert results[0].dtype == np.float32
+    stats = cache.stats()
+    assert stats["disk_hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    # Three float16 vectors of dimension 2 fit in 12 bytes.
+    cache = EmbeddingCache("test-model", redis_url="", cache_dir=str(tmp_path), max_bytes=12)
+    vector = np.ones((1, 2), dtype=np.float32)
+    for text in ["a", "b", "c"]:
+        cache.put_many([text], vector)
+    cache.get_many(["a"])  # touch "a" so "b" becomes the oldest
+
+    cache.put_many(["d"], vector)
+
+    assert [v is not None for v in cache.get_many(["a", "b", "c", "d"])] == [True, False, True, True]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_embed_documents_only_embeds_cache_misses(cache):
+    service = VectorDBService.__new__(VectorDBService)
+    service.embedding_cache = cache
+    service.embedding_service = MagicMock()
+    service.embedding_service.generate_embeddings.side_effect = lambda texts: np.full(
+        (len(texts), 3), len(texts), dtype=np.float32
+    )
+
+    cache.put_many(["cached"], np.array([[9.0, 9.0, 9.0]], dtype=np.float32))
+    vectors = service.embed_documents(["new one", "cached", "new two"])
+
+    service.embedding_service.generate_embeddings.assert_called_once_with(["new one", "new two"])
+    np.testing.assert_allclose(vectors, [[2, 2, 2], [9, 9, 9], [2, 2, 2]])
+    assert cache.get_many(["new two"])[0] is not None
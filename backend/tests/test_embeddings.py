@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.embeddings import EmbeddingService
+from app.services.model_registry import model_registry
+
+
+class FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        max_length = kwargs.get("max_length") or 10_000
+        return {"input_ids": [list(range(min(len(text.split()) + 2, max_length))) for text in texts]}
+
+
+class FakeModel:
+    max_seq_length = 256
+
+    def __init__(self, name):
+        self.name = name
+        self.tokenizer = FakeTokenizer()
+        self.encode_calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, **kwargs):
+        self.encode_calls.append(list(texts))
+        vectors = np.array(
+            [[len(text), len(text.split()), 1.0, float(sum(map(ord, text)) % 7)] for text in texts],
+            dtype=np.float32,
+        )
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+@pytest.fixture
+def embedding_service():
+    model_registry.clear()
+    with patch("app.services.embedding_backends.SentenceTransformer", FakeModel):
+        yield EmbeddingService(batch_size=2, max_batch_tokens=1000)
+    model_registry.clear()
+
+
+def test_generate_embeddings_preserves_input_order(embedding_service):
+    texts = ["a b c d e f", "x", "one two three", "short text"]
+
+    batched = embedding_service.generate_embeddings(texts)
+
+    assert batched.shape == (4, 4)
+    assert batched.dtype == np.float32
+    assert batched.flags["C_CONTIGUOUS"]
+    for row, text in zip(batched, texts):
+        np.testing.assert_allclose(row, embedding_service.generate_embedding(text), rtol=1e-6)
+
+
+def test_generate_embeddings_buckets_by_token_length(embedding_service):
+    texts = ["a b c d e f", "x", "one two three", "y"]
+
+    embedding_service.generate_embeddings(texts)
+
+    assert embedding_service.backend.model.encode_calls == [["x", "y"], ["one two three", "a b c d e f"]]
+
+
+def test_generate_embeddings_respects_token_budget(embedding_service):
+    embedding_service.max_batch_tokens = 8
+    texts = ["a b c", "d e f", "g h i"]
+
+    embedding_service.generate_embeddings(texts)
+
+    # Each text is 5 tokens, so two of them would exceed the budget.
+    assert [len(call) for call in embedding_service.backend.model.encode_calls] == [1, 1, 1]
+
+
+def test_generate_embeddings_handles_empty_input(embedding_service):
+    assert embedding_service.generate_embeddings([]).shape == (0, 4)
+    with pytest.raises(ValueError):
+        embedding_service.generate_embeddings(["ok", ""])
+
+
+def test_embedding_services_share_one_model(embedding_service):
+    other = EmbeddingService()
+
+    assert other.backend is embedding_service.backend
+    stats = model_registry.stats()
+    assert list(stats["models"]) == ["torch:all-MiniLM-L6-v2"]
+    assert stats["models"]["torch:all-MiniLM-L6-v2"]["load_seconds"] >= 0
+    assert stats["rss_bytes"] > 0
+
+
+class FastWhitespaceTokenizer:
+    is_fast = True
+
+    def __call__(self, texts, **kwargs):
+        offsets = []
+        for text in texts:
+            spans, position = [], 0
+            for word in text.split():
+                start = text.index(word, position)
+                position = start + len(word)
+                spans.append((start, position))
+            offsets.append(spans)
+        return {"offset_mapping": offsets, "input_ids": [[0] * len(spans) for spans in offsets]}
+
+
+class WindowedFakeModel(FakeModel):
+    max_seq_length = 6  # four content tokens per window
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.tokenizer = FastWhitespaceTokenizer()
+
+
+@pytest.fixture
+def windowed_service():
+    model_registry.clear()
+    with patch("app.services.embedding_backends.SentenceTransformer", WindowedFakeModel):
+        service = EmbeddingService(batch_size=16, long_text_mode="window")
+    service.window_overlap = 1
+    service.max_tokens_per_text = 9
+    yield service
+    model_registry.clear()
+
+
+def test_long_texts_are_split_into_overlapping_windows(windowed_service):
+    long_text = "t1 t2 t3 t4 t5 t6 t7"
+
+    vectors = windowed_service.generate_embeddings(["short one", long_text])
+
+    calls = windowed_service.backend.model.encode_calls
+    assert len(calls) == 1  # every window is embedded in the same batch
+    assert sorted(calls[0]) == sorted(["short one", "t1 t2 t3 t4", "t4 t5 t6 t7"])
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+
+    windows = windowed_service.backend.encode(["t1 t2 t3 t4", "t4 t5 t6 t7"], batch_size=2)
+    pooled = windows.mean(axis=0)
+    np.testing.assert_allclose(vectors[1], pooled / np.linalg.norm(pooled), rtol=1e-5)
+    assert windowed_service.window_stats == {"texts": 2, "windowed": 1, "clipped": 0, "windows": 2}
+
+
+def test_texts_over_the_token_cap_are_clipped(windowed_service):
+    text = " ".join(f"w{i}" for i in range(20))
+
+    windowed_service.generate_embeddings([text])
+
+    segments = windowed_service.backend.model.encode_calls[0]
+    assert "w9" not in " ".join(segments)
+    assert "w8" in " ".join(segments)
+    assert windowed_service.window_stats["clipped"] == 1
+
+
+def test_model_id_tracks_long_text_settings(windowed_service):
+    model_id = windowed_service.model_id
+
+    windowed_service.window_overlap = 2
+    overlap_id = windowed_service.model_id
+    windowed_service.max_tokens_per_text = 12
+    cap_id = windowed_service.model_id
+    windowed_service.long_text_mode = "truncate"
+
+    assert len({model_id, overlap_id, cap_id, windowed_service.model_id}) == 4
+    assert all(key.startswith(windowed_service.model_name) for key in (model_id, cap_id))
@@ -0,0 +1,29 @@
+from app.services.model_registry import ModelRegistry
+
+
+def test_registry_loads_each_model_once():
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    first = registry.get("model-a", loader)
+    second = registry.get("model-a", loader)
+
+    assert first is second
+    assert len(calls) == 1
+    assert list(registry.loaded()) == ["model-a"]
+
+
+def test_registry_preload_and_clear():
+    registry = ModelRegistry()
+    registry.preload({"model-a": object, "model-b": object})
+
+    stats = registry.stats()
+    assert set(stats["models"]) == {"model-a", "model-b"}
+    assert "rss_delta_bytes" in stats["models"]["model-a"]
+
+    registry.clear()
+    assert list(registry.loaded()) == []
@@ -0,0 +1,212 @@
+import shutil
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.numpy_vector_store import NumpyVectorStore, RepoVectorIndex
+from tests.test_vector_db import FakeEmbeddingService, _chunks
+
+COLLECTION = "test_code"
+
+
+@pytest.fixture
+def store(tmp_path):
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_store.settings.EMBEDDING_CACHE_ENABLED", False
+    ), patch("app.services.vector_store.settings.CONTENT_STORE_ENABLED", False):
+        store = NumpyVectorStore(root=str(tmp_path))
+    store.create_collection(COLLECTION)
+    yield store
+    store._close_indexes(str(tmp_path))
+
+
+def test_upsert_and_search_code(store):
+    store.upsert_code_chunks(1, COLLECTION, "app/a.py", _chunks("alpha", "beta"))
+
+    results = store.search_code("def beta():\n    return 'beta'", 1, COLLECTION, top_k=1)
+
+    assert results[0]["payload"]["symbol"] == "beta"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-3)
+    assert store.search_code("beta", 2, COLLECTION) == []
+
+
+def test_search_filters_by_path_and_language(store):
+    chunks = _chunks("alpha", "beta")
+    chunks[1]["language"] = "python"
+    store.upsert_code_chunks(1, COLLECTION, "a.py", chunks)
+    store.upsert_code_chunks(1, COLLECTION, "b.py", _chunks("gamma"))
+
+    by_path = store.search_code("alpha", 1, COLLECTION, top_k=5, path="b.py")
+    by_language = store.search_code("alpha", 1, COLLECTION, top_k=5, language="python")
+
+    assert [r["payload"]["symbol"] for r in by_path] == ["gamma"]
+    assert [r["payload"]["symbol"] for r in by_language] == ["beta"]
+
+
+def test_delete_by_path_and_row_reuse(store):
+    store.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha"))
+    store.upsert_code_chunks(1, COLLECTION, "b.py", _chunks("beta"))
+
+    store.delete_by_path(1, COLLECTION, "a.py")
+    store.upsert_code_chunks(1, COLLECTION, "c.py", _chunks("gamma"))
+
+    index = store._index(COLLECTION, 1)
+    assert len(index) == 2
+    assert index._size == 2  # gamma took the row alpha freed
+    assert {r["payload"]["path"] for r in store.search_code("x", 1, COLLECTION)} == {"b.py", "c.py"}
+
+
+def test_sync_files_matches_qdrant_semantics(store):
+    store.sync_files(1, COLLECTION, [("a.py", _chunks("alpha", "beta", "gamma"))])
+    store.embedding_service.calls.clear()
+
+    edited = _chunks("new_first", "alpha", "gamma")
+    stats = store.sync_files(1, COLLECTION, [("a.py", edited)])
+
+    assert stats == {"upserted": 1, "deleted": 1, "unchanged": 1, "moved": 1}
+    assert store.embedding_service.calls == [[edited[0]["code"]]]
+    results = store.search_code("x", 1, COLLECTION, top_k=10)
+    assert {(r["payload"]["symbol"], r["payload"]["chunk_index"]) for r in results} == {
+        ("new_first", 0),
+        ("alpha", 1),
+        ("gamma", 2),
+    }
+
+
+def test_index_grows_and_survives_reopen(tmp_path):
+    directory = str(tmp_path / "repo_1")
+    vectors = np.eye(8, dtype=np.float32)
+
+    with patch.object(RepoVectorIndex, "INITIAL_ROWS", 2):
+        index = RepoVectorIndex(directory)
+        index.write([f"p{i}" for i in range(8)], vectors, [{"path": f"{i}.py"} for i in range(8)])
+    index.close()
+
+    reopened = RepoVectorIndex(directory)
+    results = reopened.search(vectors[5], top_k=1)
+    with patch.object(RepoVectorIndex, "RESIDENT_MAX_ROWS", 0), patch.object(
+        RepoVectorIndex, "SEARCH_BLOCK_ROWS", 3
+    ):
+        streamed = RepoVectorIndex(directory).search(vectors[6], top_k=1)
+
+    assert len(reopened) == 8
+    assert results[0][0] == "p5"
+    assert results[0][2] == {"path": "5.py"}
+    assert streamed[0][0] == "p6"
+    reopened.close()
+
+
+def test_writes_from_another_handle_are_picked_up(tmp_path):
+    directory = str(tmp_path / "repo_1")
+    reader = RepoVectorIndex(directory)
+    assert reader.search(np.ones(4, dtype=np.float32), top_k=1) == []
+
+    writer = RepoVectorIndex(directory)
+    writer.write(["p0"], np.array([[0.5, 0.5, 0.5, 0.5]], dtype=np.float32), [{"path": "a.py"}])
+
+    assert reader.search(np.ones(4, dtype=np.float32), top_k=1)[0][0] == "p0"
+    reader.close()
+    writer.close()
+
+
+def test_get_vector_store_selects_backend(tmp_path):
+    from app.services.vector_db import get_vector_store
+
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_db.settings.VECTOR_STORE_BACKEND", "numpy"
+    ), patch("app.services.vector_db.settings.VECTOR_STORE_DIR", str(tmp_path)):
+        assert isinstance(get_vector_store(), NumpyVectorStore)
+
+    with patch("app.services.vector_db.settings.VECTOR_STORE_BACKEND", "faiss"), pytest.raises(ValueError):
+        get_vector_store()
+
+
+def test_search_diversity_modes(store):
+    for path in ("a.py", "copy_of_a.py"):
+        store.upsert_code_chunks(1, COLLECTION, path, _chunks("alpha", "beta"))
+    query = "def alpha():\n    return 'alpha'"
+
+    grouped = store.search_code(query, 1, COLLECTION, top_k=4, diversity="group")
+    with patch("app.services.numpy_vector_store.settings.RETRIEVAL_MMR_LAMBDA", 0.3):
+        diverse = store.search_code(query, 1, COLLECTION, top_k=2, diversity="mmr")
+
+    assert len(grouped) == 4
+    with patch("app.services.numpy_vector_store.settings.RETRIEVAL_MAX_PER_FILE", 1):
+        assert len(store.search_code(query, 1, COLLECTION, top_k=4, diversity="group")) == 2
+    assert [r["payload"]["symbol"] for r in diverse] == ["alpha", "beta"]
+
+
+def test_search_min_score_reports_dropped(store):
+    store.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "beta", "gamma"))
+    query = "def alpha():\n    return 'alpha'"
+
+    results = store.search_code(query, 1, COLLECTION, top_k=3, min_score=0.99)
+
+    assert [r["payload"]["symbol"] for r in results] == ["alpha"]
+    assert results.dropped == 2
+    assert store.search_code(query, 1, COLLECTION, top_k=3).dropped == 0
+
+
+def test_delete_repo_removes_index_files(store, tmp_path):
+    store.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "beta"))
+    store.upsert_code_chunks(2, COLLECTION, "a.py", _chunks("gamma"))
+
+    stats = store.delete_repo(1, COLLECTION)
+
+    assert stats["points"] == 2
+    assert stats["bytes"] > 0
+    assert not (tmp_path / COLLECTION / "repo_1").exists()
+    assert store.search_code("alpha", 1, COLLECTION) == []
+    assert len(store.search_code("gamma", 2, COLLECTION)) == 1
+
+
+def test_index_removed_by_another_process_is_reopened(store, tmp_path):
+    store.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha"))
+    # delete_repo in another worker only closes that worker's handles.
+    shutil.rmtree(tmp_path / COLLECTION / "repo_1")
+
+    assert store.search_code("alpha", 1, COLLECTION) == []
+    store.upsert_code_chunks(1, COLLECTION, "b.py", _chunks("beta"))
+
+    reader = RepoVectorIndex(str(tmp_path / COLLECTION / "repo_1"))
+    assert [path for _, _, path, _, _ in reader.points()] == ["b.py"]
+    reader.close()
+
+
+def test_collect_orphans_pages_through_index(store):
+    store.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha"))
+    store.upsert_code_chunks(1, COLLECTION, "gone.py", _chunks("beta", "gamma", "delta"))
+
+    report = store.collect_orphans(1, COLLECTION, {"a.py"}, page_size=2)
+
+    assert report["scanned"] == 4
+    assert report["deleted"] == 3
+    assert [r["payload"]["path"] for r in store.search_code("x", 1, COLLECTION, top_k=10)] == ["a.py"]
+
+
+def test_sync_files_updates_positions_of_kept_chunks(store):
+    chunks = _chunks("alpha", "beta")
+    for start, chunk in zip((0, 40), chunks):
+        chunk.update(start_byte=start, end_byte=start + 30, parent="Old")
+    store.sync_files(1, COLLECTION, [("a.py", chunks)])
+
+    chunks[1].update(start_byte=52, end_byte=82)
+    del chunks[1]["parent"]
+    stats = store.sync_files(1, COLLECTION, [("a.py", chunks)])
+
+    assert stats == {"upserted": 0, "deleted": 0, "unchanged": 1, "moved": 1}
+    beta = store.search_code("def beta():\n    return 'beta'", 1, COLLECTION, top_k=1)[0]["payload"]
+    assert (beta["chunk_index"], beta["start_byte"], beta["end_byte"]) == (1, 52, 82)
+    assert "parent" not in beta
+
+
+def test_referenced_hashes_spans_repo_indexes(store):
+    store.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "beta"))
+    store.upsert_code_chunks(2, COLLECTION, "a.py", _chunks("alpha"))
+    hashes = store.repo_content_hashes(1, COLLECTION)
+
+    store.delete_repo(1, COLLECTION)
+
+    assert len(hashes) == 2
+    assert store.referenced_hashes(COLLECTION, sorted(hashes)) == store.repo_content_hashes(2, COLLECTION)
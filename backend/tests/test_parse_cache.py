@@ -0,0 +1,73 @@
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.database import Base, engine
+from app.services.chunking import CodeChunkingService
+from app.services.parse_cache import ParseCache, git_blob_sha
+from app.workers.tasks import _analyze_files, _blob_shas
+
+SOURCE = b'''import os
+
+
+def helper(path):
+    """Resolve a path."""
+    return os.path.abspath(path)
+'''
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+
+
+def test_git_blob_sha_matches_git():
+    assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+def test_blob_shas_lists_head(tmp_path):
+    (tmp_path / "app.py").write_bytes(SOURCE)
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    subprocess.run(["git", "-C", str(tmp_path), "add", "app.py"], check=True)
+    subprocess.run(
+        ["git", "-C", str(tmp_path), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"],
+        check=True,
+    )
+
+    assert _blob_shas(str(tmp_path)) == {"app.py": git_blob_sha(SOURCE)}
+
+
+def test_cached_analysis_is_reused_for_other_paths():
+    service = CodeChunkingService(mode="hierarchical", min_bytes=0)
+    cache = ParseCache(service.version)
+    source = SOURCE + b'\n\nif __name__ == "__main__":\n    helper(".")\n'
+    analysis = service.analyze_file(source, "pkg/setup.py", "python")
+    key = (git_blob_sha(source), "python")
+    cache.put_many([(key, analysis)])
+
+    found = cache.get_many({"other/run.py": key, "missing.py": ("0" * 40, "python")})
+
+    assert list(found) == ["other/run.py"]
+    copy = found["other/run.py"]
+    assert copy == service.analyze_file(source, "other/run.py", "python")
+    assert [chunk["name"] for chunk in copy.chunks] == ["run.py", "helper"]
+    assert copy.chunks[0]["imports"] == ["import os"]
+    assert ParseCache("other-version").get_many({"other/run.py": key}) == {}
+
+
+def test_unchanged_files_skip_reading_and_parsing():
+    service = CodeChunkingService(mode="hierarchical", min_bytes=0)
+    content = SOURCE + b"\n\ndef other():\n    return 1\n"
+    entries = [("src/app.py", "python", git_blob_sha(content), lambda: content)]
+
+    first, first_stats = _analyze_files(service, entries)
+    read = MagicMock(side_effect=AssertionError("file was read"))
+    second, second_stats = _analyze_files(service, [(*entries[0][:3], read)])
+
+    assert first_stats == {"hits": 0, "misses": 1}
+    assert second_stats == {"hits": 1, "misses": 0}
+    assert second["src/app.py"].chunks == first["src/app.py"].chunks
+    read.assert_not_called()
@@ -0,0 +1,41 @@
+import asyncio
+from unittest.mock import patch
+
+from app.core import qdrant
+
+
+def test_sync_client_is_shared_per_process():
+    first = qdrant.get_qdrant_client("http://qdrant-test:6333")
+    second = qdrant.get_qdrant_client("http://qdrant-test:6333")
+
+    assert first is second
+    assert qdrant.get_qdrant_client("http://other-qdrant:6333") is not first
+
+    # A forked worker must not reuse the parent's connection pool.
+    with patch("app.core.qdrant.os.getpid", return_value=-1):
+        assert qdrant.get_qdrant_client("http://qdrant-test:6333") is not first
+
+
+def test_client_options_come_from_settings():
+    with patch.object(qdrant.settings, "QDRANT_PREFER_GRPC", True), patch.object(
+        qdrant.settings, "QDRANT_POOL_SIZE", 8
+    ):
+        options = qdrant._client_options("http://qdrant-test:6333")
+
+    assert options["prefer_grpc"] is True
+    assert options["pool_size"] == 8
+    assert options["timeout"] == qdrant.settings.QDRANT_TIMEOUT
+
+
+def test_async_client_is_shared_per_event_loop():
+    async def get_pair():
+        return (
+            qdrant.get_async_qdrant_client("http://qdrant-test:6333"),
+            qdrant.get_async_qdrant_client("http://qdrant-test:6333"),
+        )
+
+    first, second = asyncio.run(get_pair())
+    third, _ = asyncio.run(get_pair())
+
+    assert first is second
+    assert third is not first
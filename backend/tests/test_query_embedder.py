@@ -0,0 +1,76 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.query_embedder import QueryEmbeddingBatcher
+
+
+class RecordingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_queries_share_one_batch():
+    embed_fn = RecordingEmbedder()
+    batcher = QueryEmbeddingBatcher(embed_fn, max_batch_size=8, max_wait_ms=20, cache_size=0)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(q) for q in ["a", "bb", "ccc", "bb"]))
+
+    vectors = asyncio.run(run())
+
+    assert embed_fn.calls == [["a", "bb", "ccc"]]
+    assert [vector[0] for vector in vectors] == [1, 2, 3, 2]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_full_batch_flushes_without_waiting():
+    embed_fn = RecordingEmbedder()
+    batcher = QueryEmbeddingBatcher(embed_fn, max_batch_size=2, max_wait_ms=10_000, cache_size=0)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("b")), timeout=5
+        )
+
+    asyncio.run(run())
+
+    assert embed_fn.calls == [["a", "b"]]
+
+
+def test_repeated_queries_are_served_from_lru_cache():
+    embed_fn = RecordingEmbedder()
+    batcher = QueryEmbeddingBatcher(embed_fn, max_batch_size=4, max_wait_ms=1, cache_size=2)
+
+    async def run():
+        await batcher.embed("a")
+        await batcher.embed("b")
+        await batcher.embed("a")
+        await batcher.embed("c")  # evicts "b", the least recently used
+        await batcher.embed("b")
+
+    asyncio.run(run())
+
+    assert embed_fn.calls == [["a"], ["b"], ["c"], ["b"]]
+    assert batcher.stats()["cache_hits"] == 1
+
+
+def test_embed_errors_propagate_to_every_waiter():
+    def failing(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = QueryEmbeddingBatcher(failing, max_batch_size=4, max_wait_ms=1, cache_size=0)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.embed(""))
@@ -0,0 +1,222 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+from app.models.chat import ChatMessage, ChatSession
+from app.models.documentation import DocType, Documentation
+from app.models.repository import Repository
+from app.models.repository_cache import RepositoryCache
+from app.models.repository_file import RepositoryFile
+from app.models.user import User
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.workers.tasks import (
+    analyze_changed_files,
+    analyze_repository,
+    gc_orphaned_vectors,
+    purge_repository,
+)
+from tests.test_vector_db import FakeEmbeddingService, _chunks
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+
+
+@pytest.fixture
+def db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _seed(db, github_id, is_active):
+    user = User(email=f"purge{github_id}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    repo = Repository(
+        user_id=user.id,
+        github_id=github_id,
+        name="repo",
+        full_name=f"owner/repo{github_id}",
+        is_active=is_active,
+    )
+    db.add(repo)
+    db.flush()
+    session = ChatSession(user_id=user.id, repository_id=repo.id)
+    db.add(session)
+    db.flush()
+    db.add_all(
+        [ChatMessage(session_id=session.id, role="user", content="hello") for _ in range(3)]
+        + [RepositoryFile(repository_id=repo.id, path=f"{i}.py", language="python", payload={"functions": []}) for i in range(5)]
+        + [
+            RepositoryCache(repository_id=repo.id, cache_type="analysis", payload={"files": []}),
+            Documentation(repository_id=repo.id, doc_type=DocType.README, content="# Repo"),
+        ]
+    )
+    db.commit()
+    return repo.id, session.id
+
+
+def test_purge_repository_deletes_everything_in_batches(db):
+    repo_id, session_id = _seed(db, 9101, is_active=False)
+    other_id, _ = _seed(db, 9102, is_active=True)
+    store = MagicMock()
+    store.delete_repo.return_value = {"points": 7, "bytes": 4096}
+    store.repo_content_hashes.return_value = {"a" * 64}
+    store.collect_contents.return_value = {"rows": 1, "bytes": 120}
+
+    with patch("app.workers.tasks.get_vector_store", return_value=store), patch(
+        "app.workers.tasks.CacheService"
+    ) as cache, patch("app.workers.tasks.settings.PURGE_BATCH_SIZE", 2):
+        cache.return_value.delete_many.return_value = 2
+        report = purge_repository(repo_id)
+
+    assert report["status"] == "completed"
+    assert report["points"] == 7
+    assert report["rows"] == {
+        "chat_messages": 3,
+        "chat_sessions": 1,
+        "repository_files": 5,
+        "repository_cache": 1,
+        "documentation": 1,
+        "repositories": 1,
+        "chunk_contents": 1,
+    }
+    store.collect_contents.assert_called_once_with("docubot_code", {"a" * 64})
+    assert report["bytes"]["chunk_contents"] == 120
+    assert report["bytes"]["chat_messages"] == 15
+    assert report["bytes"]["total"] > 4096
+    keys = cache.return_value.delete_many.call_args[0][0]
+    assert f"chat:session:{session_id}:history" in keys
+    assert f"repo:{repo_id}:docs:readme" in keys
+
+    db.expire_all()
+    assert db.query(Repository).filter(Repository.id == repo_id).first() is None
+    assert db.query(RepositoryFile).filter(RepositoryFile.repository_id == repo_id).count() == 0
+    assert db.query(RepositoryFile).filter(RepositoryFile.repository_id == other_id).count() == 5
+
+
+def test_purge_repository_skips_active_repos(db):
+    repo_id, _ = _seed(db, 9103, is_active=True)
+
+    with patch("app.workers.tasks.get_vector_store") as get_store:
+        report = purge_repository(repo_id)
+
+    assert report["status"] == "skipped"
+    get_store.assert_not_called()
+
+
+def test_gc_orphaned_vectors_uses_file_rows_and_skips_empty_repos(db):
+    repo_id, _ = _seed(db, 9104, is_active=True)
+    empty = Repository(user_id=1, github_id=9105, name="empty", full_name="owner/empty", is_active=True)
+    db.add(empty)
+    db.commit()
+    store = MagicMock()
+    store.collect_orphans.return_value = {
+        "orphans": 3,
+        "deleted": 0,
+        "missing_files": 1,
+        "stale_chunks": 0,
+    }
+
+    with patch("app.workers.tasks.get_vector_store", return_value=store):
+        report = gc_orphaned_vectors(dry_run=True)
+
+    calls = {call.args[0]: call for call in store.collect_orphans.call_args_list}
+    assert calls[repo_id].args[2] == {f"{i}.py" for i in range(5)}
+    assert calls[repo_id].kwargs["dry_run"] is True
+    assert empty.id in report["skipped"]
+    assert report["repositories"][repo_id]["orphans"] == 3
+    assert report["orphans"] >= 3
+    store.collect_contents.assert_called_once_with("docubot_code", dry_run=True)
+
+
+def test_gc_orphaned_vectors_keeps_files_added_during_the_scan(db, tmp_path):
+    repo_id, _ = _seed(db, 9108, is_active=True)
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_store.settings.EMBEDDING_CACHE_ENABLED", False
+    ), patch("app.services.vector_store.settings.CONTENT_STORE_ENABLED", False):
+        store = NumpyVectorStore(root=str(tmp_path))
+    store.upsert_code_chunks(repo_id, "docubot_code", "0.py", _chunks("alpha"))
+    store.upsert_code_chunks(repo_id, "docubot_code", "gone.py", _chunks("beta"))
+    scan = store.iter_repo_points
+
+    def scan_with_concurrent_sync(*args, **kwargs):
+        for number, page in enumerate(scan(*args, **kwargs)):
+            if number == 0:
+                # An analysis commits a new file and its points mid-scan.
+                other = SessionLocal()
+                other.add(RepositoryFile(repository_id=repo_id, path="late.py", language="python", payload={}))
+                other.commit()
+                other.close()
+                store.upsert_code_chunks(repo_id, "docubot_code", "late.py", _chunks("gamma"))
+            yield page
+
+    try:
+        with patch("app.workers.tasks.get_vector_store", return_value=store), patch.object(
+            store, "iter_repo_points", scan_with_concurrent_sync
+        ), patch("app.workers.tasks.settings.VECTOR_GC_PAGE_SIZE", 1):
+            report = gc_orphaned_vectors(repo_id, dry_run=False)
+    finally:
+        paths = {point["path"] for page in store.iter_repo_points(repo_id, "docubot_code") for point in page}
+        store._close_indexes(str(tmp_path))
+
+    assert report["repositories"][repo_id]["orphan_paths"] == ["gone.py"]
+    assert report["deleted"] == 1
+    assert paths == {"0.py", "late.py"}
+
+
+def test_analysis_tasks_skip_inactive_repos(db):
+    repo_id, _ = _seed(db, 9106, is_active=False)
+
+    with patch("app.workers.tasks.get_vector_store") as get_store, patch(
+        "app.workers.tasks._clone_repo"
+    ) as clone:
+        changed = analyze_changed_files(repo_id, ["new.py"], [], [])
+        full = analyze_repository(repo_id)
+
+    assert changed["status"] == full["status"] == "skipped"
+    get_store.assert_not_called()
+    clone.assert_not_called()
+    assert db.query(RepositoryCache).filter(
+        RepositoryCache.repository_id == repo_id, RepositoryCache.cache_type == "analysis_status"
+    ).count() == 0
+
+
+def test_analyze_changed_files_stops_when_repo_is_deleted_mid_run(db):
+    repo_id, _ = _seed(db, 9107, is_active=True)
+    repo = db.query(Repository).filter(Repository.id == repo_id).one()
+    db.query(User).filter(User.id == repo.user_id).update({"github_access_token": "token"})
+    db.commit()
+
+    def fetch(full_name, path, token):
+        # The DELETE endpoint runs while files are being fetched.
+        other = SessionLocal()
+        other.query(Repository).filter(Repository.id == repo_id).update({"is_active": False})
+        other.commit()
+        other.close()
+        return b"def f():\n    return 1\n"
+
+    store = MagicMock()
+    with patch("app.workers.tasks.get_vector_store", return_value=store), patch(
+        "app.workers.tasks._fetch_github_file", side_effect=fetch
+    ), patch("app.workers.tasks.settings.PARSE_CACHE_ENABLED", False):
+        result = analyze_changed_files(repo_id, ["new.py"], [], [])
+
+    assert result["status"] == "skipped"
+    store.sync_files.assert_not_called()
+    db.expire_all()
+    paths = {path for (path,) in db.query(RepositoryFile.path).filter(RepositoryFile.repository_id == repo_id)}
+    assert "new.py" not in paths
+
+
+def test_purge_repository_retries_with_backoff():
+    assert purge_repository.autoretry_for == (Exception,)
+    assert purge_repository.retry_backoff
+    assert purge_repository.max_retries > 0
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from app.services.reranker import CrossEncoderReranker
+
+
+class RecordingScorer:
+    """Scores a pair by how often the query's words appear in the chunk."""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, pairs):
+        self.calls.append(list(pairs))
+        time.sleep(self.delay)
+        return [sum(text.count(word) for word in query.split()) for query, text in pairs]
+
+
+def _results(*contents):
+    return [
+        {"score": 1.0 - i / 10, "id": i, "payload": {"path": f"{i}.py", "content": content, "content_hash": f"h{i}"}}
+        for i, content in enumerate(contents)
+    ]
+
+
+def test_rerank_orders_by_cross_encoder_score_and_caches_pairs():
+    scorer = RecordingScorer()
+    reranker = CrossEncoderReranker(model_name="fake", budget_ms=1000, score_fn=scorer)
+    results = _results("setup()", "def parse(): parse tokens", "parse")
+
+    first = reranker.rerank("parse", results, top_k=2)
+    second = reranker.rerank("parse", results, top_k=2)
+
+    assert [item["id"] for item in first] == [1, 2]
+    assert first[0]["rerank_score"] == 2
+    assert "rerank_score" not in results[1]
+    assert second == first
+    assert len(scorer.calls) == 1
+    assert reranker.stats()["cache_hits"] == 3
+
+
+def test_rerank_skips_when_predicted_over_budget():
+    scorer = RecordingScorer()
+    reranker = CrossEncoderReranker(model_name="fake", budget_ms=10, score_fn=scorer)
+    reranker._ms_per_pair = 5.0
+    results = _results("a", "parse", "parse parse")
+
+    assert reranker.rerank("parse", results, top_k=2) == results[:2]
+    assert scorer.calls == []
+    assert reranker.stats()["skipped"] == 1
+
+
+def test_rerank_async_falls_back_at_deadline():
+    scorer = RecordingScorer(delay=0.2)
+    reranker = CrossEncoderReranker(model_name="fake", budget_ms=20, score_fn=scorer)
+    results = _results("a", "parse")
+
+    fallback = asyncio.run(reranker.rerank_async("parse", results, top_k=1))
+
+    assert fallback == results[:1]
+    assert reranker.stats()["timeouts"] == 1
+    reranker._executor.shutdown(wait=True)
+    # The late batch still lands in the cache for the next request.
+    assert reranker.stats()["cache_entries"] == 2
@@ -0,0 +1,33 @@
+from app.services.result_cutoff import SearchResults, apply_cutoff, elbow_threshold
+
+
+def _hits(*scores):
+    return [{"id": i, "score": score} for i, score in enumerate(scores)]
+
+
+def test_elbow_cuts_at_largest_drop():
+    assert elbow_threshold([0.82, 0.79, 0.41, 0.38], min_drop=0.25) == 0.79
+    # A smooth decline has no elbow.
+    assert elbow_threshold([0.8, 0.75, 0.7, 0.65], min_drop=0.25) is None
+    # Fused RRF scores: hits in both rankings vs hits in one.
+    assert elbow_threshold([0.0328, 0.0323, 0.0164, 0.0161], min_drop=0.25) == 0.0323
+
+
+def test_apply_cutoff_reports_dropped_and_keeps_order():
+    results = _hits(0.4, 0.9, 0.85, 0.2)
+
+    by_score = apply_cutoff(results, min_score=0.5)
+    adaptive = apply_cutoff(results, adaptive=True)
+
+    assert isinstance(by_score, SearchResults)
+    assert [item["id"] for item in by_score] == [1, 2]
+    assert by_score.dropped == 2
+    assert [item["id"] for item in adaptive] == [1, 2]
+    assert apply_cutoff(results).dropped == 0
+
+
+def test_apply_cutoff_always_keeps_best_result():
+    kept = apply_cutoff(_hits(0.3, 0.1), min_score=0.9)
+
+    assert [item["id"] for item in kept] == [0]
+    assert kept.dropped == 1
@@ -0,0 +1,31 @@
+from app.services.sparse_vectors import (
+    document_sparse_vector,
+    query_sparse_vector,
+    term_index,
+    tokenize_code,
+)
+
+
+def test_tokenize_code_splits_camel_and_snake_case():
+    tokens = tokenize_code("def parseFileTree(repo_id): return HTTPServer")
+
+    assert "parsefiletree" in tokens
+    assert {"parse", "file", "tree"} <= set(tokens)
+    assert {"repo_id", "repo", "id"} <= set(tokens)
+    assert {"httpserver", "http", "server"} <= set(tokens)
+
+
+def test_document_weights_saturate_repeated_terms():
+    vector = document_sparse_vector("node node node node node other")
+    weights = dict(zip(vector.indices, vector.values))
+
+    assert vector.indices == sorted(vector.indices)
+    assert weights[term_index("node")] > weights[term_index("other")]
+    assert weights[term_index("node")] < 5 * weights[term_index("other")]
+
+
+def test_query_vector_has_unit_weights():
+    vector = query_sparse_vector("parse_file parse_file")
+
+    assert set(vector.values) == {1.0}
+    assert len(vector.indices) == 3
@@ -0,0 +1,379 @@
+import asyncio
+import hashlib
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.services.chunking import CodeChunkingService
+from app.services.vector_db import VectorDBService
+
+COLLECTION = "test_code"
+
+
+class FakeEmbeddingService:
+    model_id = "fake-model"
+    dimension = 8
+
+    def __init__(self):
+        self.window_stats = {}
+        self.calls = []
+
+    def generate_embeddings(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.array(
+            [np.frombuffer(hashlib.sha256(text.encode()).digest()[:8], dtype=np.uint8) for text in texts],
+            dtype=np.float32,
+        ) + 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def generate_embedding(self, text):
+        return self.generate_embeddings([text])[0].tolist()
+
+
+@pytest.fixture
+def vector_service():
+    with patch("app.services.vector_store.EmbeddingService", FakeEmbeddingService), patch(
+        "app.services.vector_db.settings.EMBEDDING_CACHE_ENABLED", False
+    ), patch("app.services.vector_db.settings.CONTENT_STORE_ENABLED", False), patch(
+        "app.services.vector_db.settings.QDRANT_HYBRID_SEARCH", True
+    ):
+        service = VectorDBService(client=QdrantClient(":memory:"))
+    service.create_collection(COLLECTION)
+    return service
+
+
+def _chunks(*names):
+    return [
+        {"type": "function", "name": name, "code": f"def {name}():\n    return '{name}'", "chunk_index": i}
+        for i, name in enumerate(names)
+    ]
+
+
+def _count(service, **conditions):
+    must = [
+        models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        for key, value in conditions.items()
+    ]
+    return service.client.count(COLLECTION, count_filter=models.Filter(must=must)).count
+
+
+def test_upsert_and_search_code(vector_service):
+    vector_service.upsert_code_chunks(1, COLLECTION, "app/a.py", _chunks("alpha", "beta"))
+
+    results = vector_service.search_code("def beta():\n    return 'beta'", 1, COLLECTION, top_k=1)
+
+    assert results[0]["payload"]["symbol"] == "beta"
+    assert results[0]["payload"]["path"] == "app/a.py"
+    assert vector_service.search_code("beta", 2, COLLECTION) == []
+
+
+def test_hybrid_search_ranks_exact_identifier_first(vector_service):
+    chunks = [
+        {"type": "function", "name": name, "code": f"def {name}(node):\n    return node.children"}
+        for name in ("walk_tree", "parseFileTree", "render_node", "load_config", "visit")
+    ]
+    vector_service.upsert_code_chunks(1, COLLECTION, "app/tree.py", chunks)
+
+    results = vector_service.search_code("where is parse_file_tree defined?", 1, COLLECTION, top_k=2)
+
+    assert results[0]["payload"]["symbol"] == "parseFileTree"
+
+
+def test_dense_only_collections_still_supported(vector_service):
+    with patch("app.services.vector_db.settings.QDRANT_HYBRID_SEARCH", False), patch(
+        "app.services.vector_store.EmbeddingService", FakeEmbeddingService
+    ), patch(
+        "app.services.vector_db.settings.EMBEDDING_CACHE_ENABLED", False
+    ), patch("app.services.vector_db.settings.CONTENT_STORE_ENABLED", False):
+        service = VectorDBService(client=QdrantClient(":memory:"))
+    service.create_collection(COLLECTION)
+    service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha"))
+
+    results = service.search_code("def alpha():\n    return 'alpha'", 1, COLLECTION, top_k=1)
+
+    assert results[0]["payload"]["symbol"] == "alpha"
+
+
+def test_bulk_upsert_batches_embeddings_across_files(vector_service):
+    files = [(f"pkg/mod_{i}.py", _chunks(f"f{i}_a", f"f{i}_b")) for i in range(5)]
+
+    stats = vector_service.upsert_points(
+        COLLECTION,
+        vector_service.iter_chunk_points(7, files, embed_batch_size=4),
+        batch_size=3,
+        max_in_flight=2,
+    )
+
+    assert stats == {"points": 10, "batches": 4, "retries": 0}
+    assert [len(call) for call in vector_service.embedding_service.calls] == [4, 4, 2]
+    assert _count(vector_service, repo_id=7) == 10
+
+
+class FlakyClient:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, collection_name, points, wait=True):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.calls.append((len(points), wait))
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("transient")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_bulk_upsert_retries_and_ends_with_barrier(vector_service):
+    client = FlakyClient(failures=1)
+    vector_service.client = client
+    points = (
+        models.PointStruct(id=i, vector=[1.0] * 8, payload={"repo_id": 1}) for i in range(10)
+    )
+
+    with patch("app.services.vector_db.time.sleep"):
+        stats = vector_service.upsert_points(COLLECTION, points, batch_size=4, max_in_flight=2, retries=2)
+
+    assert stats["points"] == 10
+    assert stats["retries"] == 1
+    assert client.max_active <= 2
+    # Only the last batch waits for the write to be applied.
+    assert client.calls[-1] == (2, True)
+    assert all(not wait for _, wait in client.calls[:-1])
+
+
+def test_bulk_upsert_raises_after_retries_exhausted(vector_service):
+    vector_service.client = FlakyClient(failures=5)
+    points = [models.PointStruct(id=1, vector=[1.0] * 8, payload={})]
+
+    with patch("app.services.vector_db.time.sleep"), pytest.raises(RuntimeError):
+        vector_service.upsert_points(COLLECTION, points, retries=1)
+
+
+def test_delete_by_path_only_removes_that_file(vector_service):
+    vector_service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha"))
+    vector_service.upsert_code_chunks(1, COLLECTION, "b.py", _chunks("beta"))
+
+    vector_service.delete_by_path(1, COLLECTION, "a.py")
+
+    assert _count(vector_service, repo_id=1, path="a.py") == 0
+    assert _count(vector_service, repo_id=1, path="b.py") == 1
+
+
+def test_point_ids_are_content_derived_uuids(vector_service):
+    chunks = _chunks("alpha", "beta") + [{"code": "def alpha():\n    return 'alpha'"}]
+
+    ids = vector_service._chunk_point_ids(1, "a.py", chunks)
+
+    assert len(set(ids)) == 3  # the duplicate alpha gets its own occurrence ID
+    assert ids == vector_service._chunk_point_ids(1, "a.py", chunks)
+    assert ids[0] != vector_service._chunk_point_ids(2, "a.py", chunks)[0]
+    assert ids[0] != vector_service._chunk_point_ids(1, "b.py", chunks)[0]
+
+
+def test_sync_files_only_touches_changed_chunks(vector_service):
+    vector_service.sync_files(1, COLLECTION, [("a.py", _chunks("alpha", "beta", "gamma"))])
+    vector_service.embedding_service.calls.clear()
+
+    edited = _chunks("new_first", "alpha", "gamma")
+    stats = vector_service.sync_files(1, COLLECTION, [("a.py", edited)])
+
+    assert stats == {"upserted": 1, "deleted": 1, "unchanged": 1, "moved": 1}
+    assert vector_service.embedding_service.calls == [[edited[0]["code"]]]
+    records, _ = vector_service.client.scroll(COLLECTION, limit=10, with_payload=True)
+    assert {(r.payload["symbol"], r.payload["chunk_index"]) for r in records} == {
+        ("new_first", 0),
+        ("alpha", 1),
+        ("gamma", 2),
+    }
+
+
+def test_sync_files_replaces_legacy_integer_ids(vector_service):
+    vector_service.client.upsert(
+        COLLECTION,
+        points=[models.PointStruct(id=1_000_123, vector={"dense": [1.0] * 8}, payload={"repo_id": 1, "tenant": "1", "path": "a.py"})],
+    )
+
+    stats = vector_service.sync_files(1, COLLECTION, [("a.py", _chunks("alpha"))])
+
+    assert stats["deleted"] == 1
+    assert stats["upserted"] == 1
+    assert _count(vector_service, repo_id=1, path="a.py") == 1
+
+
+def test_backfill_tenants_and_promote_large_repo(vector_service):
+    legacy = [
+        models.PointStruct(
+            id=i,
+            vector={"dense": [float(i + 1)] + [1.0] * 7},
+            payload={"repo_id": 1 if i < 3 else 2, "path": f"{i}.py", "chunk_index": 0},
+        )
+        for i in range(5)
+    ]
+    vector_service.client.upsert(COLLECTION, points=legacy)
+
+    with patch("app.services.vector_db.settings.QDRANT_TENANT_PARTITIONING", True):
+        assert vector_service.backfill_tenants(COLLECTION, batch_size=2) == 5
+        assert vector_service.repo_point_counts(COLLECTION) == {1: 3, 2: 2}
+
+        assert vector_service.promote_repo(1, COLLECTION) == 3
+
+        assert vector_service.route(COLLECTION, 1) == "test_code_repo_1"
+        assert vector_service.route(COLLECTION, 2) == COLLECTION
+        assert _count(vector_service, repo_id=1) == 0
+        assert len(vector_service.search_code("anything", 1, COLLECTION, top_k=10)) == 3
+
+        # Writes for the promoted repo follow the route.
+        vector_service.sync_files(1, COLLECTION, [("0.py", _chunks("alpha"))])
+        assert vector_service.client.count("test_code_repo_1").count == 3
+        assert _count(vector_service, repo_id=1) == 0
+
+
+def test_search_many_embeds_once_and_returns_results_per_query(vector_service):
+    vector_service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "beta", "gamma"))
+    vector_service.embedding_service.calls.clear()
+
+    results = vector_service.search_many(["alpha", "gamma", "beta"], 1, COLLECTION, top_k=1)
+
+    assert [r[0]["payload"]["symbol"] for r in results] == ["alpha", "gamma", "beta"]
+    assert vector_service.embedding_service.calls == [["alpha", "gamma", "beta"]]
+    with pytest.raises(ValueError):
+        vector_service.search_many(["alpha", ""], 1, COLLECTION)
+
+
+def test_search_code_async_uses_async_client(vector_service):
+    from qdrant_client import AsyncQdrantClient
+
+    async def run():
+        client = AsyncQdrantClient(":memory:")
+        await client.create_collection(
+            COLLECTION,
+            vectors_config={"dense": models.VectorParams(size=8, distance=models.Distance.COSINE)},
+            sparse_vectors_config={"lexical": models.SparseVectorParams(modifier=models.Modifier.IDF)},
+        )
+        await client.upsert(COLLECTION, points=list(vector_service.iter_chunk_points(3, [("a.py", _chunks("alpha"))])))
+
+        embedder = vector_service.embedding_service
+        with patch("app.services.vector_db.get_async_qdrant_client", return_value=client), patch(
+            "app.services.vector_db.get_query_embedder"
+        ) as get_embedder:
+            get_embedder.return_value.embed = lambda query: _resolved(embedder.generate_embeddings([query])[0])
+            return await vector_service.search_code_async("def alpha():\n    return 'alpha'", 3, COLLECTION)
+
+    results = asyncio.run(run())
+
+    assert results[0]["payload"]["symbol"] == "alpha"
+
+
+async def _resolved(value):
+    return value
+
+
+def test_group_diversity_caps_chunks_per_file(vector_service):
+    vector_service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "alpha_one", "alpha_two"))
+    vector_service.upsert_code_chunks(1, COLLECTION, "b.py", _chunks("alpha_three"))
+
+    with patch("app.services.vector_db.settings.RETRIEVAL_MAX_PER_FILE", 1):
+        results = vector_service.search_code("alpha", 1, COLLECTION, top_k=4, diversity="group")
+
+    assert sorted(r["payload"]["path"] for r in results) == ["a.py", "b.py"]
+    assert results[0]["score"] >= results[1]["score"]
+
+
+def test_mmr_diversity_drops_duplicate_chunks(vector_service):
+    for path in ("a.py", "copy_of_a.py"):
+        vector_service.upsert_code_chunks(1, COLLECTION, path, _chunks("alpha"))
+    vector_service.upsert_code_chunks(1, COLLECTION, "b.py", _chunks("beta", "gamma"))
+    query = "def alpha():\n    return 'alpha'"
+
+    plain = vector_service.search_code(query, 1, COLLECTION, top_k=2)
+    with patch("app.services.vector_db.settings.RETRIEVAL_MMR_LAMBDA", 0.5):
+        diverse = vector_service.search_code(query, 1, COLLECTION, top_k=2, diversity="mmr")
+
+    assert [r["payload"]["symbol"] for r in plain] == ["alpha", "alpha"]
+    assert diverse[0]["payload"]["symbol"] == "alpha"
+    assert diverse[1]["payload"]["symbol"] != "alpha"
+    assert "vector" not in diverse[0]
+
+
+def test_delete_repo_removes_shared_and_dedicated_points(vector_service):
+    vector_service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "beta"))
+    vector_service.upsert_code_chunks(2, COLLECTION, "a.py", _chunks("gamma"))
+    vector_service.upsert_code_chunks(3, COLLECTION, "a.py", _chunks("delta"))
+    vector_service.promote_repo(3, COLLECTION)
+
+    shared = vector_service.delete_repo(1, COLLECTION)
+    dedicated = vector_service.delete_repo(3, COLLECTION)
+
+    assert shared["points"] == 2
+    assert shared["bytes"] > 0
+    assert dedicated["points"] == 1
+    assert _count(vector_service, repo_id=1) == 0
+    assert _count(vector_service, repo_id=2) == 1
+    assert vector_service.route(COLLECTION, 3) == COLLECTION
+    assert not vector_service.client.collection_exists("test_code_repo_3_data")
+    assert vector_service.delete_repo(1, COLLECTION) == {"points": 0, "bytes": 0}
+
+
+def test_collect_orphans_reports_and_deletes(vector_service):
+    vector_service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha", "beta"))
+    vector_service.upsert_code_chunks(1, COLLECTION, "gone.py", _chunks("gamma", "delta"))
+    vector_service.upsert_code_chunks(2, COLLECTION, "gone.py", _chunks("gamma"))
+    # An older version of a.py's first chunk that was never cleaned up.
+    vector_service.upsert_code_chunks(1, COLLECTION, "a.py", _chunks("alpha_v1"))
+    known = {"a.py", "b.py"}
+
+    preview = vector_service.collect_orphans(1, COLLECTION, known, dry_run=True, page_size=2)
+    report = vector_service.collect_orphans(1, COLLECTION, known, page_size=2)
+
+    assert preview["orphans"] == 2
+    assert preview["deleted"] == 0
+    assert preview["missing_paths"] == ["b.py"]
+    assert preview["stale_chunks"] == 1
+    assert preview["stale_paths"] == ["a.py"]
+    assert report["deleted"] == 2
+    assert report["orphan_paths"] == ["gone.py"]
+    assert _count(vector_service, repo_id=1, path="gone.py") == 0
+    assert _count(vector_service, repo_id=2, path="gone.py") == 1
+
+
+def test_sync_files_updates_positions_of_kept_chunks(vector_service):
+    chunker = CodeChunkingService(mode="hierarchical", min_bytes=0)
+    before = b"def a():\n    return 1\n\n\ndef b():\n    return 2\n"
+    after = b"def a():\n    value = 1\n    return value\n\n\ndef b():\n    return 2\n"
+    vector_service.sync_files(1, COLLECTION, [("a.py", chunker.chunk_python_file(before, "a.py"))])
+
+    stats = vector_service.sync_files(1, COLLECTION, [("a.py", chunker.chunk_python_file(after, "a.py"))])
+
+    assert stats == {"upserted": 1, "deleted": 1, "unchanged": 0, "moved": 1}
+    records, _ = vector_service.client.scroll(COLLECTION, limit=10, with_payload=True)
+    b = next(r.payload for r in records if r.payload["symbol"] == "b")
+    assert (b["start_byte"], b["end_byte"]) == (after.index(b"def b"), len(after) - 1)
+
+
+def test_min_score_applies_to_dense_similarity_of_fused_results(vector_service):
+    for name in ("alpha", "beta", "gamma"):
+        vector_service.upsert_code_chunks(1, COLLECTION, f"{name}.py", _chunks(name))
+    query = "def beta():\n    return 'beta'"
+    assert vector_service._fused(query)
+
+    for diversity in ("none", "mmr", "group"):
+        everything = vector_service.search_code(query, 1, COLLECTION, top_k=3, diversity=diversity)
+        strict = vector_service.search_code(
+            query, 1, COLLECTION, top_k=3, diversity=diversity, min_score=0.999
+        )
+
+        assert len(everything) == 3
+        assert [r["payload"]["symbol"] for r in strict] == ["beta"]
+        assert strict.dropped == 2
+        assert all("dense_score" not in r for r in everything + strict)